@@ -0,0 +1,158 @@
+"""Barcodes (Code 128 en EAN-13) zonder externe afhankelijkheden
+
+Een barcode wordt eerst omgezet naar een reeks breedtes in modules (streep,
+ruimte, streep, ...). barcode_mask rendert die reeks met een geheel aantal
+pixels per module, zodat elke streep op de pixelrand valt en scanbaar blijft.
+De patronen per teken worden eenmaal bij het laden opgebouwd.
+"""
+import functools
+
+from PIL import Image
+
+# Code 128 patronen per waarde (0-106) als streep/ruimte breedtes
+CODE128_PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312",
+    "132212", "221213", "221312", "231212", "112232", "122132", "122231", "113222",
+    "123122", "123221", "223211", "221132", "221231", "213212", "223112", "312131",
+    "311222", "321122", "321221", "312212", "322112", "322211", "212123", "212321",
+    "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121",
+    "313121", "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111", "111224",
+    "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112",
+    "421211", "212141", "214121", "412121", "111143", "111341", "131141", "114113",
+    "114311", "411113", "411311", "113141", "114131", "311141", "411131", "211412",
+    "211214", "211232", "2331112",
+)
+CODE128_RUNS = tuple(tuple(int(width) for width in pattern) for pattern in CODE128_PATTERNS)
+CODE_C, CODE_B = 99, 100
+START_B, START_C, STOP = 104, 105, 106
+
+# EAN-13: L codes (ruimte/streep breedtes); R heeft dezelfde breedtes, G is omgekeerd
+EAN_L = ("3211", "2221", "2122", "1411", "1132", "1231", "1114", "1312", "1213", "3112")
+EAN_RUNS = {
+    "L": tuple(tuple(int(width) for width in code) for code in EAN_L),
+    "G": tuple(tuple(int(width) for width in reversed(code)) for code in EAN_L),
+}
+EAN_RUNS["R"] = EAN_RUNS["L"]
+# Pariteit van de linker helft, bepaald door het eerste cijfer
+EAN_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+              "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+# Witruimte links en rechts in modules
+QUIET_ZONES = {"code128": (10, 10), "ean13": (11, 7)}
+
+
+class BarcodeError(ValueError):
+    """De data kan niet in de gekozen barcode worden gecodeerd of past niet"""
+
+
+def _digit_run(data, start):
+    end = start
+    while end < len(data) and data[end].isdigit():
+        end += 1
+    return end - start
+
+
+def code128_values(data):
+    """Code 128 waarden inclusief start, controlegetal en stop
+
+    Gebruikt code set B voor tekst en schakelt naar code set C (twee cijfers
+    per teken) voor reeksen van minstens vier cijfers.
+    """
+    if not data:
+        raise BarcodeError("Code 128 heeft minstens een teken nodig")
+    for char in data:
+        if not 32 <= ord(char) <= 127:
+            raise BarcodeError(f"Teken {char!r} kan niet in Code 128 (alleen ASCII 32-127)")
+
+    values = []
+    code_set = None
+    position = 0
+    while position < len(data):
+        run = _digit_run(data, position)
+        # Naar C als het de moeite loont: 4+ cijfers aan begin of eind, anders 6+
+        at_edge = position == 0 or position + run == len(data)
+        if run >= (4 if at_edge else 6):
+            # Bij een oneven aantal gaat het laatste cijfer in code set B
+            if code_set != "C":
+                values.append(START_C if code_set is None else CODE_C)
+                code_set = "C"
+            for _ in range(run // 2):
+                values.append(int(data[position:position + 2]))
+                position += 2
+            continue
+        if code_set != "B":
+            values.append(START_B if code_set is None else CODE_B)
+            code_set = "B"
+        values.append(ord(data[position]) - 32)
+        position += 1
+
+    checksum = values[0] + sum(i * value for i, value in enumerate(values[1:], 1))
+    return values + [checksum % 103, STOP]
+
+
+def code128_runs(data):
+    runs = []
+    for value in code128_values(data):
+        runs.extend(CODE128_RUNS[value])
+    return tuple(runs)
+
+
+def ean13_check_digit(digits):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def ean13_runs(data):
+    """EAN-13 uit 12 cijfers (controlecijfer wordt berekend) of 13 cijfers"""
+    if not data.isdigit() or len(data) not in (12, 13):
+        raise BarcodeError("EAN-13 heeft 12 of 13 cijfers nodig")
+    check = ean13_check_digit(data)
+    if len(data) == 13 and data[12] != check:
+        raise BarcodeError(f"Ongeldig EAN-13 controlecijfer {data[12]}, verwacht {check}")
+    digits = data[:12] + check
+
+    runs = [1, 1, 1]
+    for digit, parity in zip(digits[1:7], EAN_PARITY[int(digits[0])]):
+        runs.extend(EAN_RUNS[parity][int(digit)])
+    runs.extend((1, 1, 1, 1, 1))
+    for digit in digits[7:]:
+        runs.extend(EAN_RUNS["R"][int(digit)])
+    runs.extend((1, 1, 1))
+    return tuple(runs)
+
+
+SYMBOLOGIES = {"code128": code128_runs, "ean13": ean13_runs}
+
+
+def barcode_runs(symbology, data):
+    """Streep/ruimte breedtes in modules, beginnend met een streep"""
+    try:
+        encode = SYMBOLOGIES[symbology]
+    except KeyError:
+        raise BarcodeError(f"Onbekend barcode type: {symbology}") from None
+    return encode(data)
+
+
+@functools.lru_cache(maxsize=1024)
+def barcode_mask(symbology, data, width, height):
+    """Rendert een barcode als 1-bit masker van maximaal width x height pixels
+
+    Elke module is een geheel aantal pixels breed, zo groot mogelijk met de
+    witruimte er nog naast. Het masker bevat alleen de strepen; de aanroeper
+    centreert het in het beschikbare vak.
+    """
+    runs = barcode_runs(symbology, data)
+    quiet_left, quiet_right = QUIET_ZONES[symbology]
+    module = width // (sum(runs) + quiet_left + quiet_right)
+    if module < 1 or height < 1:
+        raise BarcodeError(f"Barcode '{data}' past niet in {width} x {height} pixels")
+
+    # Een pixelrij opbouwen en verticaal uitrekken
+    row = b"".join((b"\xff" if i % 2 == 0 else b"\x00") * (run * module)
+                   for i, run in enumerate(runs))
+    line = Image.frombytes("L", (len(row), 1), row)
+    return line.resize((len(row), height), Image.NEAREST).convert("1", dither=Image.NONE)
@@ -0,0 +1,311 @@
+"""Batch modus: rendert vellen uit een JSONL jobbestand op een process pool
+
+Elke regel is een JSON object met een ``mode`` ("label" of "shape"), een
+``output`` pad en verder de velden van LabelSheetParams of ShapeSheetParams,
+bijvoorbeeld::
+
+    {"mode": "label", "output": "out/001.png", "label_width_cm": 5, "text": "Lot 1"}
+    {"mode": "shape", "output": "out/002.png", "shape_type": "Cirkel", "color": "#723744", "line_thickness": 4}
+
+Een ``output`` pad dat op ``.pdf`` eindigt wordt als vector PDF geschreven;
+``.zpl`` en ``.epl`` (of ``zpl://host:poort``) geven printertaal voor een
+labelprinter (zie printer_lang.py).
+
+Mode "merge" vult labels met tekst uit een CSV of JSONL bestand (zie merge.py);
+``output`` is dan een PDF of een patroon met ``{page}``::
+
+    {"mode": "merge", "output": "out/lots.pdf", "data": "lots.csv", "template": "Lot {lot}"}
+
+Mode "roll" zet labels op een doorlopende rol in een lange PNG: de velden van
+LabelSheetParams plus ``roll_width_cm`` en ``count``; met ``data`` (en
+eventueel ``template``) komt er een label per record::
+
+    {"mode": "roll", "output": "out/rol.png", "roll_width_cm": 10, "count": 10000, "text": "Lot 1"}
+
+Mode "nest" verdeelt een mix van vormen over zo min mogelijk vellen (zie
+packing.py); elk item heeft de velden van ShapeSheetParams en een ``quantity``::
+
+    {"mode": "nest", "output": "out/mix.pdf", "margin_cm": 0.3, "items": [
+        {"shape_type": "Cirkel", "shape_width_cm": 4, "shape_height_cm": 4, "quantity": 30},
+        {"shape_type": "Rechthoek", "shape_width_cm": 6, "shape_height_cm": 2.5, "quantity": 25}]}
+
+Met ``--stats-log`` komt per job een JSON regel met de tijd per stap van de
+render (layout, cellen, titel, tekst, tekenen, coderen, schrijven, ...) en
+tellers zoals getekende cellen en cache treffers (zie render_stats.py).
+"""
+from dataclasses import fields
+from typing import NamedTuple, Optional
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from fonts import registry
+from render_stats import RenderStats
+from renderer import (DPI, LabelSheetParams, NestItem, RollParams, ShapeSheetParams,
+                      SheetRenderer, render_caches)
+
+JOB_MODES = {"label": LabelSheetParams, "shape": ShapeSheetParams,
+             "merge": LabelSheetParams, "nest": ShapeSheetParams, "roll": LabelSheetParams}
+# Velden van een rol job naast die van het label
+ROLL_FIELDS = ("roll_width_cm", "count")
+# Velden van een nest job naast de items, met hun standaardwaarde
+NEST_OPTIONS = {"margin_cm": 0.2, "outer_margin_cm": 1.0, "dpi": DPI, "allow_rotation": True,
+                "page_size": "A4"}
+
+_renderer = None
+
+
+class JobError(ValueError):
+    """Een job regel kan niet worden omgezet naar render parameters"""
+
+
+class MergeJob(NamedTuple):
+    """Labelvellen (of een rol, RollParams) gevuld uit een databestand"""
+    params: object
+    data: str
+    template: Optional[str] = None
+    barcode_template: Optional[str] = None
+
+
+class NestJob(NamedTuple):
+    """Een mix van vormen (NestItem), verdeeld over zo min mogelijk vellen"""
+    items: tuple
+    margin_cm: float = 0.2
+    outer_margin_cm: float = 1.0
+    dpi: int = DPI
+    allow_rotation: bool = True
+    page_size: str = "A4"
+
+
+def _make_params(params_type, values, mode):
+    known = {field.name for field in fields(params_type)}
+    unknown = sorted(set(values) - known)
+    if unknown:
+        raise JobError(f"onbekende velden voor mode '{mode}': {', '.join(unknown)}")
+
+    # JSON lijsten (bijv. kleur [r, g, b]) moeten hashable blijven
+    values = {key: tuple(value) if isinstance(value, list) else value
+              for key, value in values.items()}
+    return params_type(**values)
+
+
+def _nest_job(job):
+    items = job.pop("items", None)
+    if not isinstance(items, list) or not items:
+        raise JobError("geen 'items' lijst opgegeven voor mode 'nest'")
+    options = {key: job.pop(key, default) for key, default in NEST_OPTIONS.items()}
+    if job:
+        raise JobError(f"onbekende velden voor mode 'nest': {', '.join(sorted(job))}")
+    nest_items = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise JobError("elk item moet een JSON object zijn")
+        item = dict(item)
+        quantity = item.pop("quantity", 1)
+        if not isinstance(quantity, int) or quantity < 0:
+            raise JobError(f"ongeldige quantity: {quantity!r}")
+        shape = _make_params(ShapeSheetParams, item, "nest")
+        nest_items.append(NestItem(shape, quantity))
+    return NestJob(tuple(nest_items), **options)
+
+
+def job_to_params(job):
+    """Zet een job dict om naar render parameters en het output pad"""
+    if not isinstance(job, dict):
+        raise JobError("job moet een JSON object zijn")
+    job = dict(job)
+    mode = job.pop("mode", "label")
+    if mode not in JOB_MODES:
+        raise JobError(f"onbekende mode '{mode}', kies uit {', '.join(JOB_MODES)}")
+    output = job.pop("output", None)
+    if not output:
+        raise JobError("geen 'output' pad opgegeven")
+    if mode in ("merge", "roll"):
+        data = job.pop("data", None)
+        if not data and mode == "merge":
+            raise JobError("geen 'data' bestand opgegeven voor mode 'merge'")
+        template = job.pop("template", None)
+        barcode_template = job.pop("barcode_template", None)
+    if mode == "roll":
+        roll = {key: job.pop(key) for key in ROLL_FIELDS if key in job}
+
+    if mode == "nest":
+        return _nest_job(job), output
+
+    params = _make_params(JOB_MODES[mode], job, mode)
+    if mode == "roll":
+        params = RollParams(params, **roll)
+    if mode == "merge" or (mode == "roll" and data):
+        params = MergeJob(params, data, template, barcode_template)
+    return params, output
+
+
+def read_jobs(path):
+    """Leest jobs regel voor regel; levert (regelnummer, job) op"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+
+
+def _init_worker(cache_directory=None, cache_max_bytes=None):
+    """Maakt de renderer van dit proces, met een cache als cache_directory gegeven is"""
+    global _renderer
+    cache = None
+    if cache_directory is not None:
+        from render_cache import RenderCache
+        cache = RenderCache(cache_directory, cache_max_bytes)
+    _renderer = SheetRenderer(cache=cache)
+
+
+def _cache_counts():
+    cache = _renderer.cache if _renderer is not None else None
+    return (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+
+def render_job(item):
+    """Worker functie: rendert een job
+
+    Geeft (regel, output, vellen, fout, cache treffers, cache missers,
+    RenderStats als dict) terug.
+    """
+    line_no, job = item
+    output = None
+    if _renderer is None:
+        _init_worker()
+    hits, misses = _cache_counts()
+    stats = RenderStats(render_caches())
+    try:
+        if isinstance(job, Exception):
+            raise JobError(f"ongeldige JSON: {job}")
+        params, output = job_to_params(job)
+        # Een printer verbinding (zpl://host:poort) is geen pad
+        directory = os.path.dirname(output) if "://" not in output else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Alle vellen van een job komen in dezelfde RenderStats
+        with stats.activate():
+            if isinstance(params, MergeJob):
+                from merge import write_merge
+                sheets = write_merge(params.params, params.data, output, params.template,
+                                     _renderer, params.barcode_template)
+            elif isinstance(params, NestJob):
+                from merge import write_pages
+                from renderer import nest_pages
+                pages = nest_pages(params.items, params.margin_cm, params.outer_margin_cm,
+                                   params.dpi, params.allow_rotation, params.page_size)
+                sheets = write_pages(pages, output, _renderer)
+            else:
+                _renderer.save(params, output)
+                sheets = 1
+        error = None
+    except Exception as e:
+        sheets, error = 0, f"{type(e).__name__}: {e}"
+    new_hits, new_misses = _cache_counts()
+    return (line_no, output, sheets, error, new_hits - hits, new_misses - misses,
+            stats.as_dict())
+
+
+def _collect(results, stats_log=None):
+    done = 0
+    errors = []
+    cache = {"hits": 0, "misses": 0}
+    for line_no, output, sheets, error, hits, misses, stats in results:
+        if stats_log is not None:
+            record = {"line": line_no, "output": output, "sheets": sheets, "error": error,
+                      **stats}
+            stats_log.write(json.dumps(record) + "\n")
+        if error:
+            errors.append((line_no, error))
+        else:
+            done += sheets
+        cache["hits"] += hits
+        cache["misses"] += misses
+    return done, sorted(errors), cache
+
+
+def run_batch(path, workers=None, cache_directory=None, cache_max_bytes=None,
+              stats_log=None):
+    """Rendert alle jobs parallel
+
+    Geeft (aantal vellen, lijst met fouten, cache treffers/missers) terug.
+    Zonder cache_directory wordt niets gecachet. Met stats_log (een tekst
+    bestandsobject) komt per job een JSON regel met de tijden per stap en
+    de tellers (zie render_stats.RenderStats.as_dict) in de log.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = read_jobs(path)
+    if workers == 1:
+        _init_worker(cache_directory, cache_max_bytes)
+        return _collect(map(render_job, jobs), stats_log)
+    with multiprocessing.Pool(workers, _init_worker,
+                              (cache_directory, cache_max_bytes)) as pool:
+        return _collect(pool.imap_unordered(render_job, jobs), stats_log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="tool.py render",
+        description="Render label- en vormvellen uit een JSONL jobbestand")
+    parser.add_argument("jobs", help="JSONL bestand met een job per regel")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Aantal processen (standaard: alle cores)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Map voor de render cache (standaard: $LABEL_DESIGNER_CACHE "
+                             "of ~/.cache/label-designer)")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="Maximale omvang van de cache in MB (standaard: 512)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Altijd opnieuw renderen, zonder cache")
+    parser.add_argument("--stats-log", default=None,
+                        help="JSONL bestand met per job de tijden per stap en tellers "
+                             "(- voor stdout)")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers moet minimaal 1 zijn")
+    if args.cache_size is not None and args.cache_size < 1:
+        parser.error("--cache-size moet minimaal 1 zijn")
+
+    # Lettertype eenmalig bepalen en een eventuele fallback melden
+    if registry.fallback_message:
+        print(registry.fallback_message, file=sys.stderr)
+
+    cache_directory = cache_max_bytes = None
+    if not args.no_cache:
+        from render_cache import DEFAULT_MAX_BYTES, default_directory
+        cache_directory = args.cache_dir or default_directory()
+        cache_max_bytes = (args.cache_size * 1024 * 1024 if args.cache_size
+                           else DEFAULT_MAX_BYTES)
+
+    stats_log = None
+    if args.stats_log == "-":
+        stats_log = sys.stdout
+    elif args.stats_log:
+        stats_log = open(args.stats_log, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        done, errors, cache = run_batch(args.jobs, args.workers, cache_directory,
+                                        cache_max_bytes, stats_log)
+    finally:
+        if stats_log not in (None, sys.stdout):
+            stats_log.close()
+    elapsed = time.perf_counter() - start
+
+    for line_no, error in errors:
+        print(f"{args.jobs}:{line_no}: {error}", file=sys.stderr)
+    print(f"{done} vellen gerenderd in {elapsed:.1f} s, {len(errors)} fouten")
+    if cache_directory is not None:
+        print(f"cache: {cache['hits']} treffers, {cache['misses']} missers ({cache_directory})")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Benchmarks voor de Label Designer
+
+Opstarttijd meten (elke meting is een nieuw Python proces)::
+
+    python benchmark.py startup --runs 5 --gui-target 1.0 --cli-target 0.5
+
+Het commando faalt (exit code 1) als de mediaan boven het doel ligt, of als
+de GUI bij het opstarten modules laadt die pas bij het renderen nodig zijn.
+
+Renders meten over een matrix van labels (maat, tekst, DPI) en vormen (type,
+lijndikte, DPI), met tijd, piekgeheugen en bestandsgrootte per geval::
+
+    python benchmark.py render --save-baseline
+    python benchmark.py render --tolerance 0.2 --filter label
+
+De gevallen "nest-mix-..." meten het inpakken van een mix van vormen over
+alle vellen plus het renderen van het eerste vel (zie packing.py).
+
+Elke meting is een nieuw proces, zodat caches en piekgeheugen niet van een
+vorig geval komen. Met een baseline faalt het commando als een geval meer
+dan de tolerantie trager, groter of zwaarder wordt.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules die de GUI pas bij het renderen mag laden
+GUI_LAZY_MODULES = ("PIL", "renderer")
+
+# Opstarten tot en met het eerste getekende venster (offscreen)
+GUI_STARTUP_SCRIPT = """
+import json, os, sys
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.argv = ["tool.py"]
+import tool
+if not tool.check_dependencies(tool.GUI_PACKAGES):
+    sys.exit(1)
+from PyQt5.QtWidgets import QApplication
+from gui import LabelDesigner
+app = QApplication(sys.argv)
+window = LabelDesigner()
+window.show()
+app.processEvents()
+print(json.dumps(sorted(name for name in {modules!r} if name in sys.modules)))
+""".format(modules=GUI_LAZY_MODULES)
+
+STARTUP_TARGETS = {"gui": 1.0, "cli": 0.5}
+
+# Een render zoals Genereer Labels / Genereer Vorm Labels in de GUI (zonder cache)
+RENDER_SCRIPT = """
+import json, os, resource, sys, time
+case = json.loads(sys.argv[1])
+from renderer import (LabelSheetParams, NestItem, ShapeSheetParams, SheetRenderer, label_plan,
+                      nest_pages, shape_plan)
+if case["kind"] == "nest":
+    items = [NestItem(ShapeSheetParams(**fields), quantity) for fields, quantity in case["items"]]
+    count = sum(quantity for _, quantity in case["items"])
+    start = time.perf_counter()
+    # Inpakken over alle vellen telt mee, gerenderd wordt alleen het eerste vel
+    params = nest_pages(items)[0]
+else:
+    if case["kind"] == "label":
+        params = LabelSheetParams(**case["fields"])
+        count = label_plan(params).count
+    else:
+        params = ShapeSheetParams(**case["fields"])
+        count = shape_plan(params).count
+    start = time.perf_counter()
+SheetRenderer().save(params, sys.argv[2])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "count": count, "bytes": os.path.getsize(sys.argv[2]),
+                  "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+# Labelmaten van klein tot een heel vel, in cm
+LABEL_SIZES = {"tiny": (1.0, 0.5), "small": (2.5, 1.5), "standard": (5.0, 3.0),
+               "large": (10.0, 7.0), "page": (19.0, 27.7)}
+LABEL_TEXTS = {"text": "Lot 2024-117", "blank": ""}
+SHAPE_THICKNESS = (1, 4, 10)
+SHAPE_TYPES = ("Rechthoek", "Cirkel", "Driehoek")
+RENDER_DPI = (300, 600)
+# Een mix van vormen voor nesten: (velden van ShapeSheetParams, aandeel)
+NEST_MIX = (({"shape_type": "Cirkel", "shape_width_cm": 4, "shape_height_cm": 4}, 3),
+            ({"shape_type": "Rechthoek", "shape_width_cm": 6, "shape_height_cm": 2.5}, 5),
+            ({"shape_type": "Driehoek", "shape_width_cm": 3, "shape_height_cm": 2}, 2))
+NEST_COUNTS = (1000, 10000)
+DEFAULT_BASELINE = os.path.join(HERE, "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.2
+# Onder deze verschillen is een afwijking ruis, geen regressie
+NOISE_FLOOR = {"seconds": 0.02, "peak_mb": 5.0, "bytes": 1024}
+METRICS = ("seconds", "peak_mb", "bytes")
+
+
+def time_command(command, runs):
+    """Voert een commando meerdere keren uit; geeft (tijden, laatste stdout) terug"""
+    timings = []
+    output = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=HERE, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} faalde:\n{result.stderr}")
+        output = result.stdout
+    return timings, output
+
+
+def run_startup(args):
+    scenarios = {
+        "gui": [sys.executable, "-c", GUI_STARTUP_SCRIPT],
+        "cli": [sys.executable, "tool.py", "render", "--help"],
+    }
+    targets = {"gui": args.gui_target, "cli": args.cli_target}
+
+    failed = False
+    for name, command in scenarios.items():
+        timings, output = time_command(command, args.runs)
+        median = statistics.median(timings)
+        status = "OK" if median <= targets[name] else "TE TRAAG"
+        print(f"{name:4s} mediaan {median:.3f} s  min {min(timings):.3f} s  "
+              f"doel {targets[name]:.3f} s  {status}")
+        failed |= median > targets[name]
+
+        if name == "gui":
+            loaded = json.loads(output.strip().splitlines()[-1])
+            if loaded:
+                print(f"     geladen bij opstarten (moet lui): {', '.join(loaded)}")
+                failed = True
+    return 1 if failed else 0
+
+
+def render_matrix():
+    """Alle gevallen als {naam: {"kind": ..., "fields": {...}}}"""
+    cases = {}
+    for (size, (width, height)), (text_name, text), dpi in itertools.product(
+            LABEL_SIZES.items(), LABEL_TEXTS.items(), RENDER_DPI):
+        cases[f"label-{size}-{text_name}-{dpi}"] = {
+            "kind": "label",
+            "fields": {"label_width_cm": width, "label_height_cm": height, "text": text,
+                       "dpi": dpi}}
+    for shape_type, thickness, dpi in itertools.product(SHAPE_TYPES, SHAPE_THICKNESS,
+                                                         RENDER_DPI):
+        cases[f"shape-{shape_type.lower()}-t{thickness}-{dpi}"] = {
+            "kind": "shape",
+            "fields": {"shape_type": shape_type, "line_thickness": thickness, "dpi": dpi}}
+    share = sum(part for _, part in NEST_MIX)
+    for total in NEST_COUNTS:
+        cases[f"nest-mix-{total}"] = {
+            "kind": "nest",
+            "items": [(fields, total * part // share) for fields, part in NEST_MIX]}
+    return cases
+
+
+def measure_render(case, runs, directory):
+    """Mediaan van runs metingen (elk een nieuw proces) voor een geval"""
+    output = os.path.join(directory, "render.png")
+    results = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", RENDER_SCRIPT, json.dumps(case), output],
+                                cwd=HERE, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"render faalde:\n{result.stderr}")
+        results.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    summary = {metric: statistics.median(r[metric] for r in results) for metric in METRICS}
+    summary["count"] = results[-1]["count"]
+    return summary
+
+
+def environment():
+    import PIL
+    return {"python": platform.python_version(), "pillow": PIL.__version__,
+            "machine": platform.machine(), "system": platform.system()}
+
+
+def regressions(result, baseline, tolerances):
+    """Metrics van result die meer dan de tolerantie boven de baseline liggen"""
+    found = []
+    for metric in METRICS:
+        old, new = baseline.get(metric), result[metric]
+        if old is None:
+            continue
+        if new > old * (1 + tolerances[metric]) and new - old > NOISE_FLOOR[metric]:
+            found.append(f"{metric} {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)"
+                         if old else f"{metric} {old} -> {new:.4g}")
+    return found
+
+
+def run_render(args):
+    cases = {name: case for name, case in render_matrix().items()
+             if not args.filter or any(part in name for part in args.filter)}
+    if not cases:
+        print("Geen gevallen na --filter")
+        return 1
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print(f"Let op: baseline gemaakt met {baseline.get('environment')}, "
+                  f"nu {environment()}")
+    tolerances = {"seconds": args.tolerance,
+                  "peak_mb": args.memory_tolerance or args.tolerance,
+                  "bytes": args.size_tolerance or args.tolerance}
+
+    results = {}
+    failed = []
+    print(f"{'geval':32s} {'aantal':>6s} {'tijd':>9s} {'piek':>9s} {'bestand':>10s}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, case in cases.items():
+            result = measure_render(case, args.runs, directory)
+            results[name] = result
+            status = ""
+            if baseline is not None:
+                old = baseline["cases"].get(name)
+                found = regressions(result, old, tolerances) if old else []
+                status = "REGRESSIE: " + ", ".join(found) if found else (
+                    "OK" if old else "nieuw")
+                if found:
+                    failed.append(name)
+            print(f"{name:32s} {result['count']:6d} {result['seconds']:8.3f}s "
+                  f"{result['peak_mb']:7.1f}MB {result['bytes'] / 1024:8.1f}KB  {status}")
+
+    if args.save_baseline:
+        data = {"environment": environment(), "runs": args.runs, "cases": results}
+        if os.path.exists(args.baseline):
+            # Een gefilterde run werkt alleen zijn eigen gevallen bij
+            with open(args.baseline, encoding="utf-8") as f:
+                data["cases"] = {**json.load(f).get("cases", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        print(f"Baseline opgeslagen in {args.baseline}")
+    elif baseline is None:
+        print(f"Geen baseline in {args.baseline}; maak er een met --save-baseline")
+    if failed:
+        print(f"{len(failed)} van {len(results)} gevallen achteruit "
+              f"(tolerantie {args.tolerance * 100:.0f}%)")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label Designer benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help="Meet de koude opstarttijd")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--gui-target", type=float, default=STARTUP_TARGETS["gui"],
+                         help="Maximale mediaan in seconden voor de GUI")
+    startup.add_argument("--cli-target", type=float, default=STARTUP_TARGETS["cli"],
+                         help="Maximale mediaan in seconden voor 'render --help'")
+    startup.set_defaults(func=run_startup)
+
+    render = commands.add_parser("render", help="Meet renders over een matrix van instellingen")
+    render.add_argument("--runs", type=int, default=3,
+                        help="Metingen per geval (elk een nieuw proces); de mediaan telt")
+    render.add_argument("--filter", nargs="*",
+                        help="Alleen gevallen waarvan de naam een van deze teksten bevat")
+    render.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON bestand met de baseline")
+    render.add_argument("--save-baseline", action="store_true",
+                        help="Sla de resultaten op als baseline in plaats van te vergelijken")
+    render.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Toegestane toename als fractie (0.2 = 20%%)")
+    render.add_argument("--memory-tolerance", type=float,
+                        help="Eigen tolerantie voor piekgeheugen (standaard --tolerance)")
+    render.add_argument("--size-tolerance", type=float,
+                        help="Eigen tolerantie voor bestandsgrootte (standaard --tolerance)")
+    render.set_defaults(func=run_render)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
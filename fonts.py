@@ -0,0 +1,95 @@
+"""Lettertype register: zoekt eenmaal per proces een bruikbaar lettertype
+
+Het eerste beschikbare lettertype uit FONT_CANDIDATES wordt eenmalig bepaald;
+daarna wordt elke (lettertype, grootte) combinatie in een begrensde LRU cache
+bewaard zodat renders de fonts niet opnieuw van schijf laden.
+"""
+from collections import OrderedDict
+import threading
+
+from PIL import ImageFont
+
+from render_stats import stage
+
+# Lettertypes in volgorde van voorkeur
+FONT_CANDIDATES = ("arial.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+DEFAULT_FONT = "PIL standaard font"
+
+
+class FontRegistry:
+    def __init__(self, candidates=FONT_CANDIDATES, max_entries=32):
+        self.candidates = tuple(candidates)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._family = None
+        self._resolved = False
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def family(self):
+        """Pad of naam van het gekozen lettertype (None = PIL standaard font)"""
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    with stage("fonts"):
+                        self._family = self._resolve()
+                    self._resolved = True
+        return self._family
+
+    def _resolve(self):
+        for candidate in self.candidates:
+            try:
+                ImageFont.truetype(candidate, 10)
+                return candidate
+            except OSError:
+                continue
+        return None
+
+    @property
+    def fallback_message(self):
+        """Melding voor de gebruiker als niet het eerste lettertype gebruikt wordt"""
+        family = self.family
+        if self.candidates and family == self.candidates[0]:
+            return None
+        return (f"Lettertype '{self.candidates[0]}' niet gevonden, "
+                f"gebruik {family or DEFAULT_FONT}")
+
+    def get(self, size):
+        family = self.family
+        key = (family, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+
+        with stage("fonts"):
+            if family is None:
+                font = ImageFont.load_default()
+            else:
+                font = ImageFont.truetype(family, size)
+
+        with self._lock:
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_entries:
+                self._fonts.popitem(last=False)
+        return font
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._resolved = False
+            self._family = None
+
+
+# Register voor het hele proces
+registry = FontRegistry()
+
+
+def get_font(size):
+    return registry.get(size)
@@ -0,0 +1,1358 @@
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                           QHBoxLayout, QLabel, QLineEdit, QPushButton, 
+                           QCheckBox, QColorDialog, QGroupBox, QComboBox,
+                           QScrollArea, QFrame, QRadioButton, QButtonGroup,
+                           QGridLayout, QShortcut, QStatusBar, QProgressBar)
+from PyQt5.QtCore import Qt, QPoint, QRect, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QRegion, QFont, QFontMetrics, QPainter, QPen, QColor, QKeySequence, QPainterPath, QIcon, QDoubleValidator, QIntValidator, QPolygon
+import sys
+
+from layout import DPI, DPI_CHOICES, PAGE_SIZES, page_layout_plan, roll_pixels, roll_row
+
+# Hoogstens een repaint per frame (ongeveer 60 Hz) bij snelle muisbewegingen
+REPAINT_INTERVAL_MS = 16
+# Preview van het vel: eerst snel na een korte pauze, scherp als de gebruiker stopt
+PREVIEW_WIDTH = 420
+PREVIEW_DRAFT_DELAY_MS = 150
+PREVIEW_REFINE_DELAY_MS = 700
+
+class ShapeEditor(QFrame):
+    # Een vorm is getekend of gewist
+    shape_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(800, 600)
+        self.image = QImage(self.size(), QImage.Format_RGB32)
+        self.image.fill(Qt.white)
+        self.drawing = False
+        self.shape_type = "Rechthoek"
+        self.shape_color = QColor("#723744")  # Update default kleur
+        self.start_point = QPoint()
+        self.current_rect = None
+        self.shapes = []  # List of (shape_type, rect, color)
+        self.dimensions_label = QLabel(self)
+        self.dimensions_label.setStyleSheet("""
+            QLabel { 
+                background-color: rgba(255, 255, 255, 0.8);
+                padding: 4px;
+                border: 1px solid #ccc;
+                border-radius: 3px;
+                font-weight: bold;
+            }
+        """)
+        self.pixels_per_cm = 37.8  # Ongeveer pixels per cm
+        self.setMouseTracking(True)  # Enable mouse tracking voor dimensies update
+        self.preview_mode = False  # Voor hover preview
+        self.hover_point = QPoint()
+        self.line_thickness = 2  # Default line thickness
+        # Achtergrond met raster, eenmaal getekend; opnieuw bij andere maat of DPI
+        self.grid_pixmap = None
+        # Gewijzigde gebieden, samen hooguit eenmaal per frame opnieuw getekend
+        self.dirty_region = QRegion()
+        self.repaint_timer = QTimer(self)
+        self.repaint_timer.setSingleShot(True)
+        self.repaint_timer.setInterval(REPAINT_INTERVAL_MS)
+        self.repaint_timer.timeout.connect(self.flush_repaint)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            old_region = self.overlay_region()
+            self.drawing = True
+            self.start_point = event.pos()
+            self.current_rect = QRect(self.start_point, self.start_point)
+            self.update_dimensions_label(self.current_rect)
+            self.schedule_repaint(old_region | self.overlay_region())
+
+    def mouseMoveEvent(self, event):
+        # Alleen het oude en nieuwe gebied van preview of vorm in wording opnieuw tekenen
+        old_region = self.overlay_region()
+        self.hover_point = event.pos()
+        if self.drawing:
+            # Het maten label volgt in flush_repaint, ook hooguit eenmaal per frame
+            self.current_rect = QRect(self.start_point, event.pos()).normalized()
+        elif not self.shapes:
+            # Toon preview alleen als we niet tekenen en er geen vorm is
+            self.preview_mode = True
+        else:
+            return
+        self.schedule_repaint(old_region | self.overlay_region())
+
+    def leaveEvent(self, event):
+        # Reset preview wanneer muis het gebied verlaat
+        old_region = self.overlay_region()
+        self.preview_mode = False
+        self.schedule_repaint(old_region)
+
+    def schedule_repaint(self, region):
+        """Verzamelt gewijzigde gebieden; de timer tekent ze samen in een keer"""
+        self.dirty_region |= region
+        if not self.repaint_timer.isActive():
+            self.repaint_timer.start()
+
+    def flush_repaint(self):
+        if self.drawing:
+            self.update_dimensions_label(self.current_rect)
+        if not self.dirty_region.isEmpty():
+            self.update(self.dirty_region)
+            self.dirty_region = QRegion()
+
+    def preview_rect(self):
+        preview_size = 100  # Grotere preview
+        return QRect(self.hover_point.x() - preview_size//2,
+                     self.hover_point.y() - preview_size//2,
+                     preview_size, preview_size)
+
+    def overlay_region(self):
+        """Gebied van de hover preview of de vorm in wording met hulplijnen en maten"""
+        region = QRegion()
+        # Ruimte voor de lijndikte, schaduw en de hulppunten van de driehoek
+        pad = self.line_thickness + 4
+        if self.drawing and self.current_rect:
+            rect = self.current_rect
+            region += rect.adjusted(-pad, -pad, pad, pad)
+            for y in (rect.top(), rect.bottom()):
+                region += QRect(0, y - 1, self.width(), 3)
+            for x in (rect.left(), rect.right()):
+                region += QRect(x - 1, 0, 3, self.height())
+            metrics = QFontMetrics(self.guide_font())
+            for x, y, text in self.guide_labels():
+                region += metrics.boundingRect(text).translated(x, y).adjusted(-2, -2, 2, 2)
+        elif self.preview_mode and not self.shapes:
+            region += self.preview_rect().adjusted(-pad, -pad, pad, pad)
+        return region
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.drawing:
+            self.schedule_repaint(self.overlay_region())
+            self.drawing = False
+            if self.current_rect and self.current_rect.width() > 0 and self.current_rect.height() > 0:
+                self.shapes = [(self.shape_type, self.current_rect, self.shape_color)]  # Alleen de laatste vorm bewaren
+                self.update()
+                self.shape_changed.emit()
+            self.current_rect = None
+            self.dimensions_label.hide()
+
+    def update_dimensions_label(self, rect):
+        if rect:
+            width_cm = rect.width() / self.pixels_per_cm
+            height_cm = rect.height() / self.pixels_per_cm
+            self.dimensions_label.setText(f"{width_cm:.1f} x {height_cm:.1f} cm")
+            # Plaats label boven de vorm
+            self.dimensions_label.adjustSize()
+            label_x = rect.x()
+            label_y = rect.y() - self.dimensions_label.height() - 5
+            if label_y < 0:
+                label_y = rect.bottom() + 5
+            self.dimensions_label.move(label_x, label_y)
+            self.dimensions_label.show()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Achtergrond en grid uit de cache
+        painter.drawPixmap(0, 0, self.grid_background())
+        
+        # Preview van vorm onder muis als we niet tekenen
+        if self.preview_mode and not self.shapes and not self.drawing:
+            preview_rect = self.preview_rect()
+            # Teken semi-transparante preview met stippellijn
+            painter.setOpacity(0.4)
+            pen = QPen(self.shape_color, self.line_thickness, Qt.DashLine)
+            pen.setDashPattern([5, 5])  # Maak een mooiere stippellijn
+            painter.setPen(pen)
+            self.draw_shape(painter, self.shape_type, preview_rect)
+            
+            # Teken hulppunten voor de driehoek
+            if self.shape_type == "Driehoek":
+                painter.setOpacity(0.6)
+                point_size = 6
+                points = [
+                    QPoint(int(preview_rect.left() + preview_rect.width()/2), preview_rect.top()),
+                    QPoint(preview_rect.left(), preview_rect.bottom()),
+                    QPoint(preview_rect.right(), preview_rect.bottom())
+                ]
+                for point in points:
+                    painter.fillRect(
+                        point.x() - point_size//2,
+                        point.y() - point_size//2,
+                        point_size, point_size,
+                        self.shape_color
+                    )
+            
+            painter.setOpacity(1.0)
+
+        # Teken opgeslagen vormen
+        for shape_type, rect, color in self.shapes:
+            # Teken schaduw
+            shadow_offset = 2
+            shadow_rect = QRect(rect)
+            shadow_rect.translate(shadow_offset, shadow_offset)
+            painter.setPen(QPen(QColor(100, 100, 100, 50), self.line_thickness))
+            self.draw_shape(painter, shape_type, shadow_rect)
+            
+            # Teken hoofdvorm
+            painter.setPen(QPen(color, self.line_thickness, Qt.SolidLine))
+            self.draw_shape(painter, shape_type, rect)
+
+        # Teken huidige vorm tijdens tekenen
+        if self.drawing and self.current_rect:
+            painter.setPen(QPen(self.shape_color, self.line_thickness))
+            self.draw_shape(painter, self.shape_type, self.current_rect)
+            
+            # Teken hulplijnen met verbeterde stijl
+            painter.setPen(QPen(QColor(100, 100, 255, 150), 1, Qt.DashLine))
+            self.draw_guide_lines(painter)
+
+    def draw_shape(self, painter, shape_type, rect):
+        if shape_type == "Rechthoek":
+            # Teken rechthoek met afgeronde hoeken
+            painter.drawRoundedRect(rect, 5, 5)
+        elif shape_type == "Cirkel":
+            # Teken perfecte cirkel
+            painter.drawEllipse(rect)
+        elif shape_type == "Driehoek":
+            # Verbeterde driehoek met vloeiende lijnen en correcte type conversie
+            points = [
+                QPoint(int(rect.left() + rect.width()/2), rect.top()),  # Top midden
+                QPoint(rect.left(), rect.bottom()),                     # Links onder
+                QPoint(rect.right(), rect.bottom())                     # Rechts onder
+            ]
+            # Teken driehoek met vloeiende lijnen
+            polygon = QPolygon(points)
+            painter.drawPolygon(polygon)
+
+    def grid_background(self):
+        """Witte achtergrond met raster als pixmap, alleen opnieuw getekend als nodig"""
+        ratio = self.devicePixelRatioF()
+        pixmap = self.grid_pixmap
+        if (pixmap is None or pixmap.devicePixelRatioF() != ratio
+                or pixmap.size() != self.size() * ratio):
+            pixmap = QPixmap(self.size() * ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.white)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.draw_enhanced_grid(painter)
+            painter.end()
+            self.grid_pixmap = pixmap
+        return pixmap
+
+    def resizeEvent(self, event):
+        self.grid_pixmap = None
+        super().resizeEvent(event)
+
+    def draw_enhanced_grid(self, painter):
+        cm_spacing = int(self.pixels_per_cm)
+        
+        # Fijner raster
+        painter.setPen(QPen(QColor(240, 240, 240), 1, Qt.SolidLine))
+        for x in range(0, self.width(), cm_spacing // 4):
+            painter.drawLine(x, 0, x, self.height())
+        for y in range(0, self.height(), cm_spacing // 4):
+            painter.drawLine(0, y, self.width(), y)
+            
+        # Middel raster
+        painter.setPen(QPen(QColor(220, 220, 220), 1, Qt.SolidLine))
+        for x in range(0, self.width(), cm_spacing // 2):
+            painter.drawLine(x, 0, x, self.height())
+        for y in range(0, self.height(), cm_spacing // 2):
+            painter.drawLine(0, y, self.width(), y)
+            
+        # Hoofdraster met verbeterde markeringen
+        painter.setPen(QPen(QColor(180, 180, 180), 1, Qt.SolidLine))
+        font = painter.font()
+        font.setPointSize(8)
+        painter.setFont(font)
+        
+        for x in range(0, self.width(), cm_spacing):
+            painter.drawLine(x, 0, x, self.height())
+            # Markeringen met achtergrond
+            text = f"{x/self.pixels_per_cm:.0f}"
+            text_rect = painter.boundingRect(x + 2, 2, 20, 20, Qt.AlignLeft, text)
+            painter.fillRect(text_rect, QColor(255, 255, 255, 200))
+            painter.drawText(text_rect, Qt.AlignCenter, text)
+            
+        for y in range(0, self.height(), cm_spacing):
+            painter.drawLine(0, y, self.width(), y)
+            if y > 0:
+                text = f"{y/self.pixels_per_cm:.0f}"
+                text_rect = painter.boundingRect(2, y + 2, 20, 20, Qt.AlignLeft, text)
+                painter.fillRect(text_rect, QColor(255, 255, 255, 200))
+                painter.drawText(text_rect, Qt.AlignCenter, text)
+
+    def draw_guide_lines(self, painter):
+        if not self.current_rect:
+            return
+            
+        # Horizontale hulplijnen
+        painter.drawLine(0, self.current_rect.top(), self.width(), self.current_rect.top())
+        painter.drawLine(0, self.current_rect.bottom(), self.width(), self.current_rect.bottom())
+        # Verticale hulplijnen
+        painter.drawLine(self.current_rect.left(), 0, self.current_rect.left(), self.height())
+        painter.drawLine(self.current_rect.right(), 0, self.current_rect.right(), self.height())
+        
+        # Teken afmetingen langs de hulplijnen
+        painter.setFont(self.guide_font())
+        for x, y, text in self.guide_labels():
+            painter.drawText(x, y, text)
+
+    def guide_font(self):
+        # Zelfde kleine letter als de raster markeringen
+        font = QFont(self.font())
+        font.setPointSize(8)
+        return font
+
+    def guide_labels(self):
+        """Breedte en hoogte labels bij de hulplijnen als (x, basislijn y, tekst)"""
+        rect = self.current_rect
+        width_cm = rect.width() / self.pixels_per_cm
+        height_cm = rect.height() / self.pixels_per_cm
+        return [(rect.center().x() - 20, rect.top() - 5, f"{width_cm:.1f} cm"),
+                (rect.right() + 5, rect.center().y(), f"{height_cm:.1f} cm")]
+
+    def clear(self):
+        self.shapes = []
+        self.update()
+        self.shape_changed.emit()
+
+    def set_shape_type(self, shape_type):
+        self.shape_type = shape_type
+
+    def set_shape_color(self, color):
+        if isinstance(color, QColor):
+            self.shape_color = color
+        else:
+            self.shape_color = QColor(color)  # Convert Qt.GlobalColor to QColor
+
+    def get_image(self):
+        return self.image
+
+    def set_dimensions(self, width, height):
+        self.setFixedSize(int(width), int(height))
+        self.grid_pixmap = None
+        self.image = QImage(self.size(), QImage.Format_RGB32)
+        self.image.fill(Qt.white)
+        self.update()
+
+    def get_current_shape(self):
+        if self.shapes:
+            return self.shapes[0]  # Return de laatste (en enige) vorm
+        return None
+
+    def set_line_thickness(self, thickness):
+        self.line_thickness = thickness
+
+class GenerateWorker(QThread):
+    """Rendert en bewaart een vel buiten de GUI thread"""
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(str, bool, str)  # pad, uit de cache, samenvatting van de tijden
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, params, path, parent=None, cache=None):
+        super().__init__(parent)
+        self.params = params
+        self.path = path
+        self.cache = cache
+
+    def run(self):
+        from renderer import LayoutError, RenderCancelled, SheetRenderer
+
+        renderer = SheetRenderer(progress=self.progress.emit,
+                                 is_cancelled=self.isInterruptionRequested, cache=self.cache)
+        try:
+            cached = renderer.save(self.params, self.path)
+        except RenderCancelled:
+            self.cancelled.emit()
+        except LayoutError as e:
+            self.failed.emit(str(e))
+        except Exception as e:
+            self.failed.emit(f"Fout bij exporteren: {str(e)}")
+        else:
+            self.done.emit(self.path, cached, renderer.stats.summary())
+
+class PreviewWorker(QThread):
+    """Rendert een verkleinde preview van het vel buiten de GUI thread
+
+    De parameters worden pas hier gebouwd, zodat de render engine (en PIL)
+    alleen in deze thread geladen wordt.
+    """
+    ready = pyqtSignal(QImage, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, mode, settings, width, draft, parent=None):
+        super().__init__(parent)
+        self.mode = mode
+        self.settings = settings
+        self.width = width
+        self.draft = draft
+
+    def run(self):
+        from renderer import (LabelSheetParams, RenderCancelled, RollParams, ShapeSheetParams,
+                              SheetRenderer)
+
+        renderer = SheetRenderer(is_cancelled=self.isInterruptionRequested)
+        try:
+            if self.mode == "roll":
+                settings = dict(self.settings)
+                label = LabelSheetParams(**settings.pop("label"))
+                params = RollParams(label, **settings)
+            elif self.mode == "label":
+                params = LabelSheetParams(**self.settings)
+            else:
+                params = ShapeSheetParams(**self.settings)
+            image = renderer.render_preview(params, self.width, self.draft)
+        except RenderCancelled:
+            return
+        except ValueError:
+            # Ongeldige of onvolledige invoer (ook LayoutError, PackingError en
+            # BarcodeError): de vorige preview blijft staan
+            return
+        except Exception as e:
+            # Een fout in de render engine zelf: melden in plaats van stil bevriezen
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(f"Fout bij de preview: {e}")
+            return
+        data = image.convert("RGB").tobytes()
+        qimage = QImage(data, image.width, image.height, 3 * image.width,
+                        QImage.Format_RGB888).copy()
+        self.ready.emit(qimage, self.draft)
+
+class LabelDesigner(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Label Designer")
+        self.setGeometry(100, 100, 1440, 800)
+        self.font_fallback_reported = False
+
+        # Achtergrond generatie: hooguit een lopende en een wachtende opdracht
+        self.worker = None
+        self.generate_pending = False
+        self.generate_note = None
+        # Eerder gerenderde vellen komen uit de cache op schijf (pas bij eerste gebruik)
+        self.render_cache = None
+
+        # Live preview: een lopende render en hooguit een wachtende (True = concept)
+        self.preview_worker = None
+        self.preview_pending = None
+        self.preview_draft_timer = QTimer(self)
+        self.preview_draft_timer.setSingleShot(True)
+        self.preview_draft_timer.setInterval(PREVIEW_DRAFT_DELAY_MS)
+        self.preview_draft_timer.timeout.connect(lambda: self.start_preview(True))
+        self.preview_refine_timer = QTimer(self)
+        self.preview_refine_timer.setSingleShot(True)
+        self.preview_refine_timer.setInterval(PREVIEW_REFINE_DELAY_MS)
+        self.preview_refine_timer.timeout.connect(lambda: self.start_preview(False))
+        
+        # Initialiseer layout inputs eerst
+        self.columns_input = QLineEdit("3")
+        self.rows_input = QLineEdit("4")
+        self.shape_margin = QLineEdit("0.2")
+        self.manual_layout_checkbox = QCheckBox("Handmatige layout instellingen")
+        self.manual_layout_checkbox.setToolTip("Vink aan om het aantal rijen en kolommen handmatig in te stellen")
+        
+        # Validators toevoegen
+        self.columns_input.setValidator(QIntValidator(1, 20))
+        self.rows_input.setValidator(QIntValidator(1, 20))
+        self.shape_margin.setValidator(QDoubleValidator(0.0, 5.0, 2))
+        
+        # Rest van de initialisatie
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        central_layout = QHBoxLayout(central_widget)
+        central_layout.setContentsMargins(0, 0, 20, 0)
+        main_widget = QWidget()
+        central_layout.addWidget(main_widget, 1)
+
+        # Preview van het vel, gerenderd met dezelfde engine
+        self.preview_label = QLabel("Preview verschijnt hier")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.setFixedSize(PREVIEW_WIDTH, round(PREVIEW_WIDTH * 29.7 / 21))
+        self.preview_label.setStyleSheet("QLabel { background: white; border: 1px solid #ccc; }")
+        central_layout.addWidget(self.preview_label, 0, Qt.AlignTop)
+
+        layout = QVBoxLayout(main_widget)
+        self.main_layout = layout
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        # Mode selectie
+        mode_group = QGroupBox("Mode Selectie")
+        mode_layout = QHBoxLayout()
+        mode_layout.setSpacing(20)
+        mode_layout.setContentsMargins(10, 15, 10, 15)
+        self.mode_group = QButtonGroup()
+        
+        self.label_mode = QRadioButton("Label Mode")
+        self.shape_mode = QRadioButton("Vorm Mode")
+        self.mode_group.addButton(self.label_mode)
+        self.mode_group.addButton(self.shape_mode)
+        mode_layout.addWidget(self.label_mode)
+        mode_layout.addWidget(self.shape_mode)
+        
+        mode_group.setLayout(mode_layout)
+        layout.addWidget(mode_group)
+
+        # Label instellingen widget
+        self.label_settings_widget = QWidget()
+        label_settings_layout = QVBoxLayout(self.label_settings_widget)
+        
+        # Label instellingen
+        settings_group = QGroupBox("Label Instellingen")
+        settings_layout = QVBoxLayout()
+        
+        # Label afmetingen
+        dimensions_group = QGroupBox("Afmetingen")
+        dimensions_layout = QGridLayout()
+        dimensions_layout.setSpacing(10)
+        dimensions_layout.setContentsMargins(10, 15, 10, 15)
+        
+        self.label_width = QLineEdit("5")
+        self.label_height = QLineEdit("3")
+        self.margin = QLineEdit("0.2")
+        self.outer_margin = QLineEdit("1.0")
+        
+        dimensions_layout.addWidget(QLabel("Label breedte (cm):"), 0, 0)
+        dimensions_layout.addWidget(self.label_width, 0, 1)
+        dimensions_layout.addWidget(QLabel("Label hoogte (cm):"), 1, 0)
+        dimensions_layout.addWidget(self.label_height, 1, 1)
+        dimensions_layout.addWidget(QLabel("Marge tussen labels (cm):"), 2, 0)
+        dimensions_layout.addWidget(self.margin, 2, 1)
+        dimensions_layout.addWidget(QLabel("Buitenmarge (cm):"), 3, 0)
+        dimensions_layout.addWidget(self.outer_margin, 3, 1)
+        
+        # Doorlopende rol in plaats van losse vellen (thermische en rolprinters)
+        self.roll_checkbox = QCheckBox("Rol (doorlopend)")
+        self.roll_width = QLineEdit("10")
+        self.roll_count = QLineEdit("100")
+        dimensions_layout.addWidget(self.roll_checkbox, 4, 0, 1, 2)
+        dimensions_layout.addWidget(QLabel("Rolbreedte (cm):"), 5, 0)
+        dimensions_layout.addWidget(self.roll_width, 5, 1)
+        dimensions_layout.addWidget(QLabel("Aantal labels:"), 6, 0)
+        dimensions_layout.addWidget(self.roll_count, 6, 1)
+
+        dimensions_group.setLayout(dimensions_layout)
+        settings_layout.addWidget(dimensions_group)
+
+        # Label tekst
+        text_group = QGroupBox("Label Tekst")
+        text_group_layout = QVBoxLayout()
+        text_layout = QHBoxLayout()
+        self.label_text = QLineEdit()
+        text_layout.addWidget(QLabel("Tekst:"))
+        text_layout.addWidget(self.label_text)
+        text_group_layout.addLayout(text_layout)
+        barcode_layout = QHBoxLayout()
+        self.barcode_input = QLineEdit()
+        self.barcode_type = QComboBox()
+        self.barcode_type.addItems(["code128", "ean13"])
+        barcode_layout.addWidget(QLabel("Barcode:"))
+        barcode_layout.addWidget(self.barcode_input)
+        barcode_layout.addWidget(self.barcode_type)
+        text_group_layout.addLayout(barcode_layout)
+        self.auto_fit_checkbox = QCheckBox("Tekst passend maken")
+        self.wrap_text_checkbox = QCheckBox("Tekst afbreken over regels")
+        text_group_layout.addWidget(self.auto_fit_checkbox)
+        text_group_layout.addWidget(self.wrap_text_checkbox)
+        text_group.setLayout(text_group_layout)
+        settings_layout.addWidget(text_group)
+        
+        settings_group.setLayout(settings_layout)
+        label_settings_layout.addWidget(settings_group)
+
+        # Vorm editor widget wordt pas opgebouwd bij het eerste gebruik van Vorm Mode
+        self.shape_editor_widget = None
+        self.shape_editor = None
+
+        # Add label widget to main layout
+        layout.addWidget(self.label_settings_widget)
+        
+        # Generate knop
+        self.generate_button = QPushButton("Genereer Labels")
+        layout.addWidget(self.generate_button)
+        self.pdf_checkbox = QCheckBox("Exporteer als PDF (vector)")
+        layout.addWidget(self.pdf_checkbox)
+        self.rotation_checkbox = QCheckBox("Draaien toestaan (meer per vel)")
+        layout.addWidget(self.rotation_checkbox)
+        image_mode_layout = QHBoxLayout()
+        self.image_mode = QComboBox()
+        self.image_mode.addItems(["auto", "RGB", "P", "L", "1"])
+        image_mode_layout.addWidget(QLabel("PNG beeldmodus:"))
+        image_mode_layout.addWidget(self.image_mode)
+        layout.addLayout(image_mode_layout)
+        sheet_layout = QHBoxLayout()
+        self.page_size = QComboBox()
+        self.page_size.addItems(list(PAGE_SIZES))
+        self.dpi = QComboBox()
+        self.dpi.addItems([str(dpi) for dpi in DPI_CHOICES])
+        self.dpi.setCurrentText(str(DPI))
+        sheet_layout.addWidget(QLabel("Vel:"))
+        sheet_layout.addWidget(self.page_size)
+        sheet_layout.addWidget(QLabel("DPI:"))
+        sheet_layout.addWidget(self.dpi)
+        layout.addLayout(sheet_layout)
+
+        # Connecties
+        self.label_mode.toggled.connect(self.update_mode)
+        self.shape_mode.toggled.connect(self.update_mode)
+        self.generate_button.clicked.connect(self.generate_labels)
+
+        # Connecties voor nieuwe validaties
+        self.shape_margin.textChanged.connect(self.update_margins)
+        self.columns_input.textChanged.connect(self.validate_and_update_inputs)
+        self.rows_input.textChanged.connect(self.validate_and_update_inputs)
+
+        # Wijzigingen tijdens het genereren zetten een nieuwe generatie in de wachtrij;
+        # velden van de andere mode doen dat niet
+        for field in (self.label_width, self.label_height, self.margin, self.label_text,
+                      self.barcode_input, self.roll_width, self.roll_count):
+            field.textChanged.connect(self.label_settings_changed)
+        for checkbox in (self.auto_fit_checkbox, self.roll_checkbox, self.wrap_text_checkbox):
+            checkbox.toggled.connect(self.label_settings_changed)
+        self.barcode_type.currentTextChanged.connect(self.label_settings_changed)
+        for field in (self.shape_margin, self.columns_input, self.rows_input):
+            field.textChanged.connect(self.shape_settings_changed)
+        self.manual_layout_checkbox.toggled.connect(self.shape_settings_changed)
+        # Buitenmarge, draaien, beeldmodus, vel en DPI gelden voor beide modes
+        self.outer_margin.textChanged.connect(self.settings_changed)
+        self.rotation_checkbox.toggled.connect(self.settings_changed)
+        self.image_mode.currentTextChanged.connect(self.settings_changed)
+        self.page_size.currentTextChanged.connect(self.settings_changed)
+        self.dpi.currentTextChanged.connect(self.settings_changed)
+        
+        # Maak de tekstvelden wat breder voor betere leesbaarheid
+        self.columns_input.setMinimumWidth(60)
+        self.rows_input.setMinimumWidth(60)
+        self.shape_margin.setMinimumWidth(60)
+        
+        # Voorkom negatieve waardes in de marges
+        self.shape_margin.setValidator(QDoubleValidator(0.0, 5.0, 2))
+        self.shape_margin.setText("0.2")  # Standaard waarde
+        
+        # Update initiële waardes
+        self.validate_and_update_inputs()
+
+        # Start in label mode
+        self.label_mode.setChecked(True)
+        self.update_mode()
+
+        # Styling voor de UI
+        self.setStyleSheet("""
+            QMainWindow {
+                background-color: #f5f5f5;
+            }
+            QGroupBox {
+                background-color: white;
+                border-radius: 8px;
+                margin-top: 12px;
+                padding: 15px;
+                border: 1px solid #e0e0e0;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+                color: #2196F3;
+                font-weight: bold;
+            }
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 15px;
+                border-radius: 4px;
+                min-height: 30px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+            QPushButton:pressed {
+                background-color: #0D47A1;
+            }
+            QPushButton:disabled {
+                background-color: #BDBDBD;
+            }
+            QLineEdit {
+                padding: 8px;
+                border: 2px solid #e0e0e0;
+                border-radius: 4px;
+                background-color: #ffffff;
+            }
+            QLineEdit:focus {
+                border-color: #2196F3;
+            }
+            QComboBox {
+                padding: 8px;
+                border: 2px solid #e0e0e0;
+                border-radius: 4px;
+                background-color: #ffffff;
+            }
+            QComboBox:hover {
+                border-color: #2196F3;
+            }
+            QLabel {
+                color: #424242;
+                font-size: 12px;
+            }
+            QRadioButton {
+                spacing: 8px;
+                color: #424242;
+            }
+            QRadioButton::indicator {
+                width: 18px;
+                height: 18px;
+            }
+            QRadioButton::indicator:checked {
+                background-color: #2196F3;
+                border: 2px solid #2196F3;
+                border-radius: 9px;
+            }
+            QScrollArea {
+                border: 1px solid #e0e0e0;
+                border-radius: 4px;
+            }
+            QStatusBar {
+                background-color: #f5f5f5;
+                color: #424242;
+            }
+        """)
+
+        # Styling voor de checkbox
+        self.manual_layout_checkbox.setStyleSheet("""
+            QCheckBox {
+                color: #424242;
+                spacing: 8px;
+                padding: 8px;
+            }
+            QCheckBox::indicator {
+                width: 18px;
+                height: 18px;
+                border: 2px solid #e0e0e0;
+                border-radius: 4px;
+                background-color: white;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #2196F3;
+                border-color: #2196F3;
+            }
+            QCheckBox::indicator:hover {
+                border-color: #2196F3;
+            }
+        """)
+
+        # Verbeterde tooltips voor layout instellingen
+        self.manual_layout_checkbox.setToolTip(
+            "Vink aan om het aantal rijen en kolommen handmatig in te stellen.\n"
+            "Indien uitgevinkt wordt de optimale indeling automatisch berekend."
+        )
+
+        # Extra functionaliteiten toevoegen
+        self.add_keyboard_shortcuts()
+        self.setup_status_bar()
+
+        # Voeg tooltips toe aan alle belangrijke elementen
+        self.label_width.setToolTip("De breedte van het label in centimeters")
+        self.label_height.setToolTip("De hoogte van het label in centimeters")
+        self.margin.setToolTip("De ruimte tussen labels in centimeters")
+        self.outer_margin.setToolTip("De marge rondom alle labels in centimeters")
+        self.label_text.setToolTip("De tekst die op elk label wordt afgedrukt")
+        self.auto_fit_checkbox.setToolTip("Kies de grootste lettergrootte die in het label past")
+        self.wrap_text_checkbox.setToolTip("Verdeel lange tekst over meerdere regels")
+        self.barcode_input.setToolTip("Optionele barcode boven de tekst (leeg = geen barcode)")
+        self.barcode_type.setToolTip("Code 128 voor tekst en cijfers, EAN-13 voor 12 of 13 cijfers")
+        self.generate_button.setToolTip("Genereer het vel met vormen of labels (Ctrl+G)")
+        self.roll_checkbox.setToolTip(
+            "Labels op een rol met vaste breedte in een lange PNG, rij voor rij weggeschreven")
+        self.page_size.setToolTip("Velformaat: A4, A3 of SRA3 (32 x 45 cm)")
+        self.dpi.setToolTip("Resolutie van de PNG; 600 of 1200 voor fijn stanswerk")
+        self.pdf_checkbox.setToolTip("Schrijf het vel als vector PDF in plaats van PNG")
+        self.image_mode.setToolTip(
+            "auto: kleinste exacte modus (grijs of 1-bit voor zwart-wit), "
+            "P: palet (grijs of de inktkleuren), "
+            "L: grijswaarden, 1: zwart-wit")
+        self.rotation_checkbox.setToolTip(
+            "Draai labels of vormen een kwartslag (deels) als er dan meer op het vel passen")
+
+        # Voeg placeholders toe aan tekstvelden
+        self.label_text.setPlaceholderText("Voer label tekst in...")
+
+        # Maak de knoppen meer beschrijvend
+        self.generate_button.setIcon(QIcon.fromTheme("document-save"))
+        
+        # Voeg wat extra validatie toe aan de invoervelden
+        self.label_width.setValidator(QDoubleValidator(0.1, 21.0, 1))
+        self.label_height.setValidator(QDoubleValidator(0.1, 29.7, 1))
+        self.margin.setValidator(QDoubleValidator(0.0, 5.0, 2))
+        self.outer_margin.setValidator(QDoubleValidator(0.0, 5.0, 2))
+
+        # Update status bar met meer informatie
+        def update_status(text):
+            self.statusBar.showMessage(f"Huidige modus: {text}")
+        
+        self.label_mode.toggled.connect(lambda: update_status("Label Mode"))
+        self.shape_mode.toggled.connect(lambda: update_status("Vorm Mode"))
+
+        # Voeg preview update toe wanneer layout settings veranderen
+        self.manual_layout_checkbox.toggled.connect(self.update_layout_preview)
+        self.rotation_checkbox.toggled.connect(self.update_layout_preview)
+        self.roll_checkbox.toggled.connect(self.update_layout_preview)
+        self.roll_width.textChanged.connect(self.update_layout_preview)
+        self.roll_count.textChanged.connect(self.update_layout_preview)
+        self.page_size.currentTextChanged.connect(self.update_layout_preview)
+        self.dpi.currentTextChanged.connect(self.update_layout_preview)
+        self.columns_input.textChanged.connect(self.update_layout_preview)
+        self.rows_input.textChanged.connect(self.update_layout_preview)
+        self.shape_margin.textChanged.connect(self.update_layout_preview)
+        for field in (self.label_width, self.label_height, self.margin, self.outer_margin):
+            field.textChanged.connect(self.update_layout_preview)
+
+        # Live preview van het vel; de eerste zodra het venster er staat
+        self.label_mode.toggled.connect(self.schedule_preview)
+        self.schedule_preview()
+
+    def build_shape_editor_widget(self):
+        """Bouwt de vorm editor op wanneer Vorm Mode voor het eerst geopend wordt"""
+        self.shape_editor_widget = QWidget()
+        shape_editor_layout = QVBoxLayout(self.shape_editor_widget)
+        
+        # Vorm instellingen
+        shape_settings = QGroupBox("Vorm Instellingen")
+        shape_settings_layout = QGridLayout()
+        shape_settings_layout.setSpacing(10)
+        shape_settings_layout.setContentsMargins(10, 15, 10, 15)
+        
+        # Layout instellingen toggle
+        shape_editor_layout.insertWidget(0, self.manual_layout_checkbox)
+        
+        # Margin instellingen apart van handmatige layout
+        margin_group = QGroupBox("Marge Instellingen")
+        margin_layout = QGridLayout()
+        margin_layout.addWidget(QLabel("Marge tussen vormen (cm):"), 0, 0)
+        margin_layout.addWidget(self.shape_margin, 0, 1)
+        margin_group.setLayout(margin_layout)
+        shape_editor_layout.insertWidget(1, margin_group)  # Voeg toe voor layout_group
+        
+        # Layout instellingen groep (alleen kolommen en rijen)
+        self.layout_group = QGroupBox("Layout Instellingen")
+        layout_settings = QGridLayout()
+        layout_settings.addWidget(QLabel("Aantal kolommen:"), 0, 0)
+        layout_settings.addWidget(self.columns_input, 0, 1)
+        layout_settings.addWidget(QLabel("Aantal rijen:"), 1, 0)
+        layout_settings.addWidget(self.rows_input, 1, 1)
+        
+        self.layout_group.setLayout(layout_settings)
+        shape_editor_layout.insertWidget(2, self.layout_group)  # Na margin_group
+        
+        # Vorm afmetingen (hergebruik van label afmetingen)
+        self.shape_width = QLineEdit("5")
+        self.shape_height = QLineEdit("3")
+        shape_settings_layout.addWidget(QLabel("Vorm breedte (cm):"), 0, 0)
+        shape_settings_layout.addWidget(self.shape_width, 0, 1)
+        shape_settings_layout.addWidget(QLabel("Vorm hoogte (cm):"), 1, 0)
+        shape_settings_layout.addWidget(self.shape_height, 1, 1)
+        
+        # Vorm type en kleur
+        self.shape_selector = QComboBox()
+        self.shape_selector.addItems(["Rechthoek", "Cirkel", "Driehoek"])
+        self.shape_color_button = QPushButton("Vorm kleur")
+        self.clear_button = QPushButton("Wis alles")
+        
+        shape_settings_layout.addWidget(QLabel("Vorm type:"), 2, 0)
+        shape_settings_layout.addWidget(self.shape_selector, 2, 1)
+        shape_settings_layout.addWidget(self.shape_color_button, 3, 0)
+        shape_settings_layout.addWidget(self.clear_button, 3, 1)
+
+        # Add a new QLineEdit for line thickness in the shape settings
+        self.line_thickness = QLineEdit("2")
+        shape_settings_layout.addWidget(QLabel("Lijn dikte (px):"), 4, 0)
+        shape_settings_layout.addWidget(self.line_thickness, 4, 1)
+
+        # Optionele hogere kwaliteit: vloeiende (anti-aliased) lijnen bij export
+        self.antialias_checkbox = QCheckBox("Vloeiende lijnen (anti-aliasing)")
+        shape_settings_layout.addWidget(self.antialias_checkbox, 5, 0, 1, 2)
+        
+        shape_settings.setLayout(shape_settings_layout)
+        shape_editor_layout.addWidget(shape_settings)
+        
+        # Shape editor canvas met scroll area
+        scroll_area = QScrollArea()
+        self.shape_editor = ShapeEditor()
+        self.shape_editor.setMinimumSize(800, 600)
+        scroll_area.setWidget(self.shape_editor)
+        scroll_area.setWidgetResizable(True)
+        shape_editor_layout.addWidget(scroll_area)
+
+        # Plaats de vorm editor direct onder de label instellingen
+        index = self.main_layout.indexOf(self.label_settings_widget) + 1
+        self.main_layout.insertWidget(index, self.shape_editor_widget)
+
+        # Connecties
+        self.shape_selector.currentTextChanged.connect(self.shape_editor.set_shape_type)
+        self.shape_color_button.clicked.connect(self.choose_shape_color)
+        self.clear_button.clicked.connect(self.shape_editor.clear)
+        self.shape_editor.shape_changed.connect(self.shape_settings_changed)
+
+        self.shape_width.textChanged.connect(self.update_shape_preview)
+        self.shape_height.textChanged.connect(self.update_shape_preview)
+
+        # Connect the line thickness QLineEdit to the set_line_thickness method
+        self.line_thickness.textChanged.connect(self.update_line_thickness)
+
+        for field in (self.shape_width, self.shape_height, self.line_thickness):
+            field.textChanged.connect(self.shape_settings_changed)
+        self.shape_selector.currentTextChanged.connect(self.shape_settings_changed)
+        self.antialias_checkbox.toggled.connect(self.shape_settings_changed)
+
+        # Tooltips, placeholders en validatie
+        self.shape_selector.setToolTip("Kies het type vorm dat u wilt tekenen")
+        self.shape_color_button.setToolTip("Klik om de kleur van de vorm aan te passen")
+        self.line_thickness.setToolTip("De dikte van de lijnen in pixels")
+        self.antialias_checkbox.setToolTip("Exporteer vormen met vloeiende randen (langzamer)")
+        self.clear_button.setToolTip("Wis de huidige vorm (Ctrl+D)")
+        self.line_thickness.setPlaceholderText("2")
+        self.clear_button.setIcon(QIcon.fromTheme("edit-clear"))
+        self.line_thickness.setValidator(QIntValidator(1, 10))
+
+    def add_keyboard_shortcuts(self):
+        # Sneltoetsen toevoegen
+        self.generate_shortcut = QShortcut(QKeySequence("Ctrl+G"), self)
+        self.generate_shortcut.activated.connect(self.generate_labels)
+        
+        self.clear_shortcut = QShortcut(QKeySequence("Ctrl+D"), self)
+        self.clear_shortcut.activated.connect(self.clear_shape)
+
+    def clear_shape(self):
+        if self.shape_editor is not None:
+            self.shape_editor.clear()
+
+    def setup_status_bar(self):
+        # Status balk toevoegen
+        self.statusBar = QStatusBar()
+        self.setStatusBar(self.statusBar)
+        self.statusBar.showMessage("Gereed")
+
+        # Voortgang en annuleren tijdens het genereren
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.cancel_button = QPushButton("Annuleren")
+        self.cancel_button.setToolTip("Breek het genereren af")
+        self.cancel_button.clicked.connect(self.cancel_generation)
+        self.cancel_button.hide()
+        self.statusBar.addPermanentWidget(self.progress_bar)
+        self.statusBar.addPermanentWidget(self.cancel_button)
+
+    def update_mode(self):
+        is_label_mode = self.label_mode.isChecked()
+        if not is_label_mode and self.shape_editor_widget is None:
+            self.build_shape_editor_widget()
+        self.label_settings_widget.setVisible(is_label_mode)
+        if self.shape_editor_widget is not None:
+            self.shape_editor_widget.setVisible(not is_label_mode)
+        self.generate_button.setText("Genereer Labels" if is_label_mode else "Genereer Vorm Labels")
+
+    def validate_and_update_inputs(self):
+        if not self.manual_layout_checkbox.isChecked() or self.shape_editor is None:
+            return  # Skip validatie in automatische modus of zonder vorm editor
+            
+        try:
+            current_shape = self.shape_editor.get_current_shape()
+            if not current_shape:
+                return
+
+            _, rect, _ = current_shape
+            # Maximum aantal kolommen en rijen: het rechte raster dat op het vel past
+            page = page_layout_plan(
+                int(self.dpi.currentText()), rect.width() / self.shape_editor.pixels_per_cm,
+                rect.height() / self.shape_editor.pixels_per_cm,
+                float(self.shape_margin.text() or 0.2), float(self.outer_margin.text() or 1.0),
+                self.page_size.currentText(), min_one=True).page
+            max_cols, max_rows = page.cols, page.rows
+
+            # Update de validators
+            self.columns_input.setValidator(QIntValidator(1, max_cols))
+            self.rows_input.setValidator(QIntValidator(1, max_rows))
+
+            # Update de tooltips met maximale waarden
+            self.columns_input.setToolTip(f"Aantal kolommen (max: {max_cols})")
+            self.rows_input.setToolTip(f"Aantal rijen (max: {max_rows})")
+
+            # Corrigeer huidige waarden indien nodig
+            try:
+                cols = min(int(self.columns_input.text()), max_cols)
+                rows = min(int(self.rows_input.text()), max_rows)
+                self.columns_input.setText(str(cols))
+                self.rows_input.setText(str(rows))
+            except ValueError:
+                self.columns_input.setText(str(min(3, max_cols)))
+                self.rows_input.setText(str(min(4, max_rows)))
+
+        except ValueError:
+            # Fallback naar veilige waarden
+            self.columns_input.setText("3")
+            self.rows_input.setText("4")
+
+    def update_shape_preview(self):
+        try:
+            width = float(self.shape_width.text()) * 37.8  # ongeveer pixels per cm
+            height = float(self.shape_height.text()) * 37.8
+            self.shape_editor.set_dimensions(width, height)
+            
+            # Update layout preview met de nieuwe vorm dimensies
+            if not self.manual_layout_checkbox.isChecked():
+                # Optimale layout: het raster van de eerste band in de UI
+                band = self.auto_shape_plan().page
+                self.columns_input.setText(str(band.cols))
+                self.rows_input.setText(str(band.rows))
+                self.update_layout_preview()
+                
+        except ValueError:
+            pass
+
+    def update_margins(self):
+        """Update de layout wanneer de marges veranderen"""
+        self.validate_and_update_inputs()
+
+    def choose_shape_color(self):
+        color = QColorDialog.getColor(initial=self.shape_editor.shape_color)
+        if color.isValid():
+            self.shape_editor.set_shape_color(color)
+            self.settings_changed()
+            # Update kleur knop met gekozen kleur
+            self.shape_color_button.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: {color.name()};
+                    color: {('#000' if color.lightness() > 128 else '#fff')};
+                }}
+                QPushButton:hover {{
+                    background-color: {color.darker(110).name()};
+                }}
+            """)
+
+    def update_line_thickness(self):
+        try:
+            thickness = int(self.line_thickness.text())
+            self.shape_editor.set_line_thickness(thickness)
+        except ValueError:
+            pass
+
+    def generate_labels(self):
+        if self.worker is not None:
+            # Er loopt al een generatie: daarna opnieuw met de laatste instellingen
+            self.generate_pending = True
+            self.statusBar.showMessage("Nieuwe generatie staat in de wachtrij...")
+            return
+        if self.label_mode.isChecked():
+            self.generate_label_sheet()
+        else:
+            self.export_shape()
+
+    def start_generation(self, params, path, note=None):
+        """Start het renderen van params naar path in een achtergrond thread"""
+        self.generate_note = note
+        if self.render_cache is None:
+            from render_cache import RenderCache
+            self.render_cache = RenderCache()
+        self.worker = GenerateWorker(params, path, self, self.render_cache)
+        self.worker.progress.connect(self.on_generate_progress)
+        self.worker.done.connect(self.on_generate_done)
+        self.worker.failed.connect(self.on_generate_failed)
+        self.worker.cancelled.connect(self.on_generate_cancelled)
+        self.worker.finished.connect(self.on_worker_finished)
+
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.show()
+        self.statusBar.showMessage("Bezig met genereren...")
+        self.worker.start()
+
+    def cancel_generation(self):
+        if self.worker is not None:
+            self.generate_pending = False
+            self.cancel_button.setEnabled(False)
+            self.worker.requestInterruption()
+            self.statusBar.showMessage("Genereren wordt afgebroken...")
+
+    def settings_changed(self):
+        """Instellingen gewijzigd: preview bijwerken en een lopende generatie herhalen"""
+        if self.worker is not None and not self.worker.isInterruptionRequested():
+            self.generate_pending = True
+        self.schedule_preview()
+
+    def label_settings_changed(self):
+        """Een label veld gewijzigd; in vorm mode heeft dat geen gevolgen"""
+        if self.label_mode.isChecked():
+            self.settings_changed()
+
+    def shape_settings_changed(self):
+        """Een vorm veld gewijzigd; in label mode heeft dat geen gevolgen"""
+        if self.shape_mode.isChecked():
+            self.settings_changed()
+
+    def schedule_preview(self):
+        """Start de preview timers opnieuw; een lopende preview is dan achterhaald"""
+        self.preview_draft_timer.start()
+        self.preview_refine_timer.start()
+        if self.preview_worker is not None:
+            self.preview_worker.requestInterruption()
+
+    def start_preview(self, draft):
+        if self.preview_worker is not None:
+            # Eerst de lopende render laten stoppen; scherp gaat voor concept
+            self.preview_worker.requestInterruption()
+            self.preview_pending = draft and self.preview_pending is not False
+            return
+        try:
+            if self.label_mode.isChecked() and self.roll_checkbox.isChecked():
+                mode, settings = "roll", self.roll_settings()
+            elif self.label_mode.isChecked():
+                mode, settings = "label", self.label_settings()
+            else:
+                mode, settings = "shape", self.shape_settings()
+        except ValueError:
+            return
+        if settings is None:
+            return
+        self.preview_worker = PreviewWorker(mode, settings, self.preview_label.width(), draft, self)
+        self.preview_worker.ready.connect(self.on_preview_ready)
+        self.preview_worker.failed.connect(self.on_preview_failed)
+        self.preview_worker.finished.connect(self.on_preview_finished)
+        self.preview_worker.start()
+
+    def on_preview_ready(self, image, draft):
+        transform = Qt.FastTransformation if draft else Qt.SmoothTransformation
+        pixmap = QPixmap.fromImage(image).scaled(self.preview_label.size(), Qt.KeepAspectRatio,
+                                                 transform)
+        self.preview_label.setPixmap(pixmap)
+        self.preview_label.setToolTip("Concept preview" if draft else "Preview")
+
+    def on_preview_failed(self, message):
+        self.statusBar.showMessage(message, 5000)
+
+    def on_preview_finished(self):
+        self.preview_worker.deleteLater()
+        self.preview_worker = None
+        if self.preview_pending is not None:
+            draft, self.preview_pending = self.preview_pending, None
+            self.start_preview(draft)
+
+    def closeEvent(self, event):
+        # Lopende threads afbreken; ze mogen niet met het venster verdwijnen
+        self.generate_pending = False
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
+        if self.preview_worker is not None:
+            self.preview_worker.requestInterruption()
+            self.preview_worker.wait()
+        super().closeEvent(event)
+
+    def on_generate_progress(self, done, total):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def on_generate_done(self, path, cached=False, summary=""):
+        if self.generate_note:
+            print(self.generate_note)
+        cache = self.render_cache
+        done_message = "Genereren voltooid!"
+        if cached:
+            done_message = (f"Genereren voltooid uit de cache! ({cache.hits} treffers, "
+                            f"{cache.misses} missers)")
+        if summary:
+            # Waar de tijd heen ging: totaal en de traagste stappen
+            done_message += f" {summary}"
+
+        # Meld eenmalig welk vervangend lettertype gebruikt wordt
+        from fonts import registry
+        if registry.fallback_message and not self.font_fallback_reported:
+            self.font_fallback_reported = True
+            self.statusBar.showMessage(f"{done_message} {registry.fallback_message}", 5000)
+            return
+        self.statusBar.showMessage(done_message, 5000)  # Toon 5 seconden
+
+    def on_generate_failed(self, message):
+        # Bijvoorbeeld een layout die niet op het vel past
+        self.statusBar.showMessage(message, 5000)
+        print(message)
+
+    def on_generate_cancelled(self):
+        self.statusBar.showMessage("Genereren geannuleerd", 3000)
+
+    def on_worker_finished(self):
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        self.worker.deleteLater()
+        self.worker = None
+        if self.generate_pending:
+            self.generate_pending = False
+            self.generate_labels()
+
+    def generate_label_sheet(self):
+        from renderer import LabelSheetParams, RollParams
+
+        if self.roll_checkbox.isChecked():
+            settings = self.roll_settings()
+            params = RollParams(LabelSheetParams(**settings.pop("label")), **settings)
+            # Een rol is altijd een PNG, ook als PDF aangevinkt is
+            self.start_generation(params, "roll_labels.png")
+            return
+        params = LabelSheetParams(**self.label_settings())
+        self.start_generation(params, self.output_path("a4_labels"))
+
+    def label_settings(self):
+        """Velden van LabelSheetParams uit de UI (ValueError bij ongeldige maten)"""
+        return dict(
+            label_width_cm=float(self.label_width.text()),
+            label_height_cm=float(self.label_height.text()),
+            margin_cm=float(self.margin.text()),
+            outer_margin_cm=float(self.outer_margin.text()),
+            text=self.label_text.text(),
+            auto_fit=self.auto_fit_checkbox.isChecked(),
+            wrap_text=self.wrap_text_checkbox.isChecked(),
+            barcode=self.barcode_input.text(),
+            barcode_type=self.barcode_type.currentText(),
+            allow_rotation=self.rotation_checkbox.isChecked(),
+            image_mode=self.image_mode.currentText(),
+            page_size=self.page_size.currentText(),
+            dpi=int(self.dpi.currentText()),
+        )
+
+    def roll_settings(self):
+        """Velden van RollParams; label zijn de velden van het label (zie label_settings)"""
+        return dict(label=self.label_settings(), roll_width_cm=float(self.roll_width.text()),
+                    count=int(self.roll_count.text()))
+
+    def shape_params(self):
+        """Bouwt de render parameters voor de huidige vorm, of None zonder vorm"""
+        from renderer import ShapeSheetParams
+
+        settings = self.shape_settings()
+        return None if settings is None else ShapeSheetParams(**settings)
+
+    def shape_settings(self):
+        """Velden van ShapeSheetParams voor de huidige vorm, of None zonder vorm
+
+        Alleen gewone Python waarden, zodat de preview thread de parameters
+        kan bouwen zonder dat de GUI de render engine hoeft te laden.
+        """
+        if self.shape_editor is None:
+            return None
+        current_shape = self.shape_editor.get_current_shape()
+        if not current_shape:
+            return None
+
+        shape_type, rect, color = current_shape
+
+        columns = rows = None
+        if self.manual_layout_checkbox.isChecked():
+            try:
+                columns = int(self.columns_input.text())
+                rows = int(self.rows_input.text())
+            except ValueError:
+                self.statusBar.showMessage("Ongeldige rij- of kolomwaarden, gebruik automatische berekening", 3000)
+                columns = rows = None
+
+        settings = dict(
+            shape_type=shape_type,
+            shape_width_cm=rect.width() / self.shape_editor.pixels_per_cm,
+            shape_height_cm=rect.height() / self.shape_editor.pixels_per_cm,
+            line_thickness=self.shape_editor.line_thickness,
+            margin_cm=float(self.shape_margin.text()) if self.shape_margin.text() else 0.2,
+            outer_margin_cm=float(self.outer_margin.text()) if self.outer_margin.text() else 1.0,
+            columns=columns,
+            rows=rows,
+            quality="high" if self.antialias_checkbox.isChecked() else "fast",
+            allow_rotation=self.rotation_checkbox.isChecked(),
+            image_mode=self.image_mode.currentText(),
+            page_size=self.page_size.currentText(),
+            dpi=int(self.dpi.currentText()),
+        )
+        # Zonder gekozen kleur geldt de standaard kleur (#723744) van de params
+        if isinstance(color, QColor):
+            settings["color"] = color.getRgb()[:3]
+        return settings
+
+    def export_shape(self):
+        from renderer import shape_plan
+
+        # Vorm afmetingen (van getekende vorm)
+        params = self.shape_params()
+        if params is None:
+            print("Teken eerst een vorm")
+            return
+
+        grid = shape_plan(params)
+        if not self.manual_layout_checkbox.isChecked():
+            # Update de UI met de berekende waarden (van de eerste band)
+            self.columns_input.setText(str(grid.page.cols))
+            self.rows_input.setText(str(grid.page.rows))
+
+        path = self.output_path("a4_shapes")
+        self.start_generation(params, path,
+                              f"Vormen geëxporteerd als {path} met {grid.count} vormen")
+
+    def output_path(self, name):
+        return f"{name}.pdf" if self.pdf_checkbox.isChecked() else f"{name}.png"
+
+    def auto_shape_plan(self):
+        """Automatische vorm indeling uit de invoervelden, als renderer.shape_plan (zonder PIL)"""
+        return page_layout_plan(
+            int(self.dpi.currentText()), float(self.shape_width.text()),
+            float(self.shape_height.text()), float(self.shape_margin.text() or 0.2),
+            float(self.outer_margin.text() or 1.0), self.page_size.currentText(),
+            allow_rotation=self.rotation_checkbox.isChecked(), min_one=True)
+
+    def update_layout_preview(self):
+        """Update de status balk met layout informatie"""
+        try:
+            if self.label_mode.isChecked() and self.roll_checkbox.isChecked():
+                dpi = int(self.dpi.currentText())
+                row = roll_row(*roll_pixels(dpi, float(self.roll_width.text()),
+                                            float(self.label_width.text()),
+                                            float(self.label_height.text()),
+                                            float(self.margin.text()),
+                                            float(self.outer_margin.text())))
+                count = int(self.roll_count.text())
+                rows = -(-count // row.cols) if row.cols > 0 else 0
+                length_cm = rows * row.page_height * 2.54 / dpi
+                self.statusBar.showMessage(
+                    f"Rol: {row.cols} labels per rij, {rows} rijen, {length_cm / 100:.2f} m"
+                    if row.cols > 0 else "De labels zijn te breed voor de rol")
+            elif self.label_mode.isChecked():
+                # Dezelfde (gecachete) indeling als renderer.label_plan
+                grid = page_layout_plan(
+                    int(self.dpi.currentText()), float(self.label_width.text()),
+                    float(self.label_height.text()), float(self.margin.text()),
+                    float(self.outer_margin.text()), self.page_size.currentText(),
+                    allow_rotation=self.rotation_checkbox.isChecked())
+                rotated = " (deels gedraaid)" if grid.rotated else ""
+                self.statusBar.showMessage(f"{grid.count} labels per vel{rotated}")
+            elif self.manual_layout_checkbox.isChecked():
+                cols = int(self.columns_input.text() or "0")
+                rows = int(self.rows_input.text() or "0")
+                total = cols * rows
+                self.statusBar.showMessage(
+                    f"Handmatige layout: {cols} kolommen × {rows} rijen = {total} vormen"
+                )
+            elif self.shape_editor_widget is not None:
+                grid = self.auto_shape_plan()
+                rotated = " (deels gedraaid)" if grid.rotated else ""
+                self.statusBar.showMessage(
+                    f"Automatische layout: {grid.count} vormen per vel{rotated}"
+                )
+        except (ValueError, ZeroDivisionError):
+            self.statusBar.showMessage(
+                "Ongeldige waarden voor de layout"
+            )
+
+def run(argv):
+    app = QApplication(argv)
+    window = LabelDesigner()
+    window.show()
+    return app.exec_()
@@ -0,0 +1,293 @@
+"""Indeling van cellen op een vel (zonder PIL of Qt)
+
+Een indeling bestaat uit een of meer banden: elke band is een regelmatig
+raster (Layout) van cellen in dezelfde richting. solve_layout probeert
+rechtop, gedraaid (90 graden) en gemengde banden en kiest de indeling met de
+meeste cellen. De uitkomst wordt per (pagina, cel, marges) gecachet, zodat de
+GUI hem bij elke toetsaanslag kan opvragen.
+
+LayoutPlan bundelt de banden van een vel met alle celoorsprongen; GUI,
+renderers en exports vragen hem op met layout_plan of page_layout_plan, zodat
+een indeling per set parameters maar een keer berekend wordt.
+"""
+from dataclasses import dataclass
+import functools
+from typing import NamedTuple
+
+DPI = 300
+# Gangbare resoluties; 600 en 1200 voor fijn stanswerk
+DPI_CHOICES = (300, 600, 1200)
+A4_WIDTH_CM = 21
+A4_HEIGHT_CM = 29.7
+# Velformaten als (breedte, hoogte) in cm, staand
+PAGE_SIZES = {
+    "A4": (A4_WIDTH_CM, A4_HEIGHT_CM),
+    "A3": (29.7, 42),
+    "SRA3": (32, 45),
+}
+
+
+def cm_to_px(cm, dpi=DPI):
+    """Zet centimeters om naar (afgeronde) pixels"""
+    return int(cm * dpi / 2.54)
+
+
+def sheet_pixels(dpi, page_size="A4"):
+    """Breedte en hoogte van een vel in pixels"""
+    if page_size not in PAGE_SIZES:
+        raise ValueError(f"Onbekend velformaat: {page_size}")
+    width_cm, height_cm = PAGE_SIZES[page_size]
+    return cm_to_px(width_cm, dpi), cm_to_px(height_cm, dpi)
+
+
+def page_pixels(dpi, cell_width_cm, cell_height_cm, margin_cm, outer_margin_cm,
+                page_size="A4"):
+    """Vel, cel en marges in pixels, in de volgorde van solve_layout"""
+    return sheet_pixels(dpi, page_size) + (
+        cm_to_px(cell_width_cm, dpi), cm_to_px(cell_height_cm, dpi),
+        cm_to_px(margin_cm, dpi), cm_to_px(outer_margin_cm, dpi))
+
+
+def roll_pixels(dpi, roll_width_cm, cell_width_cm, cell_height_cm, margin_cm, edge_margin_cm):
+    """Rol, cel en marges in pixels, in de volgorde van roll_row"""
+    return tuple(cm_to_px(cm, dpi) for cm in (roll_width_cm, cell_width_cm, cell_height_cm,
+                                              margin_cm, edge_margin_cm))
+
+
+class Layout(NamedTuple):
+    page_width: int
+    page_height: int
+    cell_width: int
+    cell_height: int
+    margin: int
+    cols: int
+    rows: int
+    h_start: int
+    v_start: int
+    # Cellen 90 graden tegen de klok in gedraaid (cell_width/height zijn al omgewisseld)
+    rotated: bool = False
+
+    @property
+    def total_width(self):
+        return self.cols * self.cell_width + (self.cols - 1) * self.margin
+
+    @property
+    def total_height(self):
+        return self.rows * self.cell_height + (self.rows - 1) * self.margin
+
+    @property
+    def count(self):
+        return self.cols * self.rows
+
+    def cell_origin(self, row, col):
+        return (self.h_start + col * (self.cell_width + self.margin),
+                self.v_start + row * (self.cell_height + self.margin))
+
+
+def fit_count(usable, cell, margin):
+    """Aantal cellen van grootte cell met margin ertussen in usable pixels"""
+    return max(0, (usable + margin) // (cell + margin))
+
+
+def span(count, cell, margin):
+    return count * cell + (count - 1) * margin if count > 0 else 0
+
+
+def grid_layout(page_width, page_height, cell_width, cell_height, margin, outer_margin,
+                cols=None, rows=None, min_one=False):
+    """Een regelmatig raster, gecentreerd op het vel (alle maten in pixels)"""
+    # Berekenen hoeveel cellen er op passen met buitenmarges
+    usable_width = page_width - (2 * outer_margin)
+    usable_height = page_height - (2 * outer_margin)
+    if cols is None:
+        cols = (usable_width + margin) // (cell_width + margin)
+        if min_one:
+            cols = max(1, cols)
+    if rows is None:
+        rows = (usable_height + margin) // (cell_height + margin)
+        if min_one:
+            rows = max(1, rows)
+
+    # Herbereken marges voor gelijke verdeling
+    total_width = cols * cell_width + (cols - 1) * margin
+    total_height = rows * cell_height + (rows - 1) * margin
+    h_start = (page_width - total_width) // 2
+    v_start = (page_height - total_height) // 2
+
+    return Layout(page_width, page_height, cell_width, cell_height, margin,
+                  cols, rows, h_start, v_start)
+
+
+def _stack(page_width, page_height, margin, bands, vertical):
+    """Plaatst banden (cel breedte, hoogte, kolommen, rijen, gedraaid) gecentreerd
+
+    vertical: banden onder elkaar, anders naast elkaar.
+    """
+    bands = [band for band in bands if band[2] > 0 and band[3] > 0]
+    sizes = [(span(cols, w, margin), span(rows, h, margin)) for w, h, cols, rows, _ in bands]
+    axis = 1 if vertical else 0
+    block = sum(size[axis] for size in sizes) + margin * (len(bands) - 1)
+    position = ((page_height if vertical else page_width) - block) // 2
+
+    layouts = []
+    for (width, height, cols, rows, rotated), size in zip(bands, sizes):
+        if vertical:
+            h_start, v_start = (page_width - size[0]) // 2, position
+        else:
+            h_start, v_start = position, (page_height - size[1]) // 2
+        layouts.append(Layout(page_width, page_height, width, height, margin,
+                              cols, rows, h_start, v_start, rotated))
+        position += size[axis] + margin
+    return tuple(layouts)
+
+
+@functools.lru_cache(maxsize=4096)
+def solve_layout(page_width, page_height, cell_width, cell_height, margin, outer_margin,
+                 allow_rotation=True):
+    """Indeling met de meeste cellen; geeft een tuple van banden (Layout) terug
+
+    Kandidaten: alles rechtop, alles gedraaid, en twee banden (rijen of
+    kolommen) met de ene richting gevolgd door de andere. Bij gelijk aantal
+    wint de eenvoudigste indeling, rechtop eerst.
+    """
+    usable_width = page_width - 2 * outer_margin
+    usable_height = page_height - 2 * outer_margin
+    orientations = [(cell_width, cell_height, False)]
+    if allow_rotation and cell_width != cell_height:
+        orientations.append((cell_height, cell_width, True))
+
+    def band(orientation, usable_w, usable_h, cols=None, rows=None):
+        width, height, rotated = orientation
+        if cols is None:
+            cols = fit_count(usable_w, width, margin)
+        if rows is None:
+            rows = fit_count(usable_h, height, margin)
+        return width, height, cols, rows, rotated
+
+    # Kandidaten als (banden, onder elkaar)
+    candidates = [((band(o, usable_width, usable_height),), True) for o in orientations]
+    if len(orientations) == 2:
+        for first, second in (orientations, orientations[::-1]):
+            # Eerst k rijen in de ene richting, de rest van de hoogte in de andere
+            for rows in range(1, fit_count(usable_height, first[1], margin)):
+                rest = usable_height - span(rows, first[1], margin) - margin
+                candidates.append(((band(first, usable_width, usable_height, rows=rows),
+                                    band(second, usable_width, rest)), True))
+            # Eerst k kolommen in de ene richting, de rest van de breedte in de andere
+            for cols in range(1, fit_count(usable_width, first[0], margin)):
+                rest = usable_width - span(cols, first[0], margin) - margin
+                candidates.append(((band(first, usable_width, usable_height, cols=cols),
+                                    band(second, rest, usable_height)), False))
+
+    # max geeft bij gelijke aantallen de eerste (eenvoudigste) kandidaat
+    bands, vertical = max(candidates, key=lambda candidate: sum(
+        cols * rows for _, _, cols, rows, _ in candidate[0]))
+    if not any(cols * rows for _, _, cols, rows, _ in bands):
+        # Niets past: het rechte raster, zoals grid_layout dat zou geven
+        return (grid_layout(page_width, page_height, cell_width, cell_height,
+                            margin, outer_margin),)
+    return _stack(page_width, page_height, margin, bands, vertical)
+
+
+def total_count(bands):
+    return sum(max(band.count, 0) for band in bands)
+
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    """De indeling van een vel: banden (Layout) en de oorsprong van elke cel
+
+    Onveranderlijk en hashbaar op de banden. De oorsprongen worden bij het
+    eerste gebruik eenmaal berekend, per band rij voor rij van links naar
+    rechts; layout_plan geeft per set parameters hetzelfde plan terug.
+    """
+    bands: tuple
+
+    @property
+    def page(self):
+        """De eerste band; alle banden hebben de maten van het vel"""
+        return self.bands[0]
+
+    @property
+    def count(self):
+        return total_count(self.bands)
+
+    @property
+    def rotated(self):
+        """True als (een deel van) de cellen gedraaid is"""
+        return any(band.rotated for band in self.bands)
+
+    @functools.cached_property
+    def _cells(self):
+        band_indices = []
+        origins = []
+        for index, band in enumerate(self.bands):
+            pitch_x = band.cell_width + band.margin
+            pitch_y = band.cell_height + band.margin
+            xs = [band.h_start + col * pitch_x for col in range(max(band.cols, 0))]
+            for row in range(max(band.rows, 0)):
+                y = band.v_start + row * pitch_y
+                origins.extend((x, y) for x in xs)
+            band_indices.extend([index] * (len(xs) * max(band.rows, 0)))
+        return tuple(band_indices), tuple(origins)
+
+    @property
+    def origins(self):
+        """(x, y) van elke cel, als tuple"""
+        return self._cells[1]
+
+    @property
+    def band_indices(self):
+        """Index in bands van elke cel, in dezelfde volgorde als origins"""
+        return self._cells[0]
+
+    def cells(self):
+        """Alle cellen als (band, x, y), in de volgorde van origins"""
+        bands = self.bands
+        for index, (x, y) in zip(*self._cells):
+            yield bands[index], x, y
+
+
+@functools.lru_cache(maxsize=4096)
+def layout_plan(page_width, page_height, cell_width, cell_height, margin, outer_margin,
+                allow_rotation=False, cols=None, rows=None, min_one=False):
+    """LayoutPlan voor een vel (alle maten in pixels), per set parameters gecachet
+
+    Met allow_rotation (en zonder vaste cols en rows) de indeling van
+    solve_layout; past daar niets en is min_one gezet, dan het rechte raster
+    met minstens een cel, zoals zonder draaien.
+    """
+    if allow_rotation and cols is None and rows is None:
+        bands = solve_layout(page_width, page_height, cell_width, cell_height, margin,
+                             outer_margin)
+        if total_count(bands) or not min_one:
+            return LayoutPlan(bands)
+    return LayoutPlan((grid_layout(page_width, page_height, cell_width, cell_height, margin,
+                                   outer_margin, cols=cols, rows=rows, min_one=min_one),))
+
+
+def page_layout_plan(dpi, cell_width_cm, cell_height_cm, margin_cm, outer_margin_cm,
+                     page_size="A4", **options):
+    """layout_plan met maten in cm; options zijn die van layout_plan"""
+    return layout_plan(*page_pixels(dpi, cell_width_cm, cell_height_cm, margin_cm,
+                                    outer_margin_cm, page_size), **options)
+
+
+def roll_row(roll_width, cell_width, cell_height, margin, edge_margin):
+    """Een rij cellen over de breedte van een rol, als band van een rij hoog
+
+    De band is cell_height + margin hoog (de steek op de rol); de marge valt
+    half boven en half onder de cellen. Alle maten in pixels.
+    """
+    cols = fit_count(roll_width - 2 * edge_margin, cell_width, margin)
+    h_start = (roll_width - span(cols, cell_width, margin)) // 2
+    return Layout(roll_width, cell_height + margin, cell_width, cell_height, margin,
+                  cols, 1, h_start, margin // 2)
+
+
+def roll_rows(row, count):
+    """Genereert de rijen (band van roll_row) voor count cellen; de laatste is zo nodig korter"""
+    if row.cols <= 0:
+        return
+    for start in range(0, count, row.cols):
+        yield row if count - start >= row.cols else row._replace(cols=count - start)
@@ -0,0 +1,153 @@
+"""Data merge: vult labels met tekst uit een CSV of JSONL bestand
+
+Het databestand wordt als stroom gelezen en rij voor rij (van links naar
+rechts, van boven naar onder) over de labels verdeeld. Elk vol vel wordt als
+LabelPage opgeleverd en direct weggeschreven, zodat het geheugengebruik
+beperkt blijft tot een vel, hoe lang het bestand ook is. Op een rol
+(RollParams) gaat elke rij labels direct naar de PNG.
+
+De tekst per label komt uit een template met kolomnamen, bijvoorbeeld
+``"{naam} - lot {lot}"``; zonder template wordt de eerste kolom gebruikt.
+Met barcode_template krijgt elk label ook een eigen barcode.
+"""
+from dataclasses import replace
+import csv
+import itertools
+import json
+import os
+
+from renderer import LabelPage, LayoutError, RollParams, SheetRenderer, label_plan
+
+
+class MergeError(ValueError):
+    """Het databestand of de template kan niet worden verwerkt"""
+
+
+def read_records(path):
+    """Leest records uit een CSV (met kopregel) of JSONL bestand, een voor een"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        yield from _read_jsonl(path)
+    else:
+        yield from _read_csv(path)
+
+
+def _read_csv(path):
+    # utf-8-sig: CSV uit Excel begint vaak met een BOM
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.DictReader(f, dialect=dialect)
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise MergeError(f"{path}:{line_no}: ongeldige JSON: {e}") from None
+
+
+def record_text(record, template=None):
+    """De labeltekst voor een record"""
+    if not isinstance(record, dict):
+        return "" if record is None else str(record)
+    if template is None:
+        return str(next(iter(record.values()), ""))
+    try:
+        return template.format_map(record)
+    except KeyError as e:
+        raise MergeError(f"kolom {e} uit de template ontbreekt in de data") from None
+
+
+def merge_pages(params, records, template=None, barcode_template=None):
+    """Verdeelt records over vellen; levert per vol (of laatste) vel een LabelPage op"""
+    per_page = label_plan(params).count
+    if per_page <= 0:
+        raise LayoutError("Er passen geen labels op het vel")
+    cells = ((record_text(record, template),
+              None if barcode_template is None else record_text(record, barcode_template))
+             for record in records)
+    while True:
+        page = tuple(itertools.islice(cells, per_page))
+        if not page:
+            return
+        texts, barcodes = zip(*page)
+        yield LabelPage(params, texts, None if barcode_template is None else barcodes)
+
+
+def page_path(output, number):
+    """Pad voor vel number (vanaf 1) uit een patroon als ``out/vel_{page:03d}.png``"""
+    return output.format(page=number)
+
+
+def write_merge(params, data_path, output, template=None, renderer=None,
+                barcode_template=None):
+    """Rendert een data merge naar een PDF of een PNG per vel (zie write_pages)
+
+    Met RollParams wordt het een rol in een PNG (zie write_roll).
+    """
+    if isinstance(params, RollParams):
+        return write_roll(params, data_path, output, template, renderer, barcode_template)
+    pages = merge_pages(params, read_records(data_path), template, barcode_template)
+    return write_pages(pages, output, renderer)
+
+
+def write_roll(params, data_path, output, template=None, renderer=None,
+               barcode_template=None):
+    """Schrijft een label per record op een rol (RollParams) in een PNG; geeft 1
+
+    Het bestand wordt twee keer als stroom gelezen: eerst voor het aantal
+    labels (de lengte van de rol), dan voor de inhoud.
+    """
+    from printer_lang import printer_language
+    language = printer_language(output)
+    if not language and not output.lower().endswith(".png"):
+        raise MergeError("een rol kan alleen als .png of printertaal worden geschreven")
+    count = sum(1 for _ in read_records(data_path))
+    if count == 0:
+        raise MergeError(f"{data_path} bevat geen records")
+    cells = ((record_text(record, template),
+              None if barcode_template is None else record_text(record, barcode_template))
+             for record in read_records(data_path))
+    if language:
+        from printer_lang import write_commands
+        write_commands(output, [replace(params, count=count)], language, cells)
+        return 1
+    renderer = renderer or SheetRenderer()
+    renderer.save_roll(replace(params, count=count), output, cells)
+    return 1
+
+
+def write_pages(pages, output, renderer=None):
+    """Schrijft vellen naar een PDF of een PNG per vel; geeft het aantal vellen
+
+    Een output op ``.pdf`` wordt een PDF met een pagina per vel, een
+    printer doel (``.zpl``, ``.epl``, ``zpl://`` of ``epl://``) een label
+    formaat per vel; anders moet het pad ``{page}`` bevatten voor het velnummer.
+    """
+    if output.lower().endswith(".pdf"):
+        from pdf_export import write_pdf
+        return write_pdf(output, pages)
+    from printer_lang import printer_language, write_commands
+    if printer_language(output):
+        return write_commands(output, pages)
+
+    if "{page" not in output:
+        raise MergeError("output moet '{page}' bevatten of op .pdf eindigen")
+    renderer = renderer or SheetRenderer()
+    count = 0
+    for count, page in enumerate(pages, 1):
+        path = page_path(output, count)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        renderer.save(page, path)
+    return count
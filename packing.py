@@ -0,0 +1,245 @@
+"""Rechthoeken van verschillende maten op zo min mogelijk vellen (zonder PIL of Qt)
+
+MaxRects: de vrije ruimte van een vel is een verzameling maximale vrije
+rechthoeken; elk stuk gaat in de vrije rechthoek waar het het krapst past
+(best short side fit). Een grid index per vel houdt bij welke vrije
+rechthoeken een gebied raken, zodat splitsen en opschonen na een plaatsing
+alleen die rechthoeken bekijkt in plaats van alle vrije ruimte.
+
+Per vel en per stukmaat wordt de beste vrije rechthoek onthouden en bij elke
+nieuwe of verdwenen vrije rechthoek bijgewerkt, zodat find niet steeds alle
+vrije ruimte afloopt. De vrije ruimte van een vel groeit nooit: een maat die
+niet meer past, past later ook niet, en pack_sheets begint per maat bij het
+eerste vel waar hij nog kan passen.
+"""
+from collections import defaultdict
+from typing import NamedTuple
+
+# Aantal vakken van de grid index langs de langste zijde van een vel
+INDEX_CELLS = 4
+
+
+class PackItem(NamedTuple):
+    """Een soort stuk: key identificeert het in de plaatsingen"""
+    key: object
+    width: int
+    height: int
+    quantity: int = 1
+
+
+class Placement(NamedTuple):
+    """Een geplaatst stuk; width en height zoals geplaatst (gedraaid al omgewisseld)"""
+    key: object
+    x: int
+    y: int
+    width: int
+    height: int
+    # 90 graden tegen de klok in gedraaid, zoals een gedraaide band in layout
+    rotated: bool = False
+
+
+class PackingError(ValueError):
+    """Een stuk past op geen enkel (leeg) vel; key is het stuk in kwestie"""
+
+    def __init__(self, message, key=None):
+        super().__init__(message)
+        self.key = key
+
+
+class GridIndex:
+    """Rechthoeken (x, y, breedte, hoogte) per vak van een grof raster
+
+    query geeft alleen de rechthoeken die een gebied echt overlappen; daarvoor
+    worden alleen de vakken onder dat gebied bekeken.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = max(1, cell_size)
+        self.buckets = defaultdict(set)
+
+    def _keys(self, x, y, width, height):
+        size = self.cell_size
+        rows = range(y // size, (y + height - 1) // size + 1)
+        return [(bx, by) for bx in range(x // size, (x + width - 1) // size + 1)
+                for by in rows]
+
+    def add(self, rect):
+        for key in self._keys(*rect):
+            self.buckets[key].add(rect)
+
+    def remove(self, rect):
+        for key in self._keys(*rect):
+            bucket = self.buckets[key]
+            bucket.discard(rect)
+            if not bucket:
+                del self.buckets[key]
+
+    def query(self, x, y, width, height):
+        found = set()
+        for key in self._keys(x, y, width, height):
+            found.update(self.buckets.get(key, ()))
+        return [rect for rect in found if _overlaps(rect, (x, y, width, height))]
+
+
+def _overlaps(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2]
+            and a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and inner[0] + inner[2] <= outer[0] + outer[2]
+            and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+def _best_fit(free_rects, width, height, allow_rotation):
+    """(score, vrije rechthoek) met de krapste plek voor width x height, of None"""
+    orientations = [(width, height, False)]
+    if allow_rotation and width != height:
+        orientations.append((height, width, True))
+    best = None
+    for rect in free_rects:
+        fx, fy, fw, fh = rect
+        for w, h, rotated in orientations:
+            if w <= fw and h <= fh:
+                # Krapste korte zijde, dan lange zijde; bij gelijkheid linksboven
+                score = (min(fw - w, fh - h), max(fw - w, fh - h), fy, fx, rotated)
+                if best is None or score < best[0]:
+                    best = (score, rect)
+    return best
+
+
+def _split(free, used):
+    """De maximale delen van free die buiten used vallen"""
+    fx, fy, fw, fh = free
+    x, y, w, h = used
+    parts = []
+    if x > fx:
+        parts.append((fx, fy, x - fx, fh))
+    if x + w < fx + fw:
+        parts.append((x + w, fy, fx + fw - x - w, fh))
+    if y > fy:
+        parts.append((fx, fy, fw, y - fy))
+    if y + h < fy + fh:
+        parts.append((fx, y + h, fw, fy + fh - y - h))
+    return parts
+
+
+class MaxRectsSheet:
+    """Een vel van width x height met de vrije ruimte als maximale rechthoeken"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = set()
+        self.index = GridIndex(max(width, height) // INDEX_CELLS)
+        self.placements = []
+        # Maten (breedte, hoogte) die al eens niet pasten: de vrije ruimte groeit nooit
+        self.failed = []
+        # (breedte, hoogte, draaien) -> beste (score, vrije rechthoek), of None
+        self._best = {}
+        self._add_free((0, 0, width, height))
+
+    def _add_free(self, rect):
+        self.free.add(rect)
+        self.index.add(rect)
+        for key, best in self._best.items():
+            if best is not None:
+                candidate = _best_fit((rect,), *key)
+                if candidate is not None and candidate[0] < best[0]:
+                    self._best[key] = candidate
+
+    def _remove_free(self, rect):
+        self.free.discard(rect)
+        self.index.remove(rect)
+        # Een maat waarvan de beste plek verdwijnt wordt bij de volgende find herberekend
+        stale = [key for key, best in self._best.items() if best is not None and best[1] == rect]
+        for key in stale:
+            del self._best[key]
+
+    def find(self, width, height, allow_rotation=True):
+        """Beste plek als (x, y, gedraaid), of None als het stuk niet meer past"""
+        key = (width, height, allow_rotation)
+        if key not in self._best:
+            for failed_width, failed_height in self.failed:
+                if width >= failed_width and height >= failed_height:
+                    return None
+            self._best[key] = _best_fit(self.free, *key)
+            if self._best[key] is None:
+                self.failed.append((width, height))
+        best = self._best[key]
+        if best is None:
+            return None
+        score = best[0]
+        return score[3], score[2], score[4]
+
+    def place(self, x, y, width, height):
+        """Markeert (x, y, width, height) als bezet en werkt de vrije ruimte bij"""
+        used = (x, y, width, height)
+        parts = []
+        for free in self.index.query(*used):
+            self._remove_free(free)
+            parts.extend(_split(free, used))
+
+        # Alleen nieuwe delen kunnen in een andere vrije rechthoek liggen
+        parts = sorted(set(parts), key=lambda rect: rect[2] * rect[3], reverse=True)
+        for i, part in enumerate(parts):
+            if any(_contains(other, part) for other in parts[:i]):
+                continue
+            if any(_contains(other, part) for other in self.index.query(*part)):
+                continue
+            self._add_free(part)
+
+
+def pack_sheets(items, page_width, page_height, margin=0, outer_margin=0,
+                allow_rotation=True):
+    """Plaatst alle stukken (PackItem, aantallen uitgeschreven) op zo min mogelijk vellen
+
+    Maten in pixels. Grootste stukken eerst; elk stuk gaat op het eerste vel
+    waar het nog past, daar in de krapste vrije rechthoek. Geeft per vel een
+    tuple Placement in paginacoordinaten (met buitenmarge) terug.
+    """
+    # Een stuk neemt de marge rechts en onder mee; het vel krijgt er een marge bij
+    bin_width = page_width - 2 * outer_margin + margin
+    bin_height = page_height - 2 * outer_margin + margin
+
+    pieces = []
+    for item in items:
+        if item.width <= 0 or item.height <= 0:
+            raise PackingError(f"Ongeldige maat voor {item.key!r}: {item.width} x {item.height}",
+                               item.key)
+        width, height = item.width + margin, item.height + margin
+        fits = width <= bin_width and height <= bin_height
+        if allow_rotation:
+            fits = fits or (height <= bin_width and width <= bin_height)
+        if not fits and item.quantity > 0:
+            raise PackingError(f"{item.key!r} ({item.width} x {item.height}) past niet op een vel",
+                               item.key)
+        pieces.extend([item] * item.quantity)
+    pieces.sort(key=lambda item: (max(item.width, item.height), item.width * item.height),
+                reverse=True)
+
+    sheets = []
+    # Per maat het eerste vel waar die nog kan passen; eerdere vellen zijn er te vol voor
+    first_open = {}
+    for item in pieces:
+        width, height = item.width + margin, item.height + margin
+        for index in range(first_open.get((width, height), 0), len(sheets)):
+            sheet = sheets[index]
+            spot = sheet.find(width, height, allow_rotation)
+            if spot is not None:
+                break
+        else:
+            index = len(sheets)
+            sheet = MaxRectsSheet(bin_width, bin_height)
+            sheets.append(sheet)
+            spot = sheet.find(width, height, allow_rotation)
+        first_open[(width, height)] = index
+
+        x, y, rotated = spot
+        if rotated:
+            width, height = height, width
+        sheet.place(x, y, width, height)
+        sheet.placements.append(Placement(item.key, x + outer_margin, y + outer_margin,
+                                          width - margin, height - margin, rotated))
+    return [tuple(sheet.placements) for sheet in sheets]
@@ -0,0 +1,515 @@
+"""Vector PDF export met pagina's die direct naar het bestand gestreamd worden
+
+PdfWriter schrijft elke pagina (content stream, formulieren en page object)
+meteen weg en onthoudt alleen de byte offsets; een document van honderden
+pagina's gebruikt daardoor evenveel geheugen als een van een pagina.
+
+PdfSheetRenderer tekent label- en vormvellen met dezelfde layout berekening
+als de raster renderer, maar als vector primitieven: een cel wordt eenmaal
+als Form XObject beschreven en op elke positie geplaatst.
+"""
+import math
+import os
+import zlib
+
+from barcode import QUIET_ZONES, BarcodeError, barcode_runs
+from renderer import (COUNT_FONT_SIZE, COUNT_PASSES, LABEL_PADDING_CM, TITLE_ANGLE,
+                      TITLE_FONT_SIZE, TITLE_PASSES, TITLE_TEXT, LabelPage, LabelSheetParams,
+                      LayoutError, NestedPage, ShapeSheetParams, SHAPE_TYPES, cm_to_px,
+                      label_plan, label_regions, label_text_style, nested_sheet,
+                      nested_watermark, placement_layouts, shape_plan, upright_layout)
+from layout import LayoutPlan
+import render_stats
+from render_stats import stage, timed
+
+# Helvetica (standaard PDF font) breedtes per teken in 1/1000 em, ASCII 32-126
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+HELVETICA_ASCENT = 0.718
+HELVETICA_DESCENT = 0.207
+# Afstand tussen basislijnen bij meerdere regels, in em
+LINE_HEIGHT = 1.2
+
+# Bézier constante voor een kwart ellips
+KAPPA = 0.5522847498
+
+SHADOW_ALPHA = 80 / 255
+
+
+def text_width(text, size):
+    """Breedte van text in Helvetica bij lettergrootte size"""
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += HELVETICA_WIDTHS[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000
+
+
+def measure(text, size):
+    """(breedte, hoogte) van (meerregelige) text in Helvetica, voor textfit"""
+    lines = text.split("\n")
+    width = max(text_width(line, size) for line in lines)
+    height = (HELVETICA_ASCENT + HELVETICA_DESCENT + (len(lines) - 1) * LINE_HEIGHT) * size
+    return width, height
+
+
+def _pdf_string(text):
+    data = text.encode("cp1252", errors="replace").decode("latin-1")
+    return "(" + data.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _num(value):
+    """Compacte getalnotatie voor content streams"""
+    if value == int(value):
+        return str(int(value))
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def _color(color):
+    r, g, b = color
+    return f"{_num(r / 255)} {_num(g / 255)} {_num(b / 255)}"
+
+
+class PdfCanvas:
+    """Verzamelt teken operaties in pixel coordinaten (oorsprong linksboven)"""
+
+    def __init__(self):
+        self.ops = []
+
+    def raw(self, op):
+        self.ops.append(op)
+
+    def stroke_color(self, color):
+        self.ops.append(f"{_color(color)} RG")
+
+    def fill_color(self, color):
+        self.ops.append(f"{_color(color)} rg")
+
+    def line_width(self, width):
+        self.ops.append(f"{_num(width)} w")
+
+    def line(self, x0, y0, x1, y1):
+        self.ops.append(f"{_num(x0)} {_num(y0)} m {_num(x1)} {_num(y1)} l S")
+
+    def rect(self, x, y, width, height):
+        self.ops.append(f"{_num(x)} {_num(y)} {_num(width)} {_num(height)} re S")
+
+    def ellipse(self, x0, y0, x1, y1):
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+        ox, oy = rx * KAPPA, ry * KAPPA
+        n = _num
+        self.ops.append(
+            f"{n(cx + rx)} {n(cy)} m "
+            f"{n(cx + rx)} {n(cy + oy)} {n(cx + ox)} {n(cy + ry)} {n(cx)} {n(cy + ry)} c "
+            f"{n(cx - ox)} {n(cy + ry)} {n(cx - rx)} {n(cy + oy)} {n(cx - rx)} {n(cy)} c "
+            f"{n(cx - rx)} {n(cy - oy)} {n(cx - ox)} {n(cy - ry)} {n(cx)} {n(cy - ry)} c "
+            f"{n(cx + ox)} {n(cy - ry)} {n(cx + rx)} {n(cy - oy)} {n(cx + rx)} {n(cy)} c S")
+
+    def polygon(self, points):
+        (x, y), rest = points[0], points[1:]
+        path = [f"{_num(x)} {_num(y)} m"] + [f"{_num(px)} {_num(py)} l" for px, py in rest]
+        self.ops.append(" ".join(path) + " s")
+
+    def text(self, x, y, text, size, angle=0):
+        """Tekst met de basislijn op (x, y), angle in graden tegen de klok in"""
+        # Het pixelstelsel is gespiegeld (y omlaag): spiegel de tekst terug
+        cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        self.ops.append(
+            f"BT /F1 {_num(size)} Tf {_num(cos)} {_num(-sin)} {_num(-sin)} {_num(-cos)} "
+            f"{_num(x)} {_num(y)} Tm {_pdf_string(text)} Tj ET")
+
+    def content(self):
+        return "\n".join(self.ops).encode("latin-1")
+
+
+class PdfWriter:
+    """Schrijft een PDF document pagina voor pagina naar een bestand"""
+
+    CATALOG, PAGES, FONT, SHADOW_STATE = 1, 2, 3, 4
+
+    def __init__(self, target):
+        self._own_file = isinstance(target, str)
+        self.file = open(target, "wb") if self._own_file else target
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 5
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+        self._object(self.FONT, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                "/Encoding /WinAnsiEncoding >>")
+        self._object(self.SHADOW_STATE, f"<< /Type /ExtGState /ca {_num(SHADOW_ALPHA)} >>")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _object(self, object_id, body, stream=None):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode("latin-1"))
+        if stream is None:
+            self.file.write(body.encode("latin-1"))
+        else:
+            self.file.write(f"{body[:-2]} /Length {len(stream)} >>\nstream\n".encode("latin-1"))
+            self.file.write(stream)
+            self.file.write(b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def _stream(self, dictionary, content):
+        object_id = self._new_id()
+        data = zlib.compress(content)
+        self._object(object_id, f"<< {dictionary} /Filter /FlateDecode >>", data)
+        return object_id
+
+    def _resources(self, forms):
+        xobjects = " ".join(f"/{name} {object_id} 0 R" for name, object_id in forms.items())
+        return (f"<< /Font << /F1 {self.FONT} 0 R >> "
+                f"/ExtGState << /Shadow {self.SHADOW_STATE} 0 R >> "
+                f"/XObject << {xobjects} >> >>")
+
+    def add_form(self, name, canvas, width, height):
+        """Schrijft een herbruikbaar Form XObject; geeft (naam, object id) terug"""
+        object_id = self._stream(
+            f"/Type /XObject /Subtype /Form /BBox [0 0 {_num(width)} {_num(height)}] "
+            f"/Resources {self._resources({})}", canvas.content())
+        return name, object_id
+
+    def add_page(self, width_pt, height_pt, canvas, scale, forms=()):
+        """Schrijft een pagina; canvas gebruikt pixels die met scale naar punten gaan"""
+        # Pixelstelsel met oorsprong linksboven
+        header = f"{_num(scale)} 0 0 {_num(-scale)} 0 {_num(height_pt)} cm\n".encode("latin-1")
+        content_id = self._stream("", header + canvas.content())
+        page_id = self._new_id()
+        self._object(page_id,
+                     f"<< /Type /Page /Parent {self.PAGES} 0 R "
+                     f"/MediaBox [0 0 {_num(width_pt)} {_num(height_pt)}] "
+                     f"/Resources {self._resources(dict(forms))} /Contents {content_id} 0 R >>")
+        self.pages.append(page_id)
+
+    def abort(self):
+        """Sluit zonder xref en trailer; een eigen, onvolledig bestand wordt verwijderd"""
+        if self.file is None:
+            return
+        if self._own_file:
+            self.file.close()
+            try:
+                os.remove(self.file.name)
+            except OSError:
+                pass
+        self.file = None
+
+    def close(self):
+        if self.file is None:
+            return
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.pages)
+        self._object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>")
+
+        xref_offset = self.file.tell()
+        size = self.next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            lines.append(f"{self.offsets.get(object_id, 0):010d} 00000 n \n")
+        lines.append(f"trailer\n<< /Size {size} /Root {self.CATALOG} 0 R >>\n"
+                     f"startxref\n{xref_offset}\n%%EOF\n")
+        self.file.write("".join(lines).encode("latin-1"))
+        if self._own_file:
+            self.file.close()
+        self.file = None
+
+
+class PdfSheetRenderer:
+    """Tekent label- en vormvellen als vector pagina's in een PdfWriter"""
+
+    def draw_page(self, writer, params):
+        if isinstance(params, LabelPage):
+            self.draw_labels(writer, params.params, params.texts, params.barcodes)
+        elif isinstance(params, LabelSheetParams):
+            self.draw_labels(writer, params)
+        elif isinstance(params, ShapeSheetParams):
+            self.draw_shapes(writer, params)
+        elif isinstance(params, NestedPage):
+            self.draw_nested(writer, params)
+        else:
+            raise TypeError(f"Onbekend parameter type: {type(params).__name__}")
+
+    def draw_labels(self, writer, params, texts=None, barcodes=None):
+        """Labelvel; texts en barcodes geven optioneel per cel een eigen inhoud"""
+        with stage("layout"):
+            grid = label_plan(params)
+        page = grid.page
+        layout = upright_layout(page)
+        canvas = PdfCanvas()
+        self._draw_title(canvas, page)
+
+        # Een label (rechtop) als formulier: rand en (zonder data merge) tekst en barcode
+        cell = PdfCanvas()
+        cell.stroke_color((0, 0, 0))
+        cell.fill_color((0, 0, 0))
+        cell.line_width(1)
+        cell.rect(0.5, 0.5, layout.cell_width, layout.cell_height)
+        if texts is None:
+            self._label_content(cell, layout, params, params.text, params.barcode, 0, 0,
+                                bool(params.text), bool(params.barcode))
+        forms = [writer.add_form("Cell", cell, layout.cell_width + 1, layout.cell_height + 1)]
+        self._place_cells(canvas, grid, "Cell")
+
+        if texts is not None:
+            count = grid.count
+            texts = texts[:count]
+            barcodes = (barcodes if barcodes is not None
+                        else (params.barcode,) * len(texts))[:count]
+            self._merge_cells(canvas, grid, layout, params, texts, barcodes)
+
+        self._draw_count(canvas, page, grid.count if texts is None else len(texts))
+        dimensions_text = (f"Label afmetingen: {params.label_width_cm:.1f} x "
+                           f"{params.label_height_cm:.1f} cm")
+        self._draw_watermark(canvas, page, dimensions_text, 20, (128, 128, 128), 40)
+        self._finish(writer, page, canvas, params.dpi, forms)
+
+    def draw_shapes(self, writer, params):
+        if params.shape_type not in SHAPE_TYPES:
+            raise ValueError(f"Onbekend vorm type: {params.shape_type}")
+        with stage("layout"):
+            grid = shape_plan(params)
+        bands, page = grid.bands, grid.page
+        for layout in bands:
+            if layout.total_width > layout.page_width:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te breed voor het "
+                                  f"{params.page_size} vel!")
+            if layout.total_height > layout.page_height:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te hoog voor het "
+                                  f"{params.page_size} vel!")
+
+        canvas = PdfCanvas()
+        # Grid lijnen voor referentie
+        canvas.stroke_color((240, 240, 240))
+        canvas.line_width(1)
+        for layout in bands:
+            h_start, v_start = layout.h_start + 0.5, layout.v_start + 0.5
+            for x in range(layout.h_start, layout.h_start + layout.total_width + 1,
+                           layout.cell_width + layout.margin):
+                canvas.line(x + 0.5, v_start, x + 0.5, v_start + layout.total_height)
+            for y in range(layout.v_start, layout.v_start + layout.total_height + 1,
+                           layout.cell_height + layout.margin):
+                canvas.line(h_start, y + 0.5, h_start + layout.total_width, y + 0.5)
+        form, pad = self._shape_form(writer, "Cell", params, upright_layout(page))
+        forms = [form]
+        self._place_cells(canvas, grid, "Cell", offset=-pad)
+
+        self._draw_title(canvas, page)
+        self._draw_count(canvas, page, grid.count)
+        dimensions_text = (f"Vorm afmetingen: {params.shape_width_cm:.1f} x "
+                           f"{params.shape_height_cm:.1f} cm")
+        self._draw_watermark(canvas, page, dimensions_text, 50, (150, 150, 150), 35)
+        self._finish(writer, page, canvas, params.dpi, forms)
+
+    def draw_nested(self, writer, page):
+        """Vel met een mix van vormen: een formulier per vorm, geplaatst volgens page"""
+        for shape in page.shapes:
+            if shape.shape_type not in SHAPE_TYPES:
+                raise ValueError(f"Onbekend vorm type: {shape.shape_type}")
+        with stage("layout"):
+            sheet = nested_sheet(page)
+            layouts = placement_layouts(page)
+        canvas = PdfCanvas()
+        forms = []
+        placed = {}
+        for placement, layout in zip(page.placements, layouts):
+            placed.setdefault(placement.key, []).append(layout)
+        for key, layouts in placed.items():
+            name = f"Shape{key}"
+            form, pad = self._shape_form(writer, name, page.shapes[key],
+                                         upright_layout(layouts[0]))
+            forms.append(form)
+            self._place_cells(canvas, LayoutPlan(tuple(layouts)), name, offset=-pad)
+
+        self._draw_title(canvas, sheet)
+        self._draw_count(canvas, sheet, len(page.placements))
+        self._draw_watermark(canvas, sheet, nested_watermark(page), 50, (150, 150, 150), 35)
+        self._finish(writer, sheet, canvas, page.dpi, forms)
+
+    @timed("cells")
+    def _shape_form(self, writer, name, params, layout):
+        """Een vorm (rechtop) als formulier; geeft (formulier, rand buiten de cel)
+
+        De lijn ligt gecentreerd op de rand, net als een QPen in de editor.
+        """
+        thickness = params.line_thickness
+        pad = thickness / 2 + 1
+        cell = PdfCanvas()
+        cell.stroke_color(_rgb(params.color))
+        cell.line_width(thickness)
+        cell.raw("2 j")  # Afgeschuinde hoeken
+        x0, y0 = pad + 0.5, pad + 0.5
+        x1, y1 = x0 + layout.cell_width, y0 + layout.cell_height
+        if params.shape_type == "Rechthoek":
+            cell.rect(x0, y0, layout.cell_width, layout.cell_height)
+        elif params.shape_type == "Cirkel":
+            cell.ellipse(x0, y0, x1, y1)
+        else:
+            cell.polygon([(int(layout.cell_width/2) + x0, y0), (x0, y1), (x1, y1)])
+        form = writer.add_form(name, cell, layout.cell_width + 2 * pad + 1,
+                               layout.cell_height + 2 * pad + 1)
+        return form, pad
+
+    def _label_content(self, canvas, layout, params, text, barcode, x, y,
+                       has_text, has_barcode):
+        text_box, barcode_box = label_regions(layout, has_text, has_barcode)
+        if text:
+            self._label_text(canvas, params, text_box, text, x, y)
+        if barcode:
+            self._label_barcode(canvas, params, barcode_box, barcode, x, y)
+
+    @timed("text")
+    def _label_text(self, canvas, params, box, text, x, y):
+        size, text = label_text_style(box, params, text, measure)
+        box_x, box_y, box_width, box_height = box
+        lines = text.split("\n")
+        # Van de bovenkant van de eerste tot de basislijn van de laatste regel
+        block_height = (HELVETICA_ASCENT + (len(lines) - 1) * LINE_HEIGHT) * size
+        baseline = y + box_y + (box_height - block_height) / 2 + HELVETICA_ASCENT * size
+        for line in lines:
+            text_x = x + box_x + (box_width - text_width(line, size)) / 2
+            canvas.text(text_x, baseline, line, size)
+            baseline += LINE_HEIGHT * size
+
+    def _label_barcode(self, canvas, params, box, data, x, y):
+        """Strepen als gevulde rechthoeken op hele pixels, zoals barcode_mask"""
+        padding = cm_to_px(LABEL_PADDING_CM, params.dpi)
+        box_x, box_y, box_width, box_height = box
+        runs = barcode_runs(params.barcode_type, data)
+        quiet_left, quiet_right = QUIET_ZONES[params.barcode_type]
+        module = (box_width - 2 * padding) // (sum(runs) + quiet_left + quiet_right)
+        height = box_height - 2 * padding
+        if module < 1 or height < 1:
+            raise BarcodeError(f"Barcode '{data}' past niet in het label")
+
+        left = x + box_x + (box_width - sum(runs) * module) // 2
+        top = y + box_y + padding
+        bars = []
+        for i, run in enumerate(runs):
+            if i % 2 == 0:
+                bars.append(f"{left} {top} {run * module} {height} re")
+            left += run * module
+        canvas.fill_color((0, 0, 0))
+        canvas.raw(" ".join(bars) + " f")
+
+    @timed("cells")
+    def _merge_cells(self, canvas, grid, layout, params, texts, barcodes):
+        """Per cel van grid (LayoutPlan) een eigen tekst en barcode, rij voor rij"""
+        has_text, has_barcode = any(texts), any(barcodes)
+        canvas.fill_color((0, 0, 0))
+        cells = grid.cells()
+        for index in range(max(len(texts), len(barcodes))):
+            text = texts[index] if index < len(texts) else ""
+            barcode = barcodes[index] if index < len(barcodes) else ""
+            band, x, y = next(cells)
+            canvas.raw(f"q {_cell_matrix(band, x, y)} cm")
+            self._label_content(canvas, layout, params, text, barcode, 0, 0,
+                                has_text, has_barcode)
+            canvas.raw("Q")
+
+    @timed("cells")
+    def _place_cells(self, canvas, grid, form, offset=0):
+        """Plaatst het formulier form op elke cel van grid (LayoutPlan)"""
+        render_stats.count("cells", grid.count)
+        for band, x, y in grid.cells():
+            canvas.raw(f"q {_cell_matrix(band, x + offset, y + offset, offset)} cm /{form} Do Q")
+
+    @timed("title")
+    def _draw_title(self, canvas, layout):
+        """'Machine Coating' schuin bovenin, op dezelfde plek als in de raster versie"""
+        size = TITLE_FONT_SIZE
+        width = text_width(TITLE_TEXT, size)
+        height = (HELVETICA_ASCENT + HELVETICA_DESCENT) * size
+        # De raster versie tekent in een laag met 150 px rand, gedraaid om het midden
+        layer_w, layer_h = width + 300, height + 300
+        angle = math.radians(TITLE_ANGLE)
+        cos, sin = math.cos(angle), math.sin(angle)
+        rotated_w = abs(layer_w * cos) + abs(layer_h * sin)
+        rotated_h = abs(layer_w * sin) + abs(layer_h * cos)
+        left = layout.page_width // 2 - rotated_w / 2
+
+        for dx, dy in TITLE_PASSES:
+            # Basislijn begin in de laag, daarna gedraaid en op de pagina geplaatst
+            px = 150 + dx - layer_w / 2
+            py = 150 + dy + HELVETICA_ASCENT * size - layer_h / 2
+            x = left + rotated_w / 2 + px * cos + py * sin
+            y = 30 + rotated_h / 2 - px * sin + py * cos
+            canvas.raw("q /Shadow gs" if (dx, dy) != (0, 0) else "q")
+            canvas.fill_color((0, 0, 0))
+            canvas.text(x, y, TITLE_TEXT, size, TITLE_ANGLE)
+            canvas.raw("Q")
+
+    @timed("text")
+    def _draw_count(self, canvas, layout, count=None):
+        size = COUNT_FONT_SIZE
+        count_text = f"{max(layout.count, 0) if count is None else count}"
+        x = layout.page_width - text_width(count_text, size) - 40
+        baseline = layout.page_height - 160 + HELVETICA_ASCENT * size
+        canvas.fill_color((0, 0, 0))
+        for dx, dy in COUNT_PASSES:
+            canvas.text(x + dx, baseline + dy, count_text, size)
+
+    @timed("text")
+    def _draw_watermark(self, canvas, layout, text, size, color, bottom):
+        # Gecentreerd, met de onderkant van de tekst op bottom pixels van de onderrand
+        x = layout.page_width / 2 - text_width(text, size) / 2
+        baseline = layout.page_height - bottom - HELVETICA_DESCENT * size
+        canvas.fill_color(color)
+        canvas.text(x, baseline, text, size)
+
+    def _finish(self, writer, layout, canvas, dpi, forms):
+        scale = 72 / dpi
+        writer.add_page(layout.page_width * scale, layout.page_height * scale,
+                        canvas, scale, forms)
+
+
+def _cell_matrix(band, x, y, offset=0):
+    """Matrix die een rechtop getekende cel op (x, y) zet, gedraaid in een gedraaide band
+
+    Net als bij de raster versie komt pixel (u, v) van de rechtop cel op
+    (v, breedte - u); breedte is de rechtop celbreedte, offset de rand van
+    het formulier buiten de cel.
+    """
+    if not band.rotated:
+        return f"1 0 0 1 {_num(x)} {_num(y)}"
+    # Met offset: x en y zijn al verschoven, de draaiing loopt om de cel zelf
+    width = band.cell_height
+    return f"0 -1 1 0 {_num(x)} {_num(y - 2 * offset + width + 1)}"
+
+
+def _rgb(color):
+    if isinstance(color, str):
+        from PIL import ImageColor
+        return ImageColor.getrgb(color)[:3]
+    return tuple(color[:3])
+
+
+def write_pdf(target, pages):
+    """Schrijft een vector PDF met een pagina per params uit pages
+
+    pages mag een generator zijn: elke pagina wordt direct weggeschreven.
+    Geeft het aantal geschreven pagina's terug.
+    """
+    renderer = PdfSheetRenderer()
+    with PdfWriter(target) as writer:
+        for params in pages:
+            renderer.draw_page(writer, params)
+        return len(writer.pages)
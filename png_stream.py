@@ -0,0 +1,150 @@
+"""PNG schrijven in stroken, zonder het hele vel in het geheugen
+
+PngWriter krijgt het vel strook voor strook (rijen van boven naar onder) en
+comprimeert elke strook direct in de ene zlib stroom van de IDAT chunks. Het
+geheugengebruik hangt zo af van de hoogte van een strook, niet van het vel.
+
+Per strook krijgen alle rijen hetzelfde filter: geen, of Up (verschil met de
+rij erboven, door PIL berekend). Up halveert grijze vellen met tekst, maar
+maakt gekleurde anti-aliasing groter; een proef op een stuk van de strook
+beslist. 1-bit en palet rijen blijven ongefilterd.
+"""
+import struct
+import zlib
+
+from PIL import Image, ImageChops
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Modus: (bitdiepte, PNG kleurtype)
+COLOR_TYPES = {"1": (1, 0), "L": (8, 0), "P": (8, 3), "RGB": (8, 2)}
+# IDAT chunks wegschrijven zodra er zoveel gecomprimeerde data klaarstaat
+CHUNK_BYTES = 256 * 1024
+# Rijen uit het midden van een strook waarmee het filter gekozen wordt
+SAMPLE_ROWS = 64
+FILTER_NONE = 0
+FILTER_UP = 2
+
+
+def row_bytes(mode, width):
+    """Aantal bytes van een rij pixels, zoals PIL tobytes ze inpakt"""
+    depth, color_type = COLOR_TYPES[mode]
+    channels = 3 if color_type == 2 else 1
+    return (width * channels * depth + 7) // 8
+
+
+def up_filtered(strip, previous=None):
+    """Het PNG Up filter: elke byte min de byte erboven (modulo 256)
+
+    previous is de rij boven de strook (None bovenaan het vel: nullen).
+    """
+    above = Image.new(strip.mode, strip.size, 0)
+    if previous is not None:
+        above.paste(previous, (0, 0))
+    above.paste(strip.crop((0, 0, strip.width, strip.height - 1)), (0, 1))
+    return ImageChops.subtract_modulo(strip, above)
+
+
+def _filtered_rows(image, stride, method):
+    data = memoryview(image.tobytes())
+    prefix = bytes([method])
+    return b"".join(prefix + data[offset:offset + stride]
+                    for offset in range(0, len(data), stride))
+
+
+def _sample_size(image):
+    """Gecomprimeerde grootte van SAMPLE_ROWS rijen uit het midden, snel gemeten"""
+    top = max(0, (image.height - SAMPLE_ROWS) // 2)
+    sample = image.crop((0, top, image.width, min(image.height, top + SAMPLE_ROWS)))
+    return len(zlib.compress(sample.tobytes(), 1))
+
+
+class PngWriter:
+    """Schrijft een PNG van width x height in mode uit opeenvolgende stroken
+
+    target is een pad of een binair bestandsobject. palette is een platte
+    lijst RGB waarden (alleen voor "P"), dpi een (x, y) tuple voor de pHYs chunk.
+    """
+
+    def __init__(self, target, width, height, mode, palette=None, dpi=None,
+                 compress_level=6):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"Beeldmodus {mode} kan niet gestreamd worden")
+        if mode == "P" and not palette:
+            raise ValueError("Een palet PNG heeft een palet nodig")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.stride = row_bytes(mode, width)
+        self.rows = 0
+        # Laatste rij van de vorige strook, voor het Up filter
+        self._previous = None
+        self._own = not hasattr(target, "write")
+        self._file = open(target, "wb") if self._own else target
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+
+        depth, color_type = COLOR_TYPES[mode]
+        self._file.write(SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, depth, color_type, 0, 0, 0))
+        if dpi is not None:
+            # pHYs telt pixels per meter
+            self._chunk(b"pHYs", struct.pack(">IIB", round(dpi[0] / 0.0254),
+                                             round(dpi[1] / 0.0254), 1))
+        if mode == "P":
+            self._chunk(b"PLTE", bytes(palette[:768]))
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)) + kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def _compressed(self, data):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= CHUNK_BYTES:
+            self._flush_idat()
+
+    def _flush_idat(self):
+        if self._pending:
+            self._chunk(b"IDAT", b"".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+            # Een printer of pipe kan meteen verder met wat er al is
+            self._file.flush()
+
+    def write(self, strip):
+        """Voegt een strook (PIL afbeelding in mode, even breed als het vel) toe"""
+        if strip.mode != self.mode or strip.width != self.width:
+            raise ValueError(f"Strook {strip.mode} {strip.width} px past niet bij "
+                             f"{self.mode} {self.width} px")
+        if self.rows + strip.height > self.height:
+            raise ValueError("Meer rijen dan de hoogte van het vel")
+        method, data = FILTER_NONE, strip
+        if self.mode in ("L", "RGB"):
+            up = up_filtered(strip, self._previous)
+            if _sample_size(up) < _sample_size(strip):
+                method, data = FILTER_UP, up
+            self._previous = strip.crop((0, strip.height - 1, strip.width, strip.height))
+        self._compressed(self._compressor.compress(_filtered_rows(data, self.stride, method)))
+        self.rows += strip.height
+
+    def close(self):
+        try:
+            if self.rows != self.height:
+                raise ValueError(f"{self.rows} van de {self.height} rijen geschreven")
+            self._compressed(self._compressor.flush())
+            self._flush_idat()
+            self._chunk(b"IEND", b"")
+        finally:
+            if self._own:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._own:
+            self._file.close()
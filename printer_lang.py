@@ -0,0 +1,403 @@
+"""Printertaal uitvoer (ZPL of EPL) voor labelprinters, zonder raster
+
+In plaats van een bitmap krijgt de printer de indeling als commando's:
+randen, tekst en barcodes in printerfonts en -symbologieën, en vormen als
+lijnen en ellipsen. De printer rastert zelf; een job is een paar kilobyte.
+
+Een pixel van de layout is een dot van de printer, dus params.dpi moet de
+resolutie van de printer zijn (bijvoorbeeld 203 of 300). Een vel wordt een
+label formaat; een rol een formaat per rij, of een rij met een aantal
+kopieën als alle labels gelijk zijn. Titel, aantal en watermerk van de
+raster versie horen niet op productielabels en worden weggelaten; kleur
+bestaat niet op een thermische printer.
+
+Een doel is een bestand (.zpl of .epl), of ``zpl://host:poort`` en
+``epl://host:poort`` om direct naar een printer (of een test socket) te
+sturen; de standaard poort is 9100.
+"""
+from contextlib import contextmanager
+import itertools
+import math
+import socket
+
+from barcode import QUIET_ZONES, BarcodeError, barcode_runs
+from layout import LayoutPlan, roll_rows
+from pdf_export import measure
+import render_stats
+from render_stats import stage, timed
+from renderer import (LABEL_PADDING_CM, SHAPE_TYPES, LabelPage, LabelSheetParams, LayoutError,
+                      NestedPage, RollParams, ShapeSheetParams, cm_to_px, label_plan,
+                      label_regions, label_text_style, placement_layouts, roll_layout,
+                      shape_plan, upright_layout)
+
+LANGUAGES = ("zpl", "epl")
+DEFAULT_PORT = 9100
+SOCKET_TIMEOUT = 10
+# Een ellips in EPL (dat geen ellipsen kent) als veelhoek met zoveel zijden
+ELLIPSE_SEGMENTS = 24
+# EPL fonts 1-5 als (breedte, hoogte) in dots, per printer resolutie
+EPL_FONTS = {
+    203: ((8, 12), (10, 16), (12, 20), (14, 24), (32, 48)),
+    300: ((12, 20), (16, 28), (20, 36), (24, 44), (48, 80)),
+}
+
+
+def printer_language(target):
+    """"zpl" of "epl" voor een printer doel, anders None"""
+    target = str(target).lower()
+    for language in LANGUAGES:
+        if target.endswith("." + language) or target.startswith(language + "://"):
+            return language
+    return None
+
+
+def is_socket_target(target):
+    return "://" in str(target)
+
+
+@contextmanager
+def open_target(target):
+    """Binair bestand voor een pad, of een TCP verbinding voor taal://host:poort"""
+    if hasattr(target, "write"):
+        yield target
+    elif is_socket_target(target):
+        address = str(target).split("://", 1)[1].rstrip("/")
+        host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+        connection = socket.create_connection((host, int(port or DEFAULT_PORT)),
+                                              timeout=SOCKET_TIMEOUT)
+        with connection, connection.makefile("wb") as f:
+            yield f
+    else:
+        with open(target, "wb") as f:
+            yield f
+
+
+def _place(band, x, y, rect):
+    """Rechthoek (x, y, breedte, hoogte) uit een rechtop cel naar het vel
+
+    In een gedraaide band komt (u, v) op (v, breedte - u), net als bij het
+    raster; breedte is de rechtop celbreedte.
+    """
+    rx, ry, rw, rh = rect
+    if not band.rotated:
+        return x + rx, y + ry, rw, rh
+    return x + ry, y + band.cell_height - rx - rw, rh, rw
+
+
+def _place_point(band, x, y, point):
+    u, v = point
+    if not band.rotated:
+        return x + u, y + v
+    return x + v, y + band.cell_height - u
+
+
+class ZplCanvas:
+    """Verzamelt ZPL velden voor een label formaat (maten in dots)"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.fields = []
+
+    def box(self, x, y, width, height, thickness):
+        thickness = max(1, min(thickness, width, height))
+        self.fields.append(f"^FO{x},{y}^GB{width},{height},{thickness}^FS")
+
+    def ellipse(self, x, y, width, height, thickness):
+        self.fields.append(f"^FO{x},{y}^GE{width},{height},{thickness}^FS")
+
+    def line(self, x0, y0, x1, y1, thickness):
+        left, top = min(x0, x1), min(y0, y1)
+        width, height = abs(x1 - x0), abs(y1 - y0)
+        if width == 0 or height == 0:
+            self.box(left, top, max(width, thickness), max(height, thickness), thickness)
+            return
+        # R: van linksonder naar rechtsboven, L: van linksboven naar rechtsonder
+        leaning = "R" if (x1 - x0) * (y1 - y0) < 0 else "L"
+        self.fields.append(f"^FO{left},{top}^GD{max(width, thickness)},"
+                           f"{max(height, thickness)},{thickness},B,{leaning}^FS")
+
+    def text(self, rect, block_width, lines, size, rotated):
+        """Gecentreerde regels in het blok rect; block_width langs de tekst gemeten"""
+        x, y = rect[0], rect[1]
+        data = "\\&".join(_zpl_escape(line) for line in lines)
+        orientation = "B" if rotated else "N"
+        self.fields.append(f"^FO{x},{y}^A0{orientation},{size},{size}"
+                           f"^FB{block_width},{len(lines)},0,C,0^FH_^FD{data}^FS")
+
+    def barcode(self, rect, symbology, data, module, height, rotated):
+        orientation = "B" if rotated else "N"
+        if symbology == "ean13":
+            command, data = f"^BE{orientation},{height},N,N", data[:12]
+        else:
+            # A: de printer kiest zelf de Code 128 subsets
+            command = f"^BC{orientation},{height},N,N,N,A"
+        self.fields.append(f"^FO{rect[0]},{rect[1]}^BY{module}{command}"
+                           f"^FH_^FD{_zpl_escape(data)}^FS")
+
+    def content(self, copies=1):
+        header = f"^XA^CI28^PW{self.width}^LL{self.height}^LH0,0"
+        footer = f"^PQ{copies}^XZ" if copies > 1 else "^XZ"
+        return "\n".join([header, *self.fields, footer]).encode("utf-8") + b"\n"
+
+
+def _zpl_escape(text):
+    # Met ^FH_ worden _, ^ en ~ als hex geschreven
+    return text.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+
+
+class EplCanvas:
+    """Verzamelt EPL2 commando's voor een label formaat (maten in dots)"""
+
+    def __init__(self, width, height, dpi):
+        self.width = width
+        self.height = height
+        self.fonts = EPL_FONTS[300 if dpi >= 300 else 203]
+        self.commands = []
+
+    def box(self, x, y, width, height, thickness):
+        self.commands.append(f"X{x},{y},{max(1, thickness)},{x + width},{y + height}")
+
+    def ellipse(self, x, y, width, height, thickness):
+        cx, cy = x + width / 2, y + height / 2
+        points = [(round(cx + width / 2 * math.cos(2 * math.pi * i / ELLIPSE_SEGMENTS)),
+                   round(cy + height / 2 * math.sin(2 * math.pi * i / ELLIPSE_SEGMENTS)))
+                  for i in range(ELLIPSE_SEGMENTS + 1)]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            self.line(x0, y0, x1, y1, thickness)
+
+    def line(self, x0, y0, x1, y1, thickness):
+        if x0 == x1 or y0 == y1:
+            left, top = min(x0, x1), min(y0, y1)
+            self.commands.append(f"LO{left},{top},{max(abs(x1 - x0), thickness)},"
+                                 f"{max(abs(y1 - y0), thickness)}")
+        else:
+            self.commands.append(f"LS{x0},{y0},{thickness},{x1},{y1}")
+
+    def _font(self, size):
+        """Font nummer en vermenigvuldiging waarvan de hoogte het dichtst bij size komt"""
+        best = None
+        for number, (width, height) in enumerate(self.fonts, 1):
+            multiple = max(1, min(9, round(size / height)))
+            score = abs(height * multiple - size)
+            if best is None or score < best[0]:
+                best = (score, number, multiple, width)
+        return best[1:]
+
+    def text(self, rect, block_width, lines, size, rotated):
+        number, multiple, char_width = self._font(size)
+        line_height = self.fonts[number - 1][1] * multiple
+        x, y, width, height = rect
+        for index, line in enumerate(lines):
+            # Gecentreerd met de vaste tekenbreedte van het font
+            offset = max(0, (block_width - len(line) * char_width * multiple) // 2)
+            data = line.replace("\\", "\\\\").replace('"', '\\"')
+            if rotated:
+                # 270 graden: het beginpunt is linksonder, de tekst loopt omhoog
+                origin = (x + index * line_height, y + height - offset)
+            else:
+                origin = (x + offset, y + index * line_height)
+            self.commands.append(f'A{origin[0]},{origin[1]},{3 if rotated else 0},{number},'
+                                 f'{multiple},{multiple},N,"{data}"')
+
+    def barcode(self, rect, symbology, data, module, height, rotated):
+        kind, data = ("E30", data[:12]) if symbology == "ean13" else ("1", data)
+        x, y = (rect[0], rect[1] + rect[3]) if rotated else rect[:2]
+        data = data.replace("\\", "\\\\").replace('"', '\\"')
+        self.commands.append(f'B{x},{y},{3 if rotated else 0},{kind},{module},{2 * module},'
+                             f'{height},N,"{data}"')
+
+    def content(self, copies=1):
+        lines = ["", "N", f"q{self.width}", f"Q{self.height},0", *self.commands,
+                 f"P{copies}"]
+        return "\n".join(lines).encode("cp1252", errors="replace") + b"\n"
+
+
+class PrinterSheetRenderer:
+    """Zet vellen en rollen om naar label formaten in ZPL of EPL"""
+
+    def __init__(self, language="zpl"):
+        if language not in LANGUAGES:
+            raise ValueError(f"Onbekende printertaal: {language}")
+        self.language = language
+
+    def canvas(self, width, height, dpi):
+        if self.language == "epl":
+            return EplCanvas(width, height, dpi)
+        return ZplCanvas(width, height)
+
+    def formats(self, params, cells=None):
+        """Levert de label formaten (bytes) voor params een voor een op
+
+        cells is alleen voor een rol: per label (tekst, barcode), zie
+        SheetRenderer.save_roll.
+        """
+        if isinstance(params, LabelPage):
+            yield self.draw_labels(params.params, params.texts, params.barcodes)
+        elif isinstance(params, LabelSheetParams):
+            yield self.draw_labels(params)
+        elif isinstance(params, ShapeSheetParams):
+            yield self.draw_shapes(params)
+        elif isinstance(params, NestedPage):
+            yield self.draw_nested(params)
+        elif isinstance(params, RollParams):
+            yield from self.draw_roll(params, cells)
+        else:
+            raise TypeError(f"Onbekend parameter type: {type(params).__name__}")
+
+    def draw_labels(self, params, texts=None, barcodes=None):
+        """Labelvel; texts en barcodes geven optioneel per cel een eigen inhoud"""
+        with stage("layout"):
+            grid = label_plan(params)
+        page = grid.page
+        canvas = self.canvas(page.page_width, page.page_height, params.dpi)
+        if texts is None:
+            cells = itertools.repeat((params.text, params.barcode), grid.count)
+        else:
+            count = grid.count
+            texts = texts[:count]
+            barcodes = (barcodes if barcodes is not None
+                        else (params.barcode,) * len(texts))[:count]
+            cells = itertools.zip_longest(texts, barcodes, fillvalue="")
+        self._label_cells(canvas, grid, params, list(cells))
+        return canvas.content()
+
+    def draw_roll(self, params, cells=None):
+        """Een rol: een formaat per rij; zonder cells de volle rijen als kopieën"""
+        label = params.label
+        if params.count < 1:
+            raise ValueError("Een rol heeft minstens een label nodig")
+        with stage("layout"):
+            row = roll_layout(params)
+        if cells is None:
+            full, rest = divmod(params.count, row.cols)
+            for band, copies in ((row, full), (row._replace(cols=rest), 1)):
+                if copies and band.cols:
+                    canvas = self.canvas(band.page_width, band.page_height, label.dpi)
+                    self._label_cells(canvas, LayoutPlan((band,)), label,
+                                      [(label.text, label.barcode)] * band.cols)
+                    yield canvas.content(copies)
+            return
+        cells = iter(cells)
+        for band in roll_rows(row, params.count):
+            filled = [(text, label.barcode if barcode is None else barcode)
+                      for text, barcode in itertools.islice(cells, band.cols)]
+            canvas = self.canvas(band.page_width, band.page_height, label.dpi)
+            self._label_cells(canvas, LayoutPlan((band,)), label, filled)
+            yield canvas.content()
+
+    @timed("cells")
+    def _label_cells(self, canvas, grid, params, cells):
+        """Randen van alle cellen van grid (LayoutPlan), en tekst en barcode voor de gevulde"""
+        render_stats.count("cells", grid.count)
+        layout = upright_layout(grid.page)
+        has_text = any(text for text, _ in cells)
+        has_barcode = any(barcode for _, barcode in cells)
+        text_box, barcode_box = label_regions(layout, has_text, has_barcode)
+        padded = itertools.chain(cells, itertools.repeat(("", "")))
+        for (band, x, y), (text, barcode) in zip(grid.cells(), padded):
+            # Net als de raster rand: breedte en hoogte inclusief de laatste pixel
+            canvas.box(x, y, band.cell_width + 1, band.cell_height + 1, 1)
+            if text:
+                self._label_text(canvas, band, x, y, params, text_box, text)
+            if barcode:
+                self._label_barcode(canvas, band, x, y, params, barcode_box, barcode)
+
+    @timed("text")
+    def _label_text(self, canvas, band, x, y, params, box, text):
+        size, text = label_text_style(box, params, text, measure)
+        size = max(1, round(size))
+        lines = text.split("\n")
+        box_x, box_y, box_width, box_height = box
+        block_height = len(lines) * size
+        block = (box_x, box_y + max(0, (box_height - block_height) // 2), box_width,
+                 min(block_height, box_height))
+        canvas.text(_place(band, x, y, block), box_width, lines, size, band.rotated)
+
+    def _label_barcode(self, canvas, band, x, y, params, box, data):
+        padding = cm_to_px(LABEL_PADDING_CM, params.dpi)
+        box_x, box_y, box_width, box_height = box
+        runs = barcode_runs(params.barcode_type, data)
+        quiet_left, quiet_right = QUIET_ZONES[params.barcode_type]
+        module = (box_width - 2 * padding) // (sum(runs) + quiet_left + quiet_right)
+        height = box_height - 2 * padding
+        if module < 1 or height < 1:
+            raise BarcodeError(f"Barcode '{data}' past niet in het label")
+        width = sum(runs) * module
+        rect = (box_x + (box_width - width) // 2, box_y + padding, width, height)
+        canvas.barcode(_place(band, x, y, rect), params.barcode_type, data, module, height,
+                       band.rotated)
+
+    def draw_shapes(self, params):
+        if params.shape_type not in SHAPE_TYPES:
+            raise ValueError(f"Onbekend vorm type: {params.shape_type}")
+        with stage("layout"):
+            grid = shape_plan(params)
+        page = grid.page
+        for layout in grid.bands:
+            if layout.total_width > layout.page_width:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te breed voor het "
+                                  f"{params.page_size} vel!")
+            if layout.total_height > layout.page_height:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te hoog voor het "
+                                  f"{params.page_size} vel!")
+        canvas = self.canvas(page.page_width, page.page_height, params.dpi)
+        with stage("cells"):
+            render_stats.count("cells", grid.count)
+            for band, x, y in grid.cells():
+                self._shape(canvas, band, x, y, params)
+        return canvas.content()
+
+    def draw_nested(self, page):
+        """Vel met een mix van vormen op de plekken uit page.placements"""
+        with stage("layout"):
+            layouts = placement_layouts(page)
+        if not layouts:
+            raise LayoutError("Er staan geen vormen op het vel")
+        canvas = self.canvas(layouts[0].page_width, layouts[0].page_height, page.dpi)
+        with stage("cells"):
+            render_stats.count("cells", len(layouts))
+            for placement, layout in zip(page.placements, layouts):
+                shape = page.shapes[placement.key]
+                if shape.shape_type not in SHAPE_TYPES:
+                    raise ValueError(f"Onbekend vorm type: {shape.shape_type}")
+                self._shape(canvas, layout, layout.h_start, layout.v_start, shape)
+        return canvas.content()
+
+    def _shape(self, canvas, band, x, y, params):
+        """Een vorm met de lijn gecentreerd op de rand van de cel, zoals het raster"""
+        upright = upright_layout(band)
+        width, height = upright.cell_width, upright.cell_height
+        thickness = params.line_thickness
+        inner = thickness // 2
+        outline = (-inner, -inner, width + 2 * inner + 1, height + 2 * inner + 1)
+        if params.shape_type == "Rechthoek":
+            canvas.box(*_place(band, x, y, outline), thickness)
+        elif params.shape_type == "Cirkel":
+            canvas.ellipse(*_place(band, x, y, outline), thickness)
+        else:
+            points = [_place_point(band, x, y, point)
+                      for point in ((int(width / 2), 0), (0, height), (width, height))]
+            for start, end in zip(points, points[1:] + points[:1]):
+                canvas.line(*start, *end, thickness)
+
+
+def write_commands(target, pages, language=None, cells=None):
+    """Schrijft de label formaten van pages naar target; geeft het aantal formaten
+
+    pages mag een generator zijn: elk formaat gaat direct naar het doel.
+    language komt standaard uit target (zie printer_language).
+    """
+    language = language or printer_language(target)
+    if language is None:
+        raise ValueError(f"Geen printertaal voor {target}: gebruik .zpl, .epl, "
+                         f"zpl:// of epl://")
+    renderer = PrinterSheetRenderer(language)
+    count = 0
+    with open_target(target) as f:
+        for params in pages:
+            for data in renderer.formats(params, cells):
+                f.write(data)
+                f.flush()
+                count += 1
+    return count
@@ -0,0 +1,212 @@
+"""Cache op schijf voor gerenderde vellen, geadresseerd op inhoud
+
+De sleutel is een SHA-256 over alles wat de uitkomst bepaalt: het type en
+alle velden van de parameters (ook de standaardwaarden, dus ook de DPI), het
+uitvoerformaat, het gekozen lettertype en de versies van de engine en PIL.
+Dezelfde instellingen geven dus altijd hetzelfde bestand, ongeacht wie of
+welk proces het vraagt.
+
+Bestanden worden atomair geschreven (tijdelijk bestand + os.replace), zodat
+GUI en batch processen de cache tegelijk kunnen gebruiken. De wijzigingstijd
+dient als LRU stempel: een treffer zet hem op nu, en bij een te grote cache
+gaan de oudste bestanden eerst weg. Elk proces houdt een schatting van de
+omvang bij en loopt de map alleen door als die schatting boven de grens komt
+(of eens per RESCAN_STORES keer), niet bij elk bewaard bestand.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# Verhogen als de render engine andere pixels of PDF's gaat maken
+CACHE_VERSION = 3
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_DIR_ENV = "LABEL_DESIGNER_CACHE"
+# Na zoveel bewaarde bestanden wordt de omvang op schijf opnieuw geteld;
+# andere processen vullen dezelfde cache en maken de schatting te laag
+RESCAN_STORES = 100
+
+
+def default_directory():
+    """Cache map uit LABEL_DESIGNER_CACHE, anders de gebruikelijke cache map"""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "label-designer")
+
+
+def _canonical(value):
+    """Zet parameters om naar JSON met vaste volgorde (type naam erbij)"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {"__type__": type(value).__name__,
+                **{field.name: _canonical(getattr(value, field.name))
+                   for field in dataclasses.fields(value)}}
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return {"__type__": type(value).__name__,
+                **{name: _canonical(item) for name, item in zip(value._fields, value)}}
+    if isinstance(value, (tuple, list)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items())}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _font_identity():
+    from fonts import registry
+    family = registry.family
+    try:
+        stat = os.stat(family)
+        return [family, stat.st_size, stat.st_mtime_ns]
+    except (TypeError, OSError):
+        # PIL standaard font of een naam die PIL zelf opzoekt
+        return [family]
+
+
+def render_key(params, suffix):
+    """Stabiele sleutel voor het renderen van params naar een bestand met suffix"""
+    import PIL
+    description = {
+        "version": CACHE_VERSION,
+        "pil": PIL.__version__,
+        "font": _font_identity(),
+        "format": suffix.lower(),
+        "params": _canonical(params),
+    }
+    encoded = json.dumps(description, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Begrensde cache van uitvoerbestanden met LRU verwijdering
+
+    hits en misses tellen per proces; stats() geeft ze samen met de
+    huidige omvang op schijf.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Geschatte omvang op schijf; None: nog niet (opnieuw) geteld
+        self._size = None
+        self._stores = 0
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix.lower())
+
+    def fetch(self, key, suffix, target):
+        """Kopieert een gecachet bestand naar target; False als het er niet is"""
+        path = self._path(key, suffix)
+        try:
+            shutil.copyfile(path, target)
+            os.utime(path)
+        except FileNotFoundError:
+            # Ook als een ander proces het net heeft verwijderd
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, suffix, source):
+        """Bewaart een kopie van source onder key en ruimt daarna zo nodig op"""
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp, open(source, "rb") as f:
+                shutil.copyfileobj(f, temp)
+                added = temp.tell()
+            try:
+                added -= os.stat(path).st_size
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._stores += 1
+            if self._size is not None and self._stores % RESCAN_STORES:
+                self._size += added
+            else:
+                self._size = None
+            full = self._size is None or self._size > self.max_bytes
+        if full:
+            self.evict()
+
+    def save(self, params, path, produce):
+        """Schrijft params naar path uit de cache, of via produce() en bewaart het dan
+
+        Geeft True bij een treffer.
+        """
+        suffix = os.path.splitext(str(path))[1] or ".png"
+        key = render_key(params, suffix)
+        if self.fetch(key, suffix, path):
+            return True
+        produce()
+        try:
+            self.store(key, suffix, path)
+        except OSError:
+            # Een volle of alleen-lezen cache mag het renderen niet laten mislukken
+            pass
+        return False
+
+    def _entries(self):
+        entries = []
+        try:
+            buckets = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for bucket in buckets:
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Verwijdert de minst recent gebruikte bestanden tot de cache binnen max_bytes past"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "files": len(entries),
+                "bytes": sum(size for _, size, _ in entries)}
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with self._lock:
+            self.hits = self.misses = 0
+            self._size = None
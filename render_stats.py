@@ -0,0 +1,157 @@
+"""Tijden en tellers per stap van een render (zonder PIL of Qt)
+
+Een RenderStats verzamelt hoe lang elke stap duurde (lettertypes laden,
+layout, cellen, titel, tekst, meten, tekenen, coderen, schrijven) en tellers
+zoals getekende cellen en cache treffers. Stappen kunnen genest zijn; een
+stap telt alleen zijn eigen tijd, dus de stappen tellen op tot de totale tijd.
+
+De render engine meldt stappen met de functies stage en count; die werken
+op de RenderStats die in deze thread actief is (zie RenderStats.activate) en
+doen niets zonder actieve RenderStats.
+"""
+from contextlib import contextmanager
+import functools
+import threading
+import time
+
+# Stappen in pijplijn volgorde, met hun naam voor de gebruiker
+STAGES = {
+    "cache": "cache",
+    "fonts": "lettertypes",
+    "layout": "layout",
+    "cells": "cellen",
+    "title": "titel",
+    "text": "tekst",
+    "measure": "meten",
+    "paint": "tekenen",
+    "encode": "coderen",
+    "write": "schrijven",
+}
+# Zoveel stappen (de traagste) noemt summary
+SUMMARY_STAGES = 3
+
+_active = threading.local()
+
+
+def current():
+    """De actieve RenderStats van deze thread, of None"""
+    return getattr(_active, "stats", None)
+
+
+@contextmanager
+def stage(name):
+    """Meet de tijd van een stap voor de actieve RenderStats (als die er is)"""
+    stats = current()
+    if stats is None:
+        yield
+        return
+    with stats.stage(name):
+        yield
+
+
+def count(name, amount=1):
+    """Verhoogt een teller van de actieve RenderStats (als die er is)"""
+    stats = current()
+    if stats is not None:
+        stats.count(name, amount)
+
+
+def timed(name):
+    """Decorator: elke aanroep van de functie is (een deel van) stap name"""
+    def decorate(function):
+        @functools.wraps(function)
+        def staged(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return staged
+    return decorate
+
+
+class RenderStats:
+    """Tijden per stap en tellers van een render of een hele batch job
+
+    caches is een dict naam: functie die (treffers, missers) teruggeeft; het
+    verschil tussen activate en het einde komt in de tellers als
+    naam_hits en naam_misses.
+    """
+
+    def __init__(self, caches=None):
+        self.stages = {}
+        self.counters = {}
+        self.seconds = 0.0
+        self.caches = dict(caches or {})
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                # De omringende stap telt deze tijd niet mee
+                self._stack[-1] += elapsed
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def activate(self):
+        """Maakt deze RenderStats actief in deze thread en meet de totale tijd"""
+        previous = current()
+        before = {name: info() for name, info in self.caches.items()}
+        _active.stats = self
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            _active.stats = previous
+            for name, info in self.caches.items():
+                hits, misses = info()
+                self.count(f"{name}_hits", hits - before[name][0])
+                self.count(f"{name}_misses", misses - before[name][1])
+
+    def as_dict(self):
+        """Alles als JSON vriendelijke dict"""
+        return {"seconds": round(self.seconds, 6),
+                "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                "counters": dict(self.counters)}
+
+    def summary(self):
+        """Korte regel voor de statusbalk: totale tijd, traagste stappen en cellen"""
+        slowest = sorted(self.stages.items(), key=lambda item: item[1], reverse=True)
+        parts = [f"{STAGES.get(name, name)} {seconds:.2f} s"
+                 for name, seconds in slowest[:SUMMARY_STAGES]]
+        text = f"{self.seconds:.2f} s"
+        if parts:
+            text += f" ({', '.join(parts)})"
+        if self.counters.get("cells"):
+            text += f", {self.counters['cells']} cellen"
+        return text
+
+
+class TimedFile:
+    """Binair bestandsobject dat het schrijven als stap "write" meet en bytes telt"""
+
+    def __init__(self, file):
+        self._file = file
+        self.name = getattr(file, "name", None)
+
+    def write(self, data):
+        with stage("write"):
+            written = self._file.write(data)
+        count("bytes_written", len(data))
+        return written
+
+    def flush(self):
+        with stage("write"):
+            self._file.flush()
+
+    def __getattr__(self, name):
+        # seek, tell en dergelijke, die PIL bij sommige formaten gebruikt
+        return getattr(self._file, name)
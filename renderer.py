@@ -0,0 +1,1212 @@
+"""Headless render engine voor label- en vormvellen (zonder Qt)"""
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import NamedTuple, Optional
+import functools
+import io
+import itertools
+import math
+import os
+
+from PIL import Image, ImageChops, ImageColor, ImageDraw
+
+from barcode import barcode_mask
+from fonts import get_font, registry
+from layout import (DPI, PAGE_SIZES, Layout, LayoutPlan, cm_to_px, layout_plan,
+                    page_layout_plan, roll_pixels, roll_row, roll_rows, sheet_pixels)
+from packing import PackItem, PackingError, pack_sheets
+from png_stream import PngWriter
+import render_stats
+from render_stats import RenderStats, TimedFile, stage, timed
+import textfit
+
+DEFAULT_SHAPE_COLOR = "#723744"
+SHAPE_TYPES = ("Rechthoek", "Cirkel", "Driehoek")
+TITLE_TEXT = "Machine Coating"
+TITLE_FONT_SIZE = 180
+TITLE_ANGLE = 15
+COUNT_FONT_SIZE = 200
+LABEL_FONT_SIZE = 40
+# Witruimte rond passend gemaakte labeltekst en barcodes
+LABEL_PADDING_CM = 0.1
+# Deel van de labelhoogte voor de barcode als er ook tekst op staat
+BARCODE_SHARE = 0.6
+
+# Kwaliteit van vormlijnen: supersample factor (1 = geen anti-aliasing)
+QUALITY_SCALES = {"fast": 1, "high": 4}
+
+# Beeldmodus van het vel; "auto" kiest de kleinste modus die het vel exact weergeeft
+IMAGE_MODES = ("auto", "RGB", "P", "L", "1")
+# PNG compressie (zlib niveau): sneller schrijven of kleinere bestanden
+PNG_COMPRESSION = {"fast": 1, "default": 6, "small": 9}
+
+# Vellen groter dan MAX_PAGE_BYTES (A3/SRA3, hoge DPI) gaan als PNG in stroken
+# van hoogstens STRIP_BYTES naar het bestand in plaats van als een bitmap
+MAX_PAGE_BYTES = 64 * 1024 * 1024
+STRIP_BYTES = 16 * 1024 * 1024
+MODE_BYTES = {"L": 1, "RGB": 3}
+WHITE = (255, 255, 255)
+# Zoveel effen kleuren krijgen hoogstens een eigen, exacte plek in een vast palet
+MAX_EXACT_INKS = 64
+# Rijen van een rol die samen als een strook getekend en weggeschreven worden
+ROLL_BATCH_ROWS = 8
+
+# Schaduwlagen (offsets) gevolgd door de hoofdtekst
+TITLE_PASSES = ((6, 6), (4, 4), (2, 2), (0, 0))
+COUNT_PASSES = ((5, 5), (3, 3), (2, 2), (0, 0))
+
+
+class LayoutError(ValueError):
+    """De gekozen layout past niet op het vel"""
+
+
+class RenderCancelled(Exception):
+    """De render is tussentijds afgebroken"""
+
+
+@dataclass(frozen=True)
+class LabelSheetParams:
+    label_width_cm: float = 5.0
+    label_height_cm: float = 3.0
+    margin_cm: float = 0.2
+    outer_margin_cm: float = 1.0
+    text: str = ""
+    dpi: int = DPI
+    # Grootste lettergrootte kiezen die in het label past, eventueel afgebroken
+    auto_fit: bool = False
+    wrap_text: bool = False
+    # Barcode naast (boven) of in plaats van de tekst, zie barcode.SYMBOLOGIES
+    barcode: str = ""
+    barcode_type: str = "code128"
+    # Labels 90 graden draaien als er daardoor meer op een vel passen
+    allow_rotation: bool = False
+    image_mode: str = "auto"  # Zie IMAGE_MODES
+    png_compression: str = "default"  # Zie PNG_COMPRESSION
+    page_size: str = "A4"  # Zie layout.PAGE_SIZES
+
+
+@dataclass(frozen=True)
+class ShapeSheetParams:
+    shape_type: str = "Rechthoek"
+    shape_width_cm: float = 5.0
+    shape_height_cm: float = 3.0
+    color: object = DEFAULT_SHAPE_COLOR  # Alles wat PIL als kleur accepteert
+    line_thickness: int = 2
+    margin_cm: float = 0.2
+    outer_margin_cm: float = 1.0
+    columns: Optional[int] = None  # None = automatische layout
+    rows: Optional[int] = None
+    dpi: int = DPI
+    quality: str = "fast"  # "high" = supersampled anti-aliasing
+    # Vormen 90 graden draaien als er daardoor meer passen (alleen automatische layout)
+    allow_rotation: bool = False
+    image_mode: str = "auto"  # Zie IMAGE_MODES
+    png_compression: str = "default"  # Zie PNG_COMPRESSION
+    page_size: str = "A4"  # Zie layout.PAGE_SIZES
+
+
+@dataclass(frozen=True)
+class RollParams:
+    """Labels op een doorlopende rol: vaste breedte, de lengte volgt uit count
+
+    Van label gelden de maten, inhoud, DPI en beeldmodus; margin_cm is de
+    ruimte tussen labels (ook tussen de rijen) en outer_margin_cm de rand
+    links en rechts. Een rol heeft geen titel, aantal of watermerk.
+    """
+    label: LabelSheetParams = LabelSheetParams()
+    roll_width_cm: float = 10.0
+    count: int = 1
+
+
+class LabelPage(NamedTuple):
+    """Een labelvel met per cel een eigen tekst (rij voor rij), voor data merge
+
+    barcodes geeft optioneel per cel een eigen barcode; anders geldt
+    params.barcode voor elke cel.
+    """
+    params: LabelSheetParams
+    texts: tuple
+    barcodes: Optional[tuple] = None
+
+
+class NestItem(NamedTuple):
+    """Een vorm in een mix, met het aantal dat geplaatst moet worden"""
+    shape: ShapeSheetParams
+    quantity: int
+
+
+class NestedPage(NamedTuple):
+    """Een vel met een mix van vormen, zoals nest_pages ze plaatst
+
+    placements zijn packing.Placement in pixels; key is de index in shapes.
+    """
+    shapes: tuple
+    placements: tuple
+    dpi: int = DPI
+    image_mode: str = "auto"
+    png_compression: str = "default"
+    page_size: str = "A4"
+
+
+class Paste(NamedTuple):
+    """Een teken operatie: fill door mask op box (links, boven, rechts, onder)
+
+    Zonder mask wordt de hele box gevuld.
+    """
+    fill: object
+    box: tuple
+    mask: object = None
+
+
+class SheetPlan(NamedTuple):
+    """Een vel als lijst Paste operaties, nog zonder pixels
+
+    mode is de modus om in te tekenen (zie canvas_mode), colors de inktkleuren.
+    De operaties kunnen op het hele vel of per strook worden uitgevoerd.
+    """
+    size: tuple
+    mode: str
+    image_mode: str
+    colors: tuple
+    ops: list
+
+
+def _lru_counts(function):
+    def counts():
+        info = function.cache_info()
+        return info.hits, info.misses
+    return counts
+
+
+def render_caches():
+    """Caches waarvan RenderStats de treffers en missers bijhoudt
+
+    De tellers gelden voor het hele proces; een render die tegelijk met een
+    andere loopt (zoals de preview in de GUI) telt die van de ander mee.
+    """
+    return {"fonts": lambda: (registry.hits, registry.misses),
+            "measure": _lru_counts(textfit.text_bbox),
+            "title": _lru_counts(title_layer),
+            "text_layers": _lru_counts(text_layer),
+            "layout": _lru_counts(layout_plan)}
+
+
+def _measured(method):
+    """Meet een publieke methode in self.stats, tenzij er al een meting actief is
+
+    Een omringende meting (een batch job, of save die render aanroept) krijgt
+    zo alle stappen; anders begint elke aanroep een nieuwe RenderStats.
+    """
+    @functools.wraps(method)
+    def measured(self, *args, **kwargs):
+        stats = render_stats.current()
+        if stats is not None:
+            self.stats = stats
+            return method(self, *args, **kwargs)
+        self.stats = RenderStats(render_caches())
+        with self.stats.activate():
+            return method(self, *args, **kwargs)
+    return measured
+
+
+@contextmanager
+def _output(target):
+    """Bestandsobject voor target dat het schrijven meet (zie render_stats.TimedFile)
+
+    Een pad wordt geopend en na een fout weer verwijderd, zoals Image.save doet.
+    """
+    if hasattr(target, "write"):
+        yield TimedFile(target)
+        return
+    with open(target, "wb") as file:
+        try:
+            yield TimedFile(file)
+        except BaseException:
+            file.close()
+            os.remove(target)
+            raise
+
+
+def label_plan(params):
+    """LayoutPlan van een labelvel; met allow_rotation de indeling met de meeste labels"""
+    return page_layout_plan(params.dpi, params.label_width_cm, params.label_height_cm,
+                            params.margin_cm, params.outer_margin_cm, params.page_size,
+                            allow_rotation=params.allow_rotation)
+
+
+def shape_plan(params):
+    """LayoutPlan van een vormvel (handmatig of automatisch); draaien alleen automatisch"""
+    return page_layout_plan(params.dpi, params.shape_width_cm, params.shape_height_cm,
+                            params.margin_cm, params.outer_margin_cm, params.page_size,
+                            allow_rotation=params.allow_rotation, cols=params.columns,
+                            rows=params.rows, min_one=True)
+
+
+def roll_layout(params):
+    """De band van een rij labels over de rol (zie layout.roll_row)"""
+    label = params.label
+    row = roll_row(*roll_pixels(label.dpi, params.roll_width_cm, label.label_width_cm,
+                                label.label_height_cm, label.margin_cm,
+                                label.outer_margin_cm))
+    if row.cols <= 0:
+        raise LayoutError("Waarschuwing: De labels zijn te breed voor de rol!")
+    return row
+
+
+def nest_pages(items, margin_cm=0.2, outer_margin_cm=1.0, dpi=DPI, allow_rotation=True,
+               page_size="A4"):
+    """Verdeelt een mix van vormen (NestItem) over zo min mogelijk vellen
+
+    Geeft een lijst NestedPage terug; elke pagina kan direct gerenderd worden.
+    """
+    shapes = tuple(item.shape for item in items)
+    pieces = [PackItem(index, cm_to_px(item.shape.shape_width_cm, dpi),
+                       cm_to_px(item.shape.shape_height_cm, dpi), item.quantity)
+              for index, item in enumerate(items)]
+    page_width, page_height = sheet_pixels(dpi, page_size)
+    try:
+        sheets = pack_sheets(pieces, page_width, page_height, cm_to_px(margin_cm, dpi),
+                             cm_to_px(outer_margin_cm, dpi), allow_rotation)
+    except PackingError as e:
+        shape = shapes[e.key]
+        raise LayoutError(f"Waarschuwing: {shape.shape_type} van {shape.shape_width_cm:.1f} x "
+                          f"{shape.shape_height_cm:.1f} cm past niet op het {page_size} vel!") from None
+    return [NestedPage(shapes, placements, dpi, page_size=page_size) for placements in sheets]
+
+
+def nested_sheet(page):
+    """Een lege layout met alleen de maten van het vel, voor titel en aantal"""
+    return Layout(*sheet_pixels(page.dpi, page.page_size), 0, 0, 0, 0, 0, 0, 0)
+
+
+def nested_watermark(page):
+    kinds = len({placement.key for placement in page.placements})
+    return f"Mix van {kinds} {'vorm' if kinds == 1 else 'vormen'}"
+
+
+def placement_layouts(page):
+    """Elke plaatsing van een NestedPage als band van een cel, in dezelfde volgorde"""
+    sheet = nested_sheet(page)
+    return tuple(sheet._replace(cell_width=placement.width, cell_height=placement.height,
+                                cols=1, rows=1, h_start=placement.x, v_start=placement.y,
+                                rotated=placement.rotated)
+                 for placement in page.placements)
+
+
+def _rgb(color):
+    if isinstance(color, int):
+        return (color,) * 3  # grijswaarde van een "L" vel
+    return ImageColor.getrgb(color)[:3] if isinstance(color, str) else tuple(color[:3])
+
+
+def canvas_mode(image_mode, colors=()):
+    """Modus om het vel in te tekenen
+
+    Zwart, wit en grijs (tekst, randen, titel) passen exact in L; alleen
+    gekleurde inkt heeft RGB nodig. Voor "L" en "1" wordt kleur grijs.
+    """
+    if image_mode not in IMAGE_MODES:
+        raise ValueError(f"Onbekende beeldmodus: {image_mode}")
+    if image_mode == "RGB":
+        return "RGB"
+    if image_mode in ("L", "1"):
+        return "L"
+    return "L" if all(len(set(_rgb(color))) == 1 for color in colors) else "RGB"
+
+
+def ink(color, mode):
+    """Een kleur zoals paste en ImageDraw hem in mode verwachten"""
+    if mode == "RGB":
+        return color
+    if isinstance(color, str):
+        return ImageColor.getcolor(color, mode)
+    # Grijswaarde met dezelfde weging als Image.convert("L")
+    r, g, b = color[:3]
+    return (r * 299 + g * 587 + b * 114) // 1000
+
+
+def finish_image(image, image_mode, inks=(WHITE,)):
+    """Zet het getekende vel om naar de gevraagde (of kleinst passende) modus
+
+    Bij "auto" wordt een grijs vel met alleen zwart en wit exact 1-bit; een
+    gekleurd vel heeft door anti-aliasing te veel kleuren voor een palet en
+    blijft RGB. "P" geeft een grijs vel het grijze palet (exact) en een
+    gekleurd vel een exact palet als het kan, anders het vaste palet van
+    ink_palette met inks (zie plan_inks), net als een gestreamd vel; "1"
+    zet om zonder dithering.
+    """
+    if image_mode == "1":
+        return image.convert("1", dither=Image.NONE)
+    if image.mode == "L" and image_mode == "P":
+        return stream_image(image, "P", grey_palette())
+    if image.mode == "L" and image_mode == "auto":
+        # Alleen zwart en wit: 1-bit is exact
+        colors = image.getcolors(2)
+        if colors is not None and {color for _, color in colors} <= {0, 255}:
+            return image.convert("1", dither=Image.NONE)
+        return image
+    if image.mode == "RGB" and image_mode == "P":
+        colors = image.getcolors(256)
+        if colors is None:
+            return stream_image(image, "P", ink_palette(inks))
+        palette = Image.new("P", (1, 1))
+        palette.putpalette([channel for _, color in colors for channel in color])
+        return image.quantize(palette=palette, dither=Image.NONE)
+    return image
+
+
+def page_bytes(plan):
+    """Geheugen voor het hele vel als een bitmap"""
+    width, height = plan.size
+    return width * height * MODE_BYTES[plan.mode]
+
+
+def strip_rows(plan, multiple=1):
+    """Hoogte van een strook die binnen STRIP_BYTES past, een veelvoud van multiple"""
+    rows = STRIP_BYTES // (plan.size[0] * MODE_BYTES[plan.mode])
+    return max(multiple, rows - rows % multiple)
+
+
+class InkPalette(NamedTuple):
+    """Vast palet voor een "P" vel: image (P afbeelding) en de exacte kleuren
+
+    De exacte kleuren staan vooraan in het palet, op index 0, 1, ...
+    """
+    image: object
+    exact: tuple
+
+
+def plan_inks(plan):
+    """De effen kleuren (RGB) waarmee een vel getekend wordt, wit (de achtergrond) eerst"""
+    inks = {_rgb(color) for color in plan.colors} | {_rgb(op.fill) for op in plan.ops}
+    inks.discard(WHITE)
+    return (WHITE,) + tuple(sorted(inks))
+
+
+def ink_palette(inks):
+    """Vast palet voor een "P" vel zonder exact palet (InkPalette)
+
+    Een exact palet vraagt het hele vel; daarom eerst de effen kleuren inks
+    exact (zie plan_inks), dan verlopen van wit naar zwart en van wit naar
+    elke gekleurde inkt voor de anti-aliasing, samen hoogstens 256 kleuren.
+    """
+    exact = tuple(dict.fromkeys(_rgb(color) for color in inks))[:MAX_EXACT_INKS]
+    ramps = [(0, 0, 0)] + [color for color in exact if len(set(color)) > 1]
+    steps = max(2, (256 - len(exact)) // len(ramps))
+    values = [channel for color in exact for channel in color]
+    for target in ramps:
+        for i in range(steps):
+            values.extend(round(255 + (channel - 255) * i / (steps - 1))
+                          for channel in target)
+    image = Image.new("P", (1, 1))
+    image.putpalette(values[:768])
+    return InkPalette(image, exact)
+
+
+@functools.lru_cache(maxsize=None)
+def grey_palette():
+    """Palet met alle 256 grijswaarden op hun eigen index, voor een grijs "P" vel"""
+    return InkPalette(Image.new("L", (1, 1)).convert("P"), ())
+
+
+def color_mask(image, color):
+    """L masker dat 255 is waar een RGB afbeelding precies color is"""
+    red, green, blue = (band.point([255 if value == channel else 0 for value in range(256)])
+                        for band, channel in zip(image.split(), color))
+    return ImageChops.multiply(ImageChops.multiply(red, green), blue)
+
+
+def stream_mode(plan):
+    """Modus (en palet) van een vel dat per strook wordt omgezet
+
+    Alleen omzettingen die per pixel werken: "auto" blijft de tekenmodus,
+    want 1-bit kiezen vraagt het hele vel; "P" gebruikt ink_palette voor een
+    gekleurd vel en grey_palette voor een grijs vel.
+    """
+    if plan.image_mode == "1":
+        return "1", None
+    if plan.image_mode == "P":
+        if plan.mode == "L":
+            return "P", grey_palette()
+        return "P", ink_palette(plan_inks(plan))
+    return plan.mode, None
+
+
+def stream_image(strip, mode, palette=None):
+    """Zet een getekende strook om naar de modus uit stream_mode
+
+    Bij "P" (palette een InkPalette) krijgen de exacte kleuren hun eigen
+    index; quantize zoekt via een grof kleurraster en zou wit anders op een
+    bijna-wit uit een verloop zetten.
+    """
+    if mode == "1":
+        return strip.convert("1", dither=Image.NONE)
+    if mode == "P" and strip.mode == "L":
+        # L naar P houdt elke grijswaarde als index in het grijze palet
+        return strip.convert("P")
+    if mode == "P":
+        image = strip.quantize(palette=palette.image, dither=Image.NONE)
+        for index, color in enumerate(palette.exact):
+            image.paste(index, mask=color_mask(strip, color))
+        return image
+    return strip
+
+
+def upright_layout(layout):
+    """Een gedraaide band zoals de cellen rechtop liggen, om de inhoud op te bouwen"""
+    if not layout.rotated:
+        return layout
+    return layout._replace(cell_width=layout.cell_height, cell_height=layout.cell_width,
+                           rotated=False)
+
+
+def rotate_layers(layers, cell_width):
+    """Draait (masker, offset) lagen 90 graden tegen de klok in
+
+    Een punt (x, y) in een rechtop cel van cell_width breed komt op
+    (y, cell_width - x) in de gedraaide cel.
+    """
+    return [(mask.transpose(Image.ROTATE_90),
+             (offset_y, cell_width - offset_x - mask.width + 1))
+            for mask, (offset_x, offset_y) in layers]
+
+
+def label_regions(layout, has_text, has_barcode):
+    """Vakken (x, y, breedte, hoogte) voor tekst en barcode binnen een label
+
+    Met alleen tekst of alleen een barcode krijgt die het hele label; samen
+    staat de barcode boven de tekst. Een ongebruikt vak is None.
+    """
+    width, height = layout.cell_width, layout.cell_height
+    if not has_barcode:
+        return (0, 0, width, height), None
+    if not has_text:
+        return None, (0, 0, width, height)
+    barcode_height = round(height * BARCODE_SHARE)
+    return (0, barcode_height, width, height - barcode_height), (0, 0, width, barcode_height)
+
+
+def label_text_style(box, params, text, measure=textfit.measure):
+    """Lettergrootte en (eventueel afgebroken) tekst voor een vak in een label"""
+    padding = cm_to_px(LABEL_PADDING_CM, params.dpi)
+    width = box[2] - 2 * padding
+    height = box[3] - 2 * padding
+    if params.auto_fit:
+        return textfit.fit_text(text, width, height, params.wrap_text, measure)
+    if params.wrap_text:
+        return LABEL_FONT_SIZE, textfit.wrap_words(text, LABEL_FONT_SIZE, width, measure)
+    return LABEL_FONT_SIZE, text
+
+
+class SheetRenderer:
+    """Rendert label- en vormvellen naar een PIL afbeelding
+
+    Een vel wordt eerst gepland als lijst Paste operaties (plan) en daarna in
+    een of meer stroken getekend. progress(klaar, totaal) wordt na elke
+    operatie aangeroepen; als is_cancelled() True geeft wordt de render
+    afgebroken met RenderCancelled. Met een cache (render_cache.RenderCache)
+    haalt save een eerder gerenderd vel met dezelfde instellingen van schijf.
+
+    Na elke render, preview of save staan de tijden per stap en de tellers
+    van die aanroep in stats (een render_stats.RenderStats).
+    """
+
+    def __init__(self, progress=None, is_cancelled=None, cache=None):
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+        self.cache = cache
+        self.stats = None
+        self._done = 0
+        self._total = 0
+        self._extra_steps = 0
+
+    @_measured
+    def plan(self, params):
+        if isinstance(params, LabelPage):
+            return self.plan_labels(params.params, params.texts, params.barcodes)
+        if isinstance(params, LabelSheetParams):
+            return self.plan_labels(params)
+        if isinstance(params, ShapeSheetParams):
+            return self.plan_shapes(params)
+        if isinstance(params, NestedPage):
+            return self.plan_nested(params)
+        if isinstance(params, RollParams):
+            return self.plan_roll(params)
+        raise TypeError(f"Onbekend parameter type: {type(params).__name__}")
+
+    @_measured
+    def render(self, params):
+        plan = self.plan(params)
+        return finish_image(self._compose(plan), plan.image_mode, plan_inks(plan))
+
+    def render_labels(self, params, texts=None, barcodes=None):
+        """Rendert een labelvel; texts en barcodes geven optioneel per cel een eigen inhoud"""
+        return self.render(LabelPage(params, texts, barcodes) if texts is not None else params)
+
+    def render_shapes(self, params):
+        return self.render(params)
+
+    def render_nested(self, page):
+        return self.render(page)
+
+    @_measured
+    def render_preview(self, params, width, draft=False):
+        """Verkleinde render van het vel voor op het scherm, ongeveer width pixels breed
+
+        draft is snel: zonder anti-aliasing en verkleind met een box filter
+        met een hele factor. Anders exact width breed, glad verkleind. Grote
+        vellen worden per strook verkleind en nooit in zijn geheel getekend.
+        """
+        if draft and isinstance(params, ShapeSheetParams):
+            params = replace(params, quality="fast")
+        plan = self.plan(params)
+        page_width, page_height = plan.size
+        # Eerst met een hele factor verkleinen, zoals resize met reducing_gap=2.0
+        factor = max(1, page_width // width if draft else int(page_width / width / 2.0))
+        rows = strip_rows(plan, factor)
+        if rows >= page_height:
+            image = self._preview_strip(self._compose(plan), plan, factor)
+        else:
+            strips = [self._preview_strip(strip, plan, factor)
+                      for _, strip in self._strips(plan, rows)]
+            image = Image.new(strips[0].mode, (strips[0].width,
+                                               sum(strip.height for strip in strips)))
+            top = 0
+            for strip in strips:
+                image.paste(strip, (0, top))
+                top += strip.height
+        if draft:
+            return image
+        height = round(page_height * width / page_width)
+        return image.resize((width, height), Image.LANCZOS)
+
+    def _preview_strip(self, strip, plan, factor):
+        strip = stream_image(strip, *stream_mode(plan))
+        if strip.mode in ("1", "P"):
+            strip = strip.convert("L" if strip.mode == "1" else "RGB")
+        return strip.reduce(factor) if factor > 1 else strip
+
+    @_measured
+    def render_bytes(self, params, format="PNG"):
+        buffer = io.BytesIO()
+        self._encoded(params, buffer, format=format)
+        return buffer.getvalue()
+
+    @_measured
+    def save(self, params, path):
+        """Schrijft params naar path; True als het uit de cache kwam
+
+        PNG, PDF bij .pdf, of printertaal bij .zpl, .epl, zpl:// of epl://
+        (zie printer_lang). Een printer verbinding gaat nooit via de cache.
+        """
+        if self.cache is None or "://" in str(path):
+            self._save(params, path)
+            return False
+        with stage("cache"):
+            hit = self.cache.save(params, path, lambda: self._save(params, path))
+        self.stats.count("render_cache_hits" if hit else "render_cache_misses")
+        if hit:
+            self._begin(1)
+            self._step()
+        return hit
+
+    def _save(self, params, path):
+        from printer_lang import printer_language
+        if printer_language(path):
+            self.save_printer(params, path)
+        elif str(path).lower().endswith(".pdf"):
+            if isinstance(params, RollParams):
+                raise ValueError("Een rol kan alleen als PNG worden geschreven")
+            self.save_pdf(params, path)
+        else:
+            self._encoded(params, path)
+
+    @_measured
+    def save_pdf(self, params, path):
+        """Schrijft het vel als vector PDF (zie pdf_export)"""
+        from pdf_export import write_pdf
+        self._begin(1)
+        with stage("encode"):
+            write_pdf(str(path), [params])
+        self._step()
+
+    @_measured
+    def save_printer(self, params, target):
+        """Schrijft het vel of de rol als ZPL of EPL commando's (zie printer_lang)"""
+        from printer_lang import write_commands
+        self._begin(1)
+        with stage("encode"):
+            write_commands(target, [params])
+        self._step()
+
+    def _encoded(self, params, target, **options):
+        if isinstance(params, RollParams):
+            if options.get("format", "PNG") != "PNG":
+                raise ValueError("Een rol kan alleen als PNG worden geschreven")
+            self.save_roll(params, target)
+            return
+        # Het coderen telt als laatste stap van de voortgang
+        self._extra_steps = 1
+        try:
+            plan = self.plan(params)
+            options.update(self.save_options(params))
+            format = options.get("format") or (
+                "PNG" if str(target).lower().endswith(".png") else None)
+            if format == "PNG" and page_bytes(plan) > MAX_PAGE_BYTES:
+                self._stream_png(plan, target, options)
+            else:
+                image = self._compose(plan)
+                # Zonder format leidt PIL het formaat af uit file.name
+                with stage("encode"), _output(target) as file:
+                    finish_image(image, plan.image_mode, plan_inks(plan)).save(file, **options)
+        finally:
+            self._extra_steps = 0
+        self._step()
+
+    def _stream_png(self, plan, target, options):
+        """Tekent het vel strook voor strook en schrijft elke strook direct weg"""
+        mode, palette = stream_mode(plan)
+        with _output(target) as file, PngWriter(
+                file, *plan.size, mode,
+                palette=palette.image.getpalette() if palette is not None else None,
+                dpi=options.get("dpi"), compress_level=options["compress_level"]) as writer:
+            for _, strip in self._strips(plan, strip_rows(plan)):
+                with stage("encode"):
+                    writer.write(stream_image(strip, mode, palette))
+
+    def _compose(self, plan):
+        """Het hele vel in een keer"""
+        return next(self._strips(plan, plan.size[1]))[1]
+
+    def _strips(self, plan, rows):
+        """Tekent het vel in stroken van rows hoog; levert (boven, strook) op
+
+        Elke strook krijgt alleen de operaties die hem raken; paste knipt
+        de rest af, dus de pixels zijn gelijk aan die van een heel vel.
+        """
+        width, height = plan.size
+        strips = []
+        for top in range(0, height, rows):
+            bottom = min(height, top + rows)
+            strips.append((top, bottom, [op for op in plan.ops
+                                         if op.box[1] < bottom and op.box[3] > top]))
+        render_stats.count("strips", len(strips))
+        self._begin(sum(len(ops) for _, _, ops in strips))
+        for top, bottom, ops in strips:
+            yield top, self._paint(plan, top, bottom, ops, self._step)
+
+    def _paint(self, plan, top=0, bottom=None, ops=None, step=None):
+        """Voert ops (standaard alle) uit op een strook van rij top tot bottom"""
+        bottom = plan.size[1] if bottom is None else bottom
+        ops = plan.ops if ops is None else ops
+        render_stats.count("pastes", len(ops))
+        with stage("paint"):
+            strip = Image.new(plan.mode, (plan.size[0], bottom - top), "white")
+            for fill, (left, upper, right, lower), mask in ops:
+                strip.paste(fill, (left, upper - top, right, lower - top), mask)
+                if step is not None:
+                    step()
+        return strip
+
+    def _begin(self, steps):
+        self._done = 0
+        self._total = steps + self._extra_steps
+        self._step(0)
+
+    def _check(self):
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise RenderCancelled("Render afgebroken")
+
+    def _step(self, amount=1):
+        self._check()
+        self._done += amount
+        if self.progress is not None:
+            self.progress(self._done, self._total)
+
+    def save_options(self, params):
+        if isinstance(params, LabelPage):
+            params = params.params
+        compression = getattr(params, "png_compression", "default")
+        if compression not in PNG_COMPRESSION:
+            raise ValueError(f"Onbekende PNG compressie: {compression}")
+        options = {"compress_level": PNG_COMPRESSION[compression]}
+        if isinstance(params, (ShapeSheetParams, NestedPage)):
+            options.update(quality=95, dpi=(params.dpi, params.dpi))
+        return options
+
+    @_measured
+    def save_roll(self, params, target, cells=None):
+        """Schrijft een rol als een lange PNG; elke groep rijen gaat direct naar target
+
+        cells geeft optioneel per label (tekst, barcode), in volgorde (barcode
+        None: die van params.label); anders krijgt elk label de inhoud van
+        params.label. Het geheugen hangt niet af van params.count.
+        """
+        label = params.label
+        if params.count < 1:
+            raise ValueError("Een rol heeft minstens een label nodig")
+        with stage("layout"):
+            row = roll_layout(params)
+        rows = roll_rows(row, params.count)
+        total_rows = -(-params.count // row.cols)
+        compress_level = self.save_options(label)["compress_level"]
+        mode, palette = stream_mode(SheetPlan(None, canvas_mode(label.image_mode),
+                                              label.image_mode, ("black",), []))
+        layers = self._roll_layers(params, row, cells is not None)
+        if cells is not None:
+            cells = iter(cells)
+
+        self._begin(total_rows)
+        with _output(target) as file, PngWriter(
+                file, row.page_width, total_rows * row.page_height, mode,
+                palette=palette.image.getpalette() if palette is not None else None,
+                dpi=(label.dpi, label.dpi), compress_level=compress_level) as writer:
+            while True:
+                batch = list(itertools.islice(rows, ROLL_BATCH_ROWS))
+                if not batch:
+                    break
+                plan = self.plan_roll_rows(params, batch, layers, cells)
+                strip = self._paint(plan)
+                with stage("encode"):
+                    writer.write(stream_image(strip, mode, palette))
+                self._step(len(batch))
+
+    def plan_roll(self, params, rows=None):
+        """Plant het begin van een rol, voor render en preview
+
+        Standaard zoveel rijen als in een stuk van ongeveer een A4 verhouding
+        passen, hoogstens de hele rol.
+        """
+        with stage("layout"):
+            row = roll_layout(params)
+        total_rows = -(-params.count // row.cols)
+        if rows is None:
+            rows = math.ceil(row.page_width * 1.414 / row.page_height)
+        batch = list(itertools.islice(roll_rows(row, params.count), min(rows, total_rows)))
+        return self.plan_roll_rows(params, batch, self._roll_layers(params, row))
+
+    def _roll_layers(self, params, row, merge=False):
+        label = params.label
+        if merge:
+            return self._label_layers(row, label, "", "")
+        return self._label_layers(row, label, label.text, label.barcode)
+
+    def plan_roll_rows(self, params, rows, layers, cells=None):
+        """Plant opeenvolgende rijen van een rol als een strook
+
+        rows komen uit layout.roll_rows, layers van _label_layers; cells levert
+        bij een data merge per label (tekst, barcode).
+        """
+        label = params.label
+        width, pitch = rows[0].page_width, rows[0].page_height
+        plan = SheetPlan((width, pitch * len(rows)), canvas_mode(label.image_mode),
+                         label.image_mode, ("black",), [])
+        for index, row in enumerate(rows):
+            row = row._replace(v_start=row.v_start + index * pitch)
+            self._stamp_grid(plan, row, layers, "black")
+            if cells is None:
+                continue
+            filled = list(itertools.islice(cells, row.cols))
+            if filled:
+                texts, barcodes = zip(*filled)
+                if all(barcode is None for barcode in barcodes):
+                    barcodes = None
+                self._draw_cells(plan, LayoutPlan((row,)), label, texts, barcodes)
+        self._check()
+        return plan
+
+    def plan_labels(self, params, texts=None, barcodes=None):
+        """Plant een labelvel; texts en barcodes geven optioneel per cel een eigen inhoud"""
+        with stage("layout"):
+            grid = label_plan(params)
+        bands, page = grid.bands, grid.page
+
+        # Tekst en randen zijn zwart, dus grijswaarden volstaan
+        plan = SheetPlan((page.page_width, page.page_height), canvas_mode(params.image_mode),
+                         params.image_mode, ("black",), [])
+
+        self._draw_title(plan)
+
+        # Labels: een label eenmaal (per richting) renderen en op elke positie plakken
+        if texts is None:
+            layers = [self._label_layers(band, params, params.text, params.barcode)
+                      for band in bands]
+            self._check()
+            for band, band_layers in zip(bands, layers):
+                self._stamp_grid(plan, band, band_layers, "black")
+        else:
+            # Data merge: randen stempelen, de inhoud verschilt per cel
+            for band in bands:
+                self._stamp_grid(plan, band, self._label_layers(band, params, "", ""), "black")
+            self._draw_cells(plan, grid, params, texts, barcodes)
+            self._check()
+
+        self._draw_count(plan, page, grid.count if texts is None else len(texts))
+
+        # Afmetingen watermerk
+        dimensions_text = (f"Label afmetingen: {params.label_width_cm:.1f} x "
+                           f"{params.label_height_cm:.1f} cm")
+        self._draw_text_layer(plan, (page.page_width/2, page.page_height-40),
+                              dimensions_text, 20, "gray", anchor="mb")
+        return plan
+
+    def plan_shapes(self, params):
+        if params.shape_type not in SHAPE_TYPES:
+            raise ValueError(f"Onbekend vorm type: {params.shape_type}")
+        if params.quality not in QUALITY_SCALES:
+            raise ValueError(f"Onbekende kwaliteit: {params.quality}")
+
+        with stage("layout"):
+            grid = shape_plan(params)
+        bands, page = grid.bands, grid.page
+
+        # Controleer of de layout past op het vel
+        for layout in bands:
+            if layout.total_width > layout.page_width:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te breed voor het "
+                                  f"{params.page_size} vel!")
+            if layout.total_height > layout.page_height:
+                raise LayoutError(f"Waarschuwing: De vormen zijn te hoog voor het "
+                                  f"{params.page_size} vel!")
+
+        plan = SheetPlan((page.page_width, page.page_height),
+                         canvas_mode(params.image_mode, (params.color,)), params.image_mode,
+                         (params.color,), [])
+
+        # Grid lijnen voor referentie, als rechthoeken van een pixel breed
+        grid_color = ink((240, 240, 240), plan.mode)
+        for layout in bands:
+            h_start, v_start = layout.h_start, layout.v_start
+            for x in range(h_start, h_start + layout.total_width + 1,
+                           layout.cell_width + layout.margin):
+                plan.ops.append(Paste(grid_color,
+                                      (x, v_start, x + 1, v_start + layout.total_height + 1)))
+            for y in range(v_start, v_start + layout.total_height + 1,
+                           layout.cell_height + layout.margin):
+                plan.ops.append(Paste(grid_color,
+                                      (h_start, y, h_start + layout.total_width + 1, y + 1)))
+
+        # Vormen op elke positie: een vorm eenmaal (per richting) renderen en plakken
+        layers = [self._shape_layers(layout, params) for layout in bands]
+        self._check()
+        for layout, band_layers in zip(bands, layers):
+            self._stamp_grid(plan, layout, band_layers, params.color)
+
+        self._draw_title(plan)
+        self._draw_count(plan, page, grid.count)
+
+        # Voeg een subtiel watermerk toe
+        dimensions_text = (f"Vorm afmetingen: {params.shape_width_cm:.1f} x "
+                           f"{params.shape_height_cm:.1f} cm")
+        watermark_color = (150, 150, 150)
+        self._draw_text_layer(plan, (page.page_width/2, page.page_height-35),
+                              dimensions_text, 50, watermark_color, anchor="mb")
+        return plan
+
+    def plan_nested(self, page):
+        """Plant een vel met een mix van vormen op de plekken uit page.placements"""
+        for shape in page.shapes:
+            if shape.shape_type not in SHAPE_TYPES:
+                raise ValueError(f"Onbekend vorm type: {shape.shape_type}")
+            if shape.quality not in QUALITY_SCALES:
+                raise ValueError(f"Onbekende kwaliteit: {shape.quality}")
+        with stage("layout"):
+            layouts = placement_layouts(page)
+        sheet = nested_sheet(page)
+        colors = tuple(shape.color for shape in page.shapes)
+        plan = SheetPlan((sheet.page_width, sheet.page_height),
+                         canvas_mode(page.image_mode, colors), page.image_mode, colors, [])
+
+        # Elke vorm eenmaal per richting renderen en op al zijn plekken plakken
+        layers = {}
+        for placement, layout in zip(page.placements, layouts):
+            shape = page.shapes[placement.key]
+            key = (placement.key, placement.rotated)
+            if key not in layers:
+                layers[key] = self._shape_layers(layout, shape)
+                self._check()
+            self._stamp_grid(plan, layout, layers[key], shape.color)
+
+        self._draw_title(plan)
+        self._draw_count(plan, sheet, len(layouts))
+        self._draw_text_layer(plan, (sheet.page_width/2, sheet.page_height-35),
+                              nested_watermark(page), 50, (150, 150, 150), anchor="mb")
+        return plan
+
+    @timed("cells")
+    def _label_layers(self, layout, params, text, barcode):
+        """Rendert een label eenmaal als maskers: de rand (1-bit), tekst en barcode"""
+        upright = upright_layout(layout)
+        width, height = upright.cell_width, upright.cell_height
+        frame = Image.new("1", (width + 1, height + 1), 0)
+        ImageDraw.Draw(frame).rectangle([0, 0, width, height], outline=255)
+        layers = [(frame, (0, 0))]
+
+        # Label tekst en barcode toevoegen (indien ingevuld), eenmaal gerenderd
+        text_box, barcode_box = label_regions(upright, bool(text), bool(barcode))
+        if text:
+            layers.append(self._label_text(params, text_box, text))
+        if barcode:
+            layers.append(self._label_barcode(params, barcode_box, barcode))
+        return rotate_layers(layers, width) if layout.rotated else layers
+
+    @timed("text")
+    def _label_text(self, params, box, text):
+        """Rendert tekst als masker, gecentreerd in een vak; geeft (masker, offset)"""
+        size, text = label_text_style(box, params, text)
+        font = get_font(size)
+        # Gemeten in dezelfde modus als het masker, anders valt de rand eraf
+        text_bbox = textfit.text_bbox(text, registry.family, size)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_height = text_bbox[3] - text_bbox[1]
+        # Centreer de tekst in het vak
+        box_x, box_y, box_width, box_height = box
+        text_x = box_x + (box_width - text_width) // 2
+        text_y = box_y + (box_height - text_height) // 2
+        mask = Image.new("L", (text_width, text_height), 0)
+        origin = (-text_bbox[0], -text_bbox[1])
+        if "\n" in text:
+            ImageDraw.Draw(mask).multiline_text(origin, text, font=font, fill=255,
+                                                spacing=textfit.LINE_SPACING, align="center")
+        else:
+            ImageDraw.Draw(mask).text(origin, text, font=font, fill=255)
+        return mask, (text_x + text_bbox[0], text_y + text_bbox[1])
+
+    def _label_barcode(self, params, box, data):
+        """Barcode als 1-bit masker, gecentreerd in een vak; geeft (masker, offset)"""
+        padding = cm_to_px(LABEL_PADDING_CM, params.dpi)
+        box_x, box_y, box_width, box_height = box
+        mask = barcode_mask(params.barcode_type, data,
+                            box_width - 2 * padding, box_height - 2 * padding)
+        return mask, (box_x + (box_width - mask.width) // 2, box_y + padding)
+
+    @timed("cells")
+    def _draw_cells(self, plan, grid, params, texts, barcodes=None):
+        """Tekent per cel van grid (LayoutPlan) een eigen tekst en barcode, rij voor rij"""
+        count = grid.count
+        texts = texts[:count]
+        if barcodes is None:
+            barcodes = (params.barcode,) * len(texts)
+        barcodes = barcodes[:count]
+        text_box, barcode_box = label_regions(upright_layout(grid.page), any(texts),
+                                              any(barcodes))
+        cells = grid.cells()
+        for index in range(max(len(texts), len(barcodes))):
+            text = texts[index] if index < len(texts) else ""
+            barcode = barcodes[index] if index < len(barcodes) else ""
+            layout, x, y = next(cells)
+            upright = upright_layout(layout)
+            layers = []
+            if text:
+                layers.append(self._label_text(params, text_box, text))
+            if barcode:
+                layers.append(self._label_barcode(params, barcode_box, barcode))
+            if layout.rotated:
+                layers = rotate_layers(layers, upright.cell_width)
+            for mask, (offset_x, offset_y) in layers:
+                left, top = x + offset_x, y + offset_y
+                plan.ops.append(Paste(ink("black", plan.mode),
+                                      (left, top, left + mask.width, top + mask.height), mask))
+
+    @timed("cells")
+    def _shape_layers(self, layout, params):
+        """Rendert een vorm eenmaal als masker (1-bit, of grijswaarden bij anti-aliasing)"""
+        scale = QUALITY_SCALES[params.quality]
+        upright = upright_layout(layout)
+        # Ruimte voor lijndikte die buiten de cel valt
+        pad = params.line_thickness // 2 + 1
+        width = upright.cell_width + 2 * pad + 1
+        height = upright.cell_height + 2 * pad + 1
+        tile = Image.new("1", (width * scale, height * scale), 0)
+        self._draw_shape(ImageDraw.Draw(tile), params.shape_type, pad, pad,
+                         upright.cell_width, upright.cell_height,
+                         params.line_thickness, scale)
+        if scale > 1:
+            # Middel de supersamples tot dekkingsgraad per pixel
+            tile = tile.convert("L").reduce(scale)
+        layers = [(tile, (-pad, -pad))]
+        return rotate_layers(layers, upright.cell_width) if layout.rotated else layers
+
+    @timed("cells")
+    def _stamp_grid(self, plan, layout, layers, ink_color):
+        """Plakt eenmaal gerenderde maskers in de kleur ink_color op elke cel van de layout
+
+        Alle lagen hebben dezelfde inktkleur, dus de volgorde van plakken maakt
+        voor het resultaat niet uit.
+        """
+        if layout.cols <= 0 or layout.rows <= 0:
+            return
+        render_stats.count("cells", layout.cols * layout.rows)
+        pitch_x = layout.cell_width + layout.margin
+        ink_color = ink(ink_color, plan.mode)
+        rows = []
+        for tile, offset in layers:
+            # Bouw eerst een volledige rij als masker, daarna een plak per rij
+            row = Image.new(tile.mode, ((layout.cols - 1) * pitch_x + tile.width, tile.height), 0)
+            overlaps = tile.width > pitch_x
+            for col in range(layout.cols):
+                x = col * pitch_x
+                if overlaps:
+                    # Overlappende tegels samenvoegen alsof ze na elkaar getekend zijn
+                    row.paste(255, (x, 0, x + tile.width, tile.height), tile)
+                else:
+                    row.paste(tile, (x, 0))
+            rows.append((row, offset))
+
+        for r in range(layout.rows):
+            for row, (offset_x, offset_y) in rows:
+                x, y = layout.cell_origin(r, 0)
+                x += offset_x
+                y += offset_y
+                plan.ops.append(Paste(ink_color, (x, y, x + row.width, y + row.height), row))
+
+    def _draw_shape(self, draw, shape_type, x, y, width, height, thickness, scale=1, fill=255):
+        """Tekent de vorm in een keer met een lijn van thickness pixels breed
+
+        De lijn ligt gecentreerd op de rand van de cel, net als een QPen in de
+        editor. Bij scale > 1 wordt in supersample pixels getekend.
+        """
+        s = scale
+        inner = thickness // 2
+        # Buitenrand van de lijn; rectangle en ellipse tekenen de breedte naar binnen
+        box = [(x - inner) * s, (y - inner) * s,
+               (x + width + inner + 1) * s - 1, (y + height + inner + 1) * s - 1]
+        if shape_type == "Rechthoek":
+            draw.rectangle(box, outline=fill, width=thickness * s)
+        elif shape_type == "Cirkel":
+            draw.ellipse(box, outline=fill, width=thickness * s)
+        elif shape_type == "Driehoek":
+            # Hoekpunten in het midden van de pixels
+            points = [
+                (int(x + width/2), y),      # Top midden
+                (x, y + height),            # Links onder
+                (x + width, y + height)     # Rechts onder
+            ]
+            if thickness == 1 and s == 1:
+                draw.polygon(points, outline=fill)
+                return
+            center = (s - 1) / 2
+            points = [(px * s + center, py * s + center) for px, py in points]
+            stroke_polygon(draw, points, thickness * s, fill)
+
+    @timed("title")
+    def _draw_title(self, plan):
+        """'Machine Coating' tekst schuin bovenin (eenmaal gerasterd, daarna uit cache)"""
+        mask, full_width, (left, top) = title_layer(TITLE_TEXT, registry.family,
+                                                    TITLE_FONT_SIZE, TITLE_ANGLE)
+        # Plak de tekst hoger op de pagina
+        x = plan.size[0]//2 - full_width//2 + left
+        y = 30 + top
+        plan.ops.append(Paste(ink("black", plan.mode),
+                              (x, y, x + mask.width, y + mask.height), mask))
+
+    @timed("text")
+    def _draw_count(self, plan, layout, count=None):
+        """Aantal cellen (of gevulde labels) rechtsonder met schaduw"""
+        count_text = f"{layout.count if count is None else count}"
+        count_bbox = get_font(COUNT_FONT_SIZE).getbbox(count_text)
+        count_width = count_bbox[2] - count_bbox[0]
+        x = layout.page_width - count_width - 40
+        y = layout.page_height - 160
+        self._draw_text_layer(plan, (x, y), count_text, COUNT_FONT_SIZE, "black",
+                              passes=COUNT_PASSES)
+
+    @timed("text")
+    def _draw_text_layer(self, plan, xy, text, size, fill, anchor=None, passes=((0, 0),)):
+        """Plakt een (gecachte) tekstlaag op positie xy zoals draw.text dat zou doen"""
+        x, y = math.floor(xy[0]), math.floor(xy[1])
+        mask, (left, top) = text_layer(text, registry.family, size, anchor, passes,
+                                       (xy[0] - x, xy[1] - y))
+        x += left
+        y += top
+        plan.ops.append(Paste(ink(fill, plan.mode), (x, y, x + mask.width, y + mask.height), mask))
+
+
+@functools.lru_cache(maxsize=8)
+def title_layer(text, family, size, angle):
+    """Rendert de gedraaide titel met schaduw eenmaal als alpha masker
+
+    Geeft (masker, breedte van de gedraaide laag, (links, boven)) terug; het
+    masker is bijgesneden tot de inkt, de offset is relatief aan de hele laag.
+
+    family hoort bij de cache sleutel zodat een ander lettertype een nieuwe
+    laag oplevert; het lettertype zelf komt uit het register.
+    """
+    font = get_font(size)
+    title_bbox = font.getbbox(text)
+    title_width = title_bbox[2] - title_bbox[0]
+    title_height = title_bbox[3] - title_bbox[1]
+
+    # Maak een nieuwe afbeelding voor de gedraaide tekst met extra ruimte
+    txt = Image.new('RGBA', (title_width + 300, title_height + 300), (255, 255, 255, 0))
+    d = ImageDraw.Draw(txt)
+    # Voeg meerdere schaduwlagen toe voor meer diepte, hoofdtekst als laatste
+    for offset in TITLE_PASSES:
+        alpha = 255 if offset == (0, 0) else 80
+        d.text((150 + offset[0], 150 + offset[1]), text, font=font, fill=(0, 0, 0, alpha))
+    # Roteer de tekst; alleen het alpha kanaal is nodig (de inkt is zwart)
+    alpha = txt.rotate(angle, expand=1, fillcolor=(255, 255, 255, 0)).getchannel("A")
+    bbox = alpha.getbbox() or (0, 0, 1, 1)
+    return alpha.crop(bbox), alpha.width, bbox[:2]
+
+
+@functools.lru_cache(maxsize=64)
+def text_layer(text, family, size, anchor, passes, fraction):
+    """Rendert tekst (met schaduw passes) eenmaal als grijswaarden masker
+
+    Geeft (masker, (links, boven)) terug; de offset is relatief aan het
+    tekstpunt, fraction is het deel van het tekstpunt achter de komma.
+    """
+    font = get_font(size)
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    bbox = draw.textbbox(fraction, text, font=font, anchor=anchor)
+    left, top = math.floor(bbox[0]), math.floor(bbox[1])
+    right = math.ceil(bbox[2]) + max(dx for dx, _ in passes)
+    bottom = math.ceil(bbox[3]) + max(dy for _, dy in passes)
+
+    mask = Image.new("L", (right - left, bottom - top), 0)
+    draw = ImageDraw.Draw(mask)
+    for dx, dy in passes:
+        draw.text((fraction[0] - left + dx, fraction[1] - top + dy), text,
+                  font=font, fill=255, anchor=anchor)
+    return mask, (left, top)
+
+
+def stroke_polygon(draw, points, width, fill):
+    """Tekent de rand van een gesloten polygoon met een gecentreerde lijn
+
+    De hoeken worden afgeschuind (bevel join, de standaard van QPen). De lijn
+    is het gebied tussen de naar buiten verschoven rand en de naar binnen
+    verschoven polygoon, getekend als twee vlakvullingen.
+    """
+    half = width / 2
+    count = len(points)
+    area = sum(points[i][0] * points[(i + 1) % count][1] - points[(i + 1) % count][0] * points[i][1]
+               for i in range(count))
+    sign = 1 if area > 0 else -1
+
+    # Naar buiten gerichte eenheidsnormaal per zijde (van punt i naar i + 1)
+    normals = []
+    for i in range(count):
+        (x0, y0), (x1, y1) = points[i], points[(i + 1) % count]
+        length = math.hypot(x1 - x0, y1 - y0) or 1
+        normals.append((sign * (y1 - y0) / length, -sign * (x1 - x0) / length))
+
+    outer = []
+    inner = []
+    for i in range(count):
+        px, py = points[i]
+        (ax, ay), (bx, by) = normals[i - 1], normals[i]
+        outer.append((px + ax * half, py + ay * half))
+        outer.append((px + bx * half, py + by * half))
+        # Binnenhoek: snijpunt van de twee naar binnen verschoven zijden
+        cos = ax * bx + ay * by
+        factor = half / (1 + cos) if cos > -0.999 else half
+        inner.append((px - (ax + bx) * factor, py - (ay + by) * factor))
+
+    draw.polygon(outer, fill=fill)
+    inner_area = sum(inner[i][0] * inner[(i + 1) % count][1] - inner[(i + 1) % count][0] * inner[i][1]
+                     for i in range(count))
+    # Bij een te dikke lijn klapt de binnenrand om: dan is de vorm volledig gevuld
+    if inner_area * area > 0:
+        draw.polygon(inner, fill=0)
@@ -0,0 +1,5 @@
+"""De modules staan plat in de repository; tests importeren ze vanaf de root"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
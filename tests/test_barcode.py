@@ -0,0 +1,62 @@
+import pytest
+
+from barcode import (BarcodeError, CODE128_RUNS, START_B, START_C, STOP, barcode_mask,
+                     barcode_runs, code128_values, ean13_check_digit)
+
+
+def test_code128_set_b_checksum():
+    # Start B (104) + 1 * "A" (33) + 2 * "B" (34) = 205, modulo 103 is 102
+    assert code128_values("AB") == [START_B, 33, 34, 102, STOP]
+
+
+def test_code128_switches_to_set_c_for_digits():
+    assert code128_values("123456")[:4] == [START_C, 12, 34, 56]
+    # Oneven aantal: het laatste cijfer gaat in code set B
+    values = code128_values("12345")
+    assert values[:3] == [START_C, 12, 34]
+    assert values[3] == 100 and values[4] == ord("5") - 32
+
+
+def test_code128_runs_are_eleven_modules_per_value():
+    values = code128_values("Label 42")
+    runs = barcode_runs("code128", "Label 42")
+    assert sum(runs) == 11 * (len(values) - 1) + 13
+    assert all(sum(pattern) == 11 for pattern in CODE128_RUNS[:STOP])
+
+
+@pytest.mark.parametrize("data", ["", "café"])
+def test_code128_invalid(data):
+    with pytest.raises(BarcodeError):
+        code128_values(data)
+
+
+def test_ean13():
+    assert ean13_check_digit("400638133393") == "1"
+    runs = barcode_runs("ean13", "400638133393")
+    assert len(runs) == 59 and sum(runs) == 95
+    assert barcode_runs("ean13", "4006381333931") == runs
+
+
+@pytest.mark.parametrize("data", ["4006381333932", "12345", "40063813339a"])
+def test_ean13_invalid(data):
+    with pytest.raises(BarcodeError):
+        barcode_runs("ean13", data)
+
+
+def test_unknown_symbology():
+    with pytest.raises(BarcodeError):
+        barcode_runs("qr", "x")
+
+
+def test_mask_whole_pixels_per_module():
+    runs = barcode_runs("ean13", "400638133393")
+    mask = barcode_mask("ean13", "400638133393", 400, 50)
+    assert mask.mode == "1" and mask.size == (95 * 3, 50)
+    row = [mask.getpixel((x, 0)) for x in range(mask.width)]
+    assert row[:3] == [255] * 3 and row[3:6] == [0] * 3
+    assert sum(1 for a, b in zip(row, row[1:]) if a != b) == len(runs) - 1
+
+
+def test_mask_too_small():
+    with pytest.raises(BarcodeError):
+        barcode_mask("code128", "ABC", 20, 10)
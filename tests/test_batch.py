@@ -0,0 +1,87 @@
+import io
+import json
+
+import pytest
+
+from batch import JobError, MergeJob, NestJob, job_to_params, read_jobs, run_batch
+from renderer import LabelSheetParams, NestItem, RollParams, ShapeSheetParams
+
+
+def test_label_and_shape_jobs():
+    params, output = job_to_params({"output": "a.png", "text": "Lot 1"})
+    assert params == LabelSheetParams(text="Lot 1") and output == "a.png"
+
+    params, _ = job_to_params({"mode": "shape", "output": "b.png", "color": [1, 2, 3]})
+    # JSON lijsten worden tuples, zodat de parameters hashable blijven
+    assert params == ShapeSheetParams(color=(1, 2, 3))
+    hash(params)
+
+
+def test_merge_roll_and_nest_jobs():
+    params, _ = job_to_params({"mode": "merge", "output": "x.pdf", "data": "lots.csv",
+                               "template": "Lot {lot}"})
+    assert params == MergeJob(LabelSheetParams(), "lots.csv", "Lot {lot}")
+
+    params, _ = job_to_params({"mode": "roll", "output": "r.png", "roll_width_cm": 10,
+                               "count": 5, "text": "Rol"})
+    assert params == RollParams(LabelSheetParams(text="Rol"), roll_width_cm=10, count=5)
+
+    params, _ = job_to_params({"mode": "roll", "output": "r.png", "roll_width_cm": 10,
+                               "data": "lots.csv"})
+    assert isinstance(params, MergeJob) and isinstance(params.params, RollParams)
+
+    params, _ = job_to_params({"mode": "nest", "output": "n.pdf", "margin_cm": 0.3, "items": [
+        {"shape_type": "Cirkel", "quantity": 3}, {"shape_width_cm": 2}]})
+    assert params == NestJob((NestItem(ShapeSheetParams(shape_type="Cirkel"), 3),
+                              NestItem(ShapeSheetParams(shape_width_cm=2), 1)),
+                             margin_cm=0.3)
+
+
+@pytest.mark.parametrize("job, message", [
+    ([1, 2], "JSON object"),
+    ({"mode": "cirkel", "output": "a.png"}, "onbekende mode 'cirkel'"),
+    ({"text": "x"}, "geen 'output'"),
+    ({"output": "a.png", "kleur": "rood"}, "onbekende velden voor mode 'label': kleur"),
+    ({"mode": "merge", "output": "a.pdf"}, "geen 'data'"),
+    ({"mode": "nest", "output": "a.pdf"}, "geen 'items'"),
+    ({"mode": "nest", "output": "a.pdf", "items": [{}], "extra": 1}, "extra"),
+    ({"mode": "nest", "output": "a.pdf", "items": [{"quantity": -1}]}, "ongeldige quantity"),
+])
+def test_job_errors(job, message):
+    with pytest.raises(JobError, match=message):
+        job_to_params(job)
+
+
+def test_read_jobs_line_numbers(tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text('{"output": "a.png"}\n\n{kapot\n{"output": "b.png"}\n', encoding="utf-8")
+    jobs = list(read_jobs(path))
+    # Lege regels worden overgeslagen maar tellen mee in de regelnummers
+    assert [line_no for line_no, _ in jobs] == [1, 3, 4]
+    assert isinstance(jobs[1][1], json.JSONDecodeError)
+
+
+def test_run_batch_reports_errors_per_line(tmp_path):
+    lines = [
+        {"output": str(tmp_path / "out" / "a.png"), "dpi": 30, "text": "A"},
+        "{kapot",
+        {"mode": "shape", "output": str(tmp_path / "b.png"), "dpi": 30, "vorm": "x"},
+        {"mode": "shape", "output": str(tmp_path / "c.png"), "dpi": 30},
+    ]
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line)
+                              for line in lines) + "\n", encoding="utf-8")
+
+    stats_log = io.StringIO()
+    done, errors, cache = run_batch(path, workers=1, stats_log=stats_log)
+    assert done == 2
+    assert [line_no for line_no, _ in errors] == [2, 3]
+    assert errors[0][1].startswith("JobError: ongeldige JSON")
+    assert "onbekende velden" in errors[1][1]
+    assert cache == {"hits": 0, "misses": 0}
+    assert (tmp_path / "out" / "a.png").exists() and (tmp_path / "c.png").exists()
+
+    records = sorted((json.loads(line) for line in stats_log.getvalue().splitlines()),
+                     key=lambda record: record["line"])
+    assert [(record["line"], record["sheets"]) for record in records] == [
+        (1, 1), (2, 0), (3, 0), (4, 1)]
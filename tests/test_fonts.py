@@ -0,0 +1,43 @@
+import pytest
+
+from fonts import FontRegistry, registry
+
+FONT = registry.family
+needs_font = pytest.mark.skipif(FONT is None, reason="geen TrueType lettertype gevonden")
+
+
+@needs_font
+def test_first_available_candidate():
+    fonts = FontRegistry(("bestaat-niet.ttf", FONT))
+    assert fonts.family == FONT
+    assert "bestaat-niet.ttf" in fonts.fallback_message
+    assert FontRegistry((FONT,)).fallback_message is None
+
+
+def test_default_font_without_candidates():
+    fonts = FontRegistry(("bestaat-niet.ttf",))
+    assert fonts.family is None
+    assert "PIL standaard font" in fonts.fallback_message
+    assert fonts.get(20) is fonts.get(20)
+
+
+@needs_font
+def test_lru_cache():
+    fonts = FontRegistry((FONT,), max_entries=2)
+    ten = fonts.get(10)
+    fonts.get(11)
+    assert fonts.get(10) is ten
+    fonts.get(12)  # 11 is het langst niet gebruikt en valt eruit
+    assert (fonts.hits, fonts.misses) == (1, 3)
+    assert fonts.get(10) is ten
+    fonts.get(11)
+    assert (fonts.hits, fonts.misses) == (2, 4)
+    assert ten.size == 10
+
+
+@needs_font
+def test_clear_resolves_again():
+    fonts = FontRegistry((FONT,))
+    font = fonts.get(10)
+    fonts.clear()
+    assert fonts.get(10) is not font and fonts.family == FONT
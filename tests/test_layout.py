@@ -0,0 +1,75 @@
+from layout import (Layout, LayoutPlan, cm_to_px, fit_count, grid_layout, layout_plan,
+                    page_layout_plan, roll_row, roll_rows, sheet_pixels, solve_layout,
+                    total_count)
+
+
+def _rects(plan):
+    return [(x, y, band.cell_width, band.cell_height) for band, x, y in plan.cells()]
+
+
+def test_cm_to_px():
+    assert cm_to_px(2.54) == 300
+    assert cm_to_px(2.54, 600) == 600
+    assert sheet_pixels(300) == (2480, 3507)
+
+
+def test_fit_count():
+    assert fit_count(100, 20, 5) == 4
+    assert fit_count(10, 20, 5) == 0
+
+
+def test_grid_layout_centered():
+    layout = grid_layout(1000, 800, 200, 100, 10, 50)
+    assert (layout.cols, layout.rows) == (4, 6)
+    assert layout.h_start * 2 + layout.total_width in (1000, 999)
+    assert layout.v_start * 2 + layout.total_height in (800, 799)
+
+
+def test_plan_cells_match_bands():
+    plan = layout_plan(1000, 800, 200, 100, 10, 50)
+    assert plan.count == len(plan.origins) == len(plan.band_indices) == 24
+    band = plan.page
+    assert plan.origins[:2] == (band.cell_origin(0, 0), band.cell_origin(0, 1))
+    assert list(plan.cells())[-1] == (band, *band.cell_origin(band.rows - 1, band.cols - 1))
+
+
+def test_plan_is_cached():
+    assert layout_plan(1000, 800, 200, 100, 10, 50) is layout_plan(1000, 800, 200, 100, 10, 50)
+    assert page_layout_plan(300, 5, 3, 0.2, 1) is page_layout_plan(300, 5, 3, 0.2, 1)
+
+
+def test_rotation_cells_stay_on_page_without_overlap():
+    plan = layout_plan(2480, 3507, 800, 600, 20, 100, allow_rotation=True)
+    straight = layout_plan(2480, 3507, 800, 600, 20, 100)
+    assert plan.count > straight.count
+    rects = _rects(plan)
+    for x, y, w, h in rects:
+        assert x >= 100 and y >= 100 and x + w <= 2380 and y + h <= 3407
+    for i, a in enumerate(rects):
+        for b in rects[i + 1:]:
+            assert (a[0] + a[2] <= b[0] or b[0] + b[2] <= a[0]
+                    or a[1] + a[3] <= b[1] or b[1] + b[3] <= a[1])
+
+
+def test_solve_layout_finds_at_least_grid():
+    bands = solve_layout(2480, 3507, 590, 354, 23, 118)
+    assert total_count(bands) >= grid_layout(2480, 3507, 590, 354, 23, 118).count
+
+
+def test_min_one_when_nothing_fits():
+    assert layout_plan(100, 100, 500, 500, 0, 0).count == 0
+    assert layout_plan(100, 100, 500, 500, 0, 0, allow_rotation=True, min_one=True).count == 1
+
+
+def test_roll_rows():
+    row = roll_row(1000, 300, 200, 20, 10)
+    assert row.cols == 3 and row.page_height == 220
+    rows = list(roll_rows(row, 7))
+    assert [r.cols for r in rows] == [3, 3, 1]
+    assert list(roll_rows(row._replace(cols=0), 5)) == []
+
+
+def test_layout_plan_is_hashable():
+    band = Layout(100, 100, 10, 10, 0, 1, 1, 0, 0)
+    assert LayoutPlan((band,)) == LayoutPlan((band,))
+    assert len({LayoutPlan((band,)), LayoutPlan((band,))}) == 1
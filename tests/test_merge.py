@@ -0,0 +1,70 @@
+import pytest
+
+from merge import MergeError, merge_pages, page_path, read_records, record_text, write_merge
+from renderer import LabelSheetParams, label_plan
+
+
+def test_read_csv_with_bom_and_semicolons(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("﻿naam;lot\nZeep;12\nOlie;7\n", encoding="utf-8")
+    assert list(read_records(str(path))) == [{"naam": "Zeep", "lot": "12"},
+                                             {"naam": "Olie", "lot": "7"}]
+
+
+def test_read_jsonl(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"naam": "Zeep"}\n\n{"naam": "Olie"}\n', encoding="utf-8")
+    assert [record["naam"] for record in read_records(str(path))] == ["Zeep", "Olie"]
+
+
+def test_read_jsonl_error_names_line(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"naam": "Zeep"}\n{kapot\n', encoding="utf-8")
+    with pytest.raises(MergeError, match=":2:"):
+        list(read_records(str(path)))
+
+
+def test_record_text():
+    record = {"naam": "Zeep", "lot": 12}
+    assert record_text(record) == "Zeep"
+    assert record_text(record, "{naam} - lot {lot}") == "Zeep - lot 12"
+    assert record_text(None) == ""
+    with pytest.raises(MergeError):
+        record_text(record, "{prijs}")
+
+
+def test_merge_pages_fills_pages_in_order():
+    params = LabelSheetParams()
+    per_page = label_plan(params).count
+    records = ({"nr": str(i)} for i in range(per_page * 2 + 3))
+    pages = list(merge_pages(params, records))
+    assert [len(page.texts) for page in pages] == [per_page, per_page, 3]
+    assert pages[1].texts[0] == str(per_page)
+    assert pages[2].texts == tuple(str(per_page * 2 + i) for i in range(3))
+    assert all(page.params is params for page in pages)
+
+
+def test_merge_pages_barcodes():
+    params = LabelSheetParams()
+    records = [{"nr": "1", "ean": "400638133393"}, {"nr": "2", "ean": "400638133394"}]
+    page, = merge_pages(params, records, barcode_template="{ean}")
+    assert page.texts == ("1", "2")
+    assert page.barcodes == ("400638133393", "400638133394")
+    page, = merge_pages(params, records)
+    assert page.barcodes is None
+
+
+def test_page_path_and_output_pattern(tmp_path):
+    assert page_path("out/vel_{page:03d}.png", 7) == "out/vel_007.png"
+    data = tmp_path / "data.csv"
+    data.write_text("naam\nZeep\n", encoding="utf-8")
+    with pytest.raises(MergeError):
+        write_merge(LabelSheetParams(), str(data), str(tmp_path / "vel.png"))
+
+
+def test_write_merge_png_per_page(tmp_path):
+    params = LabelSheetParams()
+    data = tmp_path / "data.csv"
+    data.write_text("naam\n" + "Zeep\n" * (label_plan(params).count + 1), encoding="utf-8")
+    assert write_merge(params, str(data), str(tmp_path / "uit" / "vel_{page}.png")) == 2
+    assert sorted(p.name for p in (tmp_path / "uit").iterdir()) == ["vel_1.png", "vel_2.png"]
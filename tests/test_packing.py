@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from packing import GridIndex, MaxRectsSheet, PackingError, PackItem, pack_sheets
+
+
+def _overlap(a, b):
+    return not (a.x + a.width <= b.x or b.x + b.width <= a.x
+                or a.y + a.height <= b.y or b.y + b.height <= a.y)
+
+
+def _check(sheets, width, height, margin, outer):
+    for placements in sheets:
+        for i, a in enumerate(placements):
+            assert a.x >= outer and a.y >= outer
+            assert a.x + a.width <= width - outer and a.y + a.height <= height - outer
+            for b in placements[i + 1:]:
+                grown = a._replace(width=a.width + margin, height=a.height + margin)
+                assert not _overlap(grown, b._replace(width=b.width + margin,
+                                                      height=b.height + margin))
+
+
+def test_pack_all_pieces_without_overlap():
+    rng = random.Random(7)
+    items = [PackItem(i, rng.randint(20, 400), rng.randint(20, 400), rng.randint(1, 30))
+             for i in range(12)]
+    sheets = pack_sheets(items, 2480, 3507, margin=10, outer_margin=50)
+    _check(sheets, 2480, 3507, 10, 50)
+    placed = sorted(p.key for sheet in sheets for p in sheet)
+    assert placed == sorted(item.key for item in items for _ in range(item.quantity))
+
+
+def test_rotated_sizes_are_swapped():
+    sheets = pack_sheets([PackItem("a", 300, 100, 2)], 120, 700)
+    assert all(p.rotated and (p.width, p.height) == (100, 300) for p in sheets[0])
+
+
+def test_no_rotation():
+    with pytest.raises(PackingError) as error:
+        pack_sheets([PackItem("a", 300, 100)], 120, 700, allow_rotation=False)
+    assert error.value.key == "a"
+
+
+def test_invalid_size():
+    with pytest.raises(PackingError):
+        pack_sheets([PackItem("a", 0, 100)], 1000, 1000)
+
+
+def test_full_sheet_opens_new_sheet():
+    sheets = pack_sheets([PackItem("a", 500, 500, 5)], 1000, 1000)
+    assert [len(sheet) for sheet in sheets] == [4, 1]
+
+
+def test_sheet_find_and_place():
+    sheet = MaxRectsSheet(100, 100)
+    assert sheet.find(100, 100) == (0, 0, False)
+    sheet.place(0, 0, 60, 100)
+    assert sheet.find(50, 50) is None
+    x, y, rotated = sheet.find(40, 100)
+    assert (x, y, rotated) == (60, 0, False)
+    assert sheet.find(100, 40) == (60, 0, True)
+
+
+def test_grid_index_query():
+    index = GridIndex(10)
+    index.add((0, 0, 15, 15))
+    index.add((30, 30, 5, 5))
+    assert index.query(10, 10, 10, 10) == [(0, 0, 15, 15)]
+    assert index.query(20, 20, 5, 5) == []
+    index.remove((0, 0, 15, 15))
+    assert index.query(0, 0, 20, 20) == []
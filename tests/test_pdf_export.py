@@ -0,0 +1,59 @@
+import io
+import re
+import zlib
+
+import pytest
+
+from pdf_export import write_pdf
+from renderer import LabelSheetParams, ShapeSheetParams
+
+
+def _pdf(pages):
+    buffer = io.BytesIO()
+    assert write_pdf(buffer, iter(pages)) == len(pages)
+    return buffer.getvalue()
+
+
+def test_pdf_structure():
+    data = _pdf([ShapeSheetParams(), LabelSheetParams(text="Zeep"),
+                 ShapeSheetParams(shape_type="Cirkel")])
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    assert b"/Type /Pages /Kids [" in data and b"/Count 3 >>" in data
+
+    # Elke xref offset wijst naar het begin van zijn object
+    xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    entries = re.findall(rb"(\d{10}) 00000 n ", data[xref:])
+    for object_id, offset in enumerate(entries, 1):
+        assert data[int(offset):].startswith(f"{object_id} 0 obj".encode())
+
+    streams = re.findall(rb"stream\n(.*?)\nendstream", data, re.S)
+    assert streams and all(zlib.decompress(stream) for stream in streams)
+
+
+def test_a4_media_box():
+    boxes = re.findall(rb"/MediaBox \[0 0 ([\d.]+) ([\d.]+)\]", _pdf([ShapeSheetParams()]))
+    assert [(round(float(w)), round(float(h))) for w, h in boxes] == [(595, 842)]
+
+
+def test_page_sizes():
+    data = _pdf([ShapeSheetParams(), ShapeSheetParams(page_size="A3"),
+                 LabelSheetParams(page_size="SRA3")])
+    boxes = re.findall(rb"/MediaBox \[0 0 ([\d.]+) ([\d.]+)\]", data)
+    assert [round(float(w)) for w, _ in boxes] == [595, 842, 907]
+
+
+def _failing_pages():
+    yield ShapeSheetParams()
+    raise RuntimeError("afgebroken")
+
+
+def test_failed_export_leaves_no_pdf(tmp_path):
+    path = tmp_path / "vel.pdf"
+    with pytest.raises(RuntimeError):
+        write_pdf(str(path), _failing_pages())
+    assert not path.exists()
+
+    buffer = io.BytesIO()
+    with pytest.raises(RuntimeError):
+        write_pdf(buffer, _failing_pages())
+    assert b"%%EOF" not in buffer.getvalue()
@@ -0,0 +1,66 @@
+import io
+
+from PIL import Image, ImageDraw
+import pytest
+
+from png_stream import PngWriter, row_bytes, up_filtered
+
+
+def _sample(mode, size=(257, 130)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((10, 10, 200, 120), outline="#723744", width=3)
+    draw.text((20, 50), "Machine Coating", fill="black")
+    if mode == "P":
+        return image.quantize(16)
+    return image.convert(mode) if mode != "1" else image.convert("1", dither=Image.NONE)
+
+
+def _streamed(image, strip_height):
+    buffer = io.BytesIO()
+    palette = image.getpalette() if image.mode == "P" else None
+    with PngWriter(buffer, image.width, image.height, image.mode, palette, dpi=(300, 300)) as writer:
+        for top in range(0, image.height, strip_height):
+            writer.write(image.crop((0, top, image.width, min(image.height, top + strip_height))))
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+@pytest.mark.parametrize("mode", ["1", "L", "P", "RGB"])
+def test_strips_equal_whole_image(mode):
+    image = _sample(mode)
+    result = _streamed(image, 17)
+    assert result.mode == image.mode and result.size == image.size
+    assert result.tobytes() == image.tobytes()
+    assert round(result.info["dpi"][0]) == 300
+
+
+def test_row_bytes():
+    assert row_bytes("1", 9) == 2
+    assert row_bytes("L", 9) == 9
+    assert row_bytes("RGB", 9) == 27
+
+
+def test_up_filter():
+    strip = Image.frombytes("L", (2, 2), bytes([10, 20, 15, 5]))
+    previous = Image.frombytes("L", (2, 1), bytes([1, 30]))
+    assert up_filtered(strip, previous).tobytes() == bytes([9, 246, 5, 241])
+    assert up_filtered(strip).tobytes()[:2] == bytes([10, 20])
+
+
+def test_wrong_strips():
+    writer = PngWriter(io.BytesIO(), 10, 4, "L")
+    with pytest.raises(ValueError):
+        writer.write(Image.new("L", (11, 2)))
+    with pytest.raises(ValueError):
+        writer.write(Image.new("RGB", (10, 2)))
+    writer.write(Image.new("L", (10, 3)))
+    with pytest.raises(ValueError):
+        writer.write(Image.new("L", (10, 2)))
+    with pytest.raises(ValueError):
+        writer.close()
+
+
+def test_palette_required():
+    with pytest.raises(ValueError):
+        PngWriter(io.BytesIO(), 10, 10, "P")
@@ -0,0 +1,35 @@
+from merge import merge_pages
+from printer_lang import printer_language, write_commands
+from renderer import LabelSheetParams, ShapeSheetParams, label_plan
+
+
+def test_printer_language():
+    assert printer_language("uit/labels.ZPL") == "zpl"
+    assert printer_language("epl://printer:9100") == "epl"
+    assert printer_language("labels.png") is None
+
+
+def test_zpl_format_per_page(tmp_path):
+    params = LabelSheetParams()
+    per_page = label_plan(params).count
+    records = [{"nr": f"{i}_{i}"} for i in range(per_page + 1)]
+    path = tmp_path / "labels.zpl"
+    assert write_commands(str(path), merge_pages(params, records, "{nr}", "{nr}")) == 2
+    formats = path.read_text(encoding="utf-8").split("^XZ\n")
+    assert formats.pop() == ""
+    first, last = (fmt.splitlines() for fmt in formats)
+    assert first[0] == last[0] == "^XA^CI28^PW2480^LL3507^LH0,0"
+    # Per label een kader, een tekstveld en een barcode; _ wordt hex (^FH_)
+    assert sum("^GB" in line for line in first) == per_page
+    assert sum("^BC" in line for line in first) == per_page
+    assert sum("^BC" in line for line in last) == 1
+    assert any(line.endswith("^FD0_5F0^FS") for line in first)
+
+
+def test_epl_shapes(tmp_path):
+    path = tmp_path / "vormen.epl"
+    assert write_commands(str(path), [ShapeSheetParams(), ShapeSheetParams()]) == 2
+    lines = path.read_text(encoding="cp1252").splitlines()
+    assert lines.count("N") == 2 and lines.count("P1") == 2
+    assert "q2480" in lines and "Q3507,0" in lines
+    assert any(line.startswith("X") for line in lines)
@@ -0,0 +1,71 @@
+import os
+
+from render_cache import RenderCache, render_key
+from renderer import LabelSheetParams, ShapeSheetParams
+
+
+def _produce(path, data):
+    def produce():
+        with open(path, "wb") as f:
+            f.write(data)
+    return produce
+
+
+def test_key_depends_on_params_and_format():
+    key = render_key(LabelSheetParams(text="a"), ".png")
+    assert key == render_key(LabelSheetParams(text="a"), ".PNG")
+    assert key != render_key(LabelSheetParams(text="b"), ".png")
+    assert key != render_key(LabelSheetParams(text="a", dpi=600), ".png")
+    assert key != render_key(LabelSheetParams(text="a"), ".pdf")
+    # Zelfde velden, ander type
+    assert render_key(ShapeSheetParams(), ".png") != render_key(LabelSheetParams(), ".png")
+
+
+def test_save_hit_and_miss(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    target = tmp_path / "vel.png"
+    assert not cache.save(LabelSheetParams(), str(target), _produce(target, b"eerste"))
+    target.unlink()
+    assert cache.save(LabelSheetParams(), str(target), _produce(target, b"tweede"))
+    assert target.read_bytes() == b"eerste"
+    assert cache.stats() == {"hits": 1, "misses": 1, "files": 1, "bytes": 6}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=35)
+    source = tmp_path / "bron"
+    source.write_bytes(b"x" * 10)
+    keys = [f"{i:02d}" * 32 for i in range(5)]
+    for age, key in enumerate(keys[:3], 1):
+        cache.store(key, ".png", str(source))
+        os.utime(cache._path(key, ".png"), ns=(age * 10 ** 9, age * 10 ** 9))
+    # Een treffer maakt de oudste weer de nieuwste
+    assert cache.fetch(keys[0], ".png", str(tmp_path / "uit"))
+    for key in keys[3:]:
+        cache.store(key, ".png", str(source))
+    remaining = {key for key in keys if os.path.exists(cache._path(key, ".png"))}
+    assert remaining == {keys[0], keys[3], keys[4]}
+    assert cache.stats()["bytes"] == 30
+
+
+def test_store_walks_the_cache_only_when_needed(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=1000)
+    walks = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: walks.append(1) or entries())
+    source = tmp_path / "bron"
+    source.write_bytes(b"x" * 100)
+    for i in range(10):
+        cache.store(f"{i:02d}" * 32, ".png", str(source))
+    # Een keer tellen bij de eerste keer, daarna alleen boven de grens
+    assert len(walks) == 1
+    cache.store("aa" * 32, ".png", str(source))
+    assert len(walks) == 2 and cache.stats()["bytes"] == 1000
+
+
+def test_clear(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    target = tmp_path / "vel.pdf"
+    cache.save(ShapeSheetParams(), str(target), _produce(target, b"%PDF"))
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "files": 0, "bytes": 0}
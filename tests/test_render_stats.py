@@ -0,0 +1,104 @@
+import io
+import itertools
+
+import pytest
+
+import render_stats
+from render_stats import RenderStats, TimedFile, count, current, stage, timed
+from renderer import LabelSheetParams, ShapeSheetParams, SheetRenderer
+
+
+@pytest.mark.parametrize("suffix", [".pdf", ".zpl", ".epl"])
+@pytest.mark.parametrize("params", [LabelSheetParams(text="Zeep", barcode="123"),
+                                    ShapeSheetParams()], ids=["labels", "vormen"])
+def test_export_stages(params, suffix, tmp_path):
+    renderer = SheetRenderer()
+    renderer.save(params, str(tmp_path / f"vel{suffix}"))
+    stats = renderer.stats
+    assert {"layout", "cells", "encode"} <= set(stats.stages)
+    assert stats.counters["cells"] == 24
+    if isinstance(params, LabelSheetParams):
+        assert "text" in stats.stages
+    # Stappen tellen exclusief: samen niet meer dan de totale tijd
+    assert sum(stats.stages.values()) <= stats.seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """perf_counter die bij elke aanroep een seconde verder staat"""
+    ticks = itertools.count()
+    monkeypatch.setattr(render_stats.time, "perf_counter", lambda: float(next(ticks)))
+
+
+def test_nested_stages_are_exclusive(clock):
+    stats = RenderStats()
+    with stats.activate():
+        with stage("cells"):      # 1 .. 6
+            with stage("text"):   # 2 .. 3
+                pass
+            with stage("text"):   # 4 .. 5
+                pass
+    assert stats.stages == {"text": 2.0, "cells": 3.0}
+    assert stats.seconds == 7.0
+
+
+def test_without_active_stats_nothing_is_recorded():
+    assert current() is None
+    with stage("cells"):
+        count("cells", 3)
+
+    @timed("text")
+    def draw():
+        return "klaar"
+
+    assert draw() == "klaar" and current() is None
+
+
+def test_counters_and_timed():
+    stats = RenderStats()
+
+    @timed("text")
+    def draw():
+        count("cells", 2)
+
+    with stats.activate():
+        draw()
+        draw()
+    assert stats.counters == {"cells": 4}
+    assert set(stats.stages) == {"text"}
+
+
+def test_activate_restores_previous_and_counts_cache_delta():
+    info = {"hits": 5, "misses": 1}
+    outer = RenderStats()
+    inner = RenderStats({"fonts": lambda: (info["hits"], info["misses"])})
+    with outer.activate():
+        with inner.activate():
+            assert current() is inner
+            info["hits"] += 3
+            info["misses"] += 1
+        assert current() is outer
+    assert current() is None
+    assert inner.counters == {"fonts_hits": 3, "fonts_misses": 1}
+
+
+def test_summary_names_slowest_stages():
+    stats = RenderStats()
+    stats.seconds = 2.5
+    stats.stages = {"paint": 1.0, "text": 0.5, "layout": 0.1, "encode": 0.8}
+    stats.counters = {"cells": 24}
+    assert stats.summary() == ("2.50 s (tekenen 1.00 s, coderen 0.80 s, tekst 0.50 s), "
+                               "24 cellen")
+    assert stats.as_dict()["counters"] == {"cells": 24}
+
+
+def test_timed_file_counts_written_bytes():
+    buffer = io.BytesIO()
+    stats = RenderStats()
+    with stats.activate():
+        file = TimedFile(buffer)
+        file.write(b"abc")
+        file.write(b"de")
+        file.flush()
+        assert file.tell() == 5
+    assert stats.counters["bytes_written"] == 5 and "write" in stats.stages
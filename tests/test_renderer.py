@@ -0,0 +1,195 @@
+from dataclasses import replace
+
+from PIL import Image, ImageDraw
+import pytest
+
+from fonts import get_font, registry
+import renderer
+import textfit
+from renderer import LabelSheetParams, ShapeSheetParams, SheetRenderer
+
+
+@pytest.mark.parametrize("params", [
+    ShapeSheetParams(shape_type="Cirkel", line_thickness=4, image_mode="P"),
+    ShapeSheetParams(shape_type="Driehoek", image_mode="RGB"),
+    ShapeSheetParams(image_mode="1"),
+    LabelSheetParams(text="Zeep", barcode="12345678", image_mode="auto"),
+], ids=["P", "RGB", "1", "auto"])
+def test_streamed_page_equals_whole_page(params, tmp_path, monkeypatch):
+    whole = SheetRenderer().render(params)
+    # Elk vel te groot voor het geheugen: in stroken van ongeveer 1 MB
+    monkeypatch.setattr(renderer, "MAX_PAGE_BYTES", 1)
+    monkeypatch.setattr(renderer, "STRIP_BYTES", 1024 * 1024)
+    path = tmp_path / "vel.png"
+    SheetRenderer().save(params, str(path))
+    with Image.open(path) as streamed:
+        assert streamed.mode == whole.mode and streamed.size == whole.size
+        assert streamed.convert("RGB").tobytes() == whole.convert("RGB").tobytes()
+
+
+def test_palette_keeps_white_and_ink():
+    image = SheetRenderer().render(ShapeSheetParams(shape_type="Cirkel", image_mode="P"))
+    colors = {color for _, color in image.convert("RGB").getcolors(256)}
+    assert {(255, 255, 255), (0x72, 0x37, 0x44)} <= colors
+
+
+@pytest.mark.parametrize("image_mode, grey_mode, color_mode", [
+    ("auto", "L", "RGB"),
+    ("RGB", "RGB", "RGB"),
+    ("P", "P", "P"),
+    ("L", "L", "L"),
+    ("1", "1", "1"),
+])
+def test_image_modes_on_grey_and_color_sheets(image_mode, grey_mode, color_mode, tmp_path,
+                                              monkeypatch):
+    grey = LabelSheetParams(text="Zeep", image_mode=image_mode)
+    color = ShapeSheetParams(shape_type="Cirkel", image_mode=image_mode)
+    for params, expected in ((grey, grey_mode), (color, color_mode)):
+        whole = SheetRenderer().render(params)
+        assert whole.mode == expected
+        path = tmp_path / "vel.png"
+        with monkeypatch.context() as patch:
+            patch.setattr(renderer, "MAX_PAGE_BYTES", 1)
+            SheetRenderer().save(params, str(path))
+        with Image.open(path) as streamed:
+            assert streamed.mode == expected
+            assert streamed.convert("RGB").tobytes() == whole.convert("RGB").tobytes()
+
+
+def test_grey_palette_is_exact():
+    params = LabelSheetParams(text="Zeep")
+    grey = SheetRenderer().render(replace(params, image_mode="L"))
+    assert SheetRenderer().render(replace(params, image_mode="P")).convert("L").tobytes() == \
+        grey.tobytes()
+
+
+def _plan_image(size, mode, draw_ops):
+    """Voert alleen de operaties van draw_ops(plan) uit op een wit vel"""
+    plan = renderer.SheetPlan(size, mode, "auto", (), [])
+    draw_ops(plan)
+    return SheetRenderer()._compose(plan)
+
+
+def _cells(layout):
+    return [layout.cell_origin(row, col)
+            for row in range(layout.rows) for col in range(layout.cols)]
+
+
+@pytest.mark.parametrize("params", [
+    ShapeSheetParams(line_thickness=3, dpi=100),
+    # Zonder marge overlappen de tegels van naburige cellen
+    ShapeSheetParams(shape_type="Cirkel", line_thickness=5, margin_cm=0, dpi=100),
+    ShapeSheetParams(shape_type="Driehoek", line_thickness=4, dpi=100),
+], ids=["Rechthoek", "Cirkel", "Driehoek"])
+def test_stamped_shapes_match_direct_drawing(params):
+    layout = renderer.shape_plan(params).page
+    stamper = SheetRenderer()
+    layers = stamper._shape_layers(layout, params)
+    size = (layout.page_width, layout.page_height)
+    stamped = _plan_image(size, "L",
+                          lambda plan: stamper._stamp_grid(plan, layout, layers, "black"))
+
+    # Op een masker van het hele vel: de driehoek wist zijn binnenkant met 0
+    mask = Image.new("1", size, 0)
+    draw = ImageDraw.Draw(mask)
+    for x, y in _cells(layout):
+        stamper._draw_shape(draw, params.shape_type, x, y, layout.cell_width,
+                            layout.cell_height, params.line_thickness)
+    direct = Image.new("L", size, "white")
+    direct.paste(0, mask=mask)
+    assert stamped.tobytes() == direct.tobytes()
+
+
+def test_stamped_labels_match_direct_drawing():
+    params = LabelSheetParams(text="Zeep", dpi=100)
+    layout = renderer.label_plan(params).page
+    stamper = SheetRenderer()
+    layers = stamper._label_layers(layout, params, params.text, "")
+    size = (layout.page_width, layout.page_height)
+    stamped = _plan_image(size, "L",
+                          lambda plan: stamper._stamp_grid(plan, layout, layers, "black"))
+
+    # Tekst gecentreerd in het tekstvak, zoals _label_text dat doet
+    text_box, _ = renderer.label_regions(layout, True, False)
+    size_pt, text = renderer.label_text_style(text_box, params, params.text)
+    bbox = textfit.text_bbox(text, registry.family, size_pt)
+    text_x = text_box[0] + (text_box[2] - (bbox[2] - bbox[0])) // 2
+    text_y = text_box[1] + (text_box[3] - (bbox[3] - bbox[1])) // 2
+    direct = Image.new("L", size, "white")
+    draw = ImageDraw.Draw(direct)
+    for x, y in _cells(layout):
+        draw.rectangle([x, y, x + layout.cell_width, y + layout.cell_height], outline=0)
+        draw.text((x + text_x, y + text_y), text, font=get_font(size_pt), fill=0)
+    assert stamped.tobytes() == direct.tobytes()
+
+
+def test_cached_overlays_match_direct_drawing():
+    layout = renderer.shape_plan(ShapeSheetParams(dpi=100)).page
+    size = (layout.page_width, layout.page_height)
+    # Een tekstpunt achter de komma, zoals het midden van een oneven breed vel
+    watermark = (layout.page_width / 2 + 0.5, layout.page_height - 35)
+
+    def overlays(plan):
+        drawer = SheetRenderer()
+        drawer._draw_title(plan)
+        drawer._draw_count(plan, layout)
+        drawer._draw_text_layer(plan, watermark, "Vorm", 50, (150, 150, 150), anchor="mb")
+    cached = _plan_image(size, "RGB", overlays)
+
+    direct = Image.new("RGB", size, "white")
+    # De titel: schaduwlagen en hoofdtekst op een RGBA laag, gedraaid en geplakt
+    title_font = get_font(renderer.TITLE_FONT_SIZE)
+    bbox = title_font.getbbox(renderer.TITLE_TEXT)
+    txt = Image.new("RGBA", (bbox[2] - bbox[0] + 300, bbox[3] - bbox[1] + 300),
+                    (255, 255, 255, 0))
+    d = ImageDraw.Draw(txt)
+    for dx, dy in renderer.TITLE_PASSES:
+        alpha = 255 if (dx, dy) == (0, 0) else 80
+        d.text((150 + dx, 150 + dy), renderer.TITLE_TEXT, font=title_font, fill=(0, 0, 0, alpha))
+    txt = txt.rotate(renderer.TITLE_ANGLE, expand=1, fillcolor=(255, 255, 255, 0))
+    direct.paste(txt, (direct.width // 2 - txt.width // 2, 30), txt)
+
+    draw = ImageDraw.Draw(direct)
+    count_font = get_font(renderer.COUNT_FONT_SIZE)
+    count_text = str(layout.count)
+    count_bbox = count_font.getbbox(count_text)
+    x = layout.page_width - (count_bbox[2] - count_bbox[0]) - 40
+    y = layout.page_height - 160
+    for dx, dy in renderer.COUNT_PASSES:
+        draw.text((x + dx, y + dy), count_text, font=count_font, fill="black")
+    draw.text(watermark, "Vorm", font=get_font(50), fill=(150, 150, 150), anchor="mb")
+    assert cached.tobytes() == direct.tobytes()
+
+
+def _outline(shape_type, thickness):
+    mask = Image.new("1", (120, 100), 0)
+    SheetRenderer()._draw_shape(ImageDraw.Draw(mask), shape_type, 10, 10, 100, 80, thickness)
+    return mask
+
+
+@pytest.mark.parametrize("thickness", [1, 2, 3, 4, 5])
+def test_single_pass_rectangle_matches_repeated_outlines(thickness):
+    # De oude tekenwijze: een 1 pixel rand per stap naar binnen
+    direct = Image.new("1", (120, 100), 0)
+    draw = ImageDraw.Draw(direct)
+    for i in range(thickness):
+        offset = i - thickness // 2
+        draw.rectangle([10 + offset, 10 + offset, 110 - offset, 90 - offset], outline=255)
+    assert _outline("Rechthoek", thickness).tobytes() == direct.tobytes()
+
+
+def test_thin_triangle_matches_polygon_outline():
+    direct = Image.new("1", (120, 100), 0)
+    ImageDraw.Draw(direct).polygon([(60, 10), (10, 90), (110, 90)], outline=255)
+    assert _outline("Driehoek", 1).tobytes() == direct.tobytes()
+
+
+@pytest.mark.parametrize("shape_type", ["Cirkel", "Driehoek"])
+@pytest.mark.parametrize("thickness", [2, 3, 4, 5, 8])
+def test_single_pass_lines_are_as_thick_as_rectangle(shape_type, thickness):
+    def column(mask):
+        return [y for y in range(50, 100) if mask.getpixel((60, y))]
+    # Onderrand in het midden: even dik en op dezelfde plek als bij de rechthoek
+    assert column(_outline(shape_type, thickness)) == \
+        column(_outline("Rechthoek", thickness))
+    assert len(column(_outline(shape_type, thickness))) == thickness
@@ -0,0 +1,57 @@
+import pytest
+
+from textfit import REFERENCE_SIZE, _Estimate, fit_text, measure, wrap_words
+
+
+def mono(text, size):
+    """Vast lettertype: elk teken 0.6 em breed, elke regel 1 em hoog"""
+    lines = text.split("\n")
+    return round(max(len(line) for line in lines) * 0.6 * size), len(lines) * size
+
+
+def test_estimate_scales_reference_widths():
+    estimate = _Estimate("aaaa bbbb\ncc", mono)
+    assert estimate.space == mono("x", REFERENCE_SIZE)[0]
+    assert estimate.line_pitch == REFERENCE_SIZE
+    assert [words for words, _ in estimate.lines(10, 1000, False)] == \
+        [["aaaa", "bbbb"], ["cc"]]
+    # Op grootte 10 is "aaaa" 24 breed: met 30 past er een woord per regel
+    assert [words for words, _ in estimate.lines(10, 30, True)] == [["aaaa"], ["bbbb"], ["cc"]]
+    assert estimate.fits(10, 54, 20, False) and not estimate.fits(10, 53, 20, False)
+
+
+def test_fit_text_largest_size():
+    assert fit_text("abc", 60, 20, measure=mono) == (20, "abc")
+    assert fit_text("abc", 36, 100, measure=mono) == (20, "abc")
+
+
+def test_fit_text_wraps():
+    assert fit_text("aaaa bbbb", 30, 100, wrap=True, measure=mono) == (12, "aaaa\nbbbb")
+    assert wrap_words("aaaa bbbb", 12, 30, measure=mono) == "aaaa\nbbbb"
+
+
+def test_fit_text_limits():
+    assert fit_text("abc", 1, 1, measure=mono) == (8, "abc")
+    assert fit_text("abc", 1000, 1000, measure=mono, max_size=50) == (50, "abc")
+
+
+def test_fit_text_measures_only_a_few_sizes():
+    sizes = []
+
+    def counting(text, size):
+        sizes.append(size)
+        return mono(text, size)
+
+    fit_text("een wat langere regel tekst voor een label", 400, 300, wrap=True,
+             measure=counting)
+    assert len([size for size in sizes if size != REFERENCE_SIZE]) <= 3
+
+
+@pytest.mark.parametrize("wrap", [False, True])
+def test_fit_text_with_real_font(wrap):
+    text = "Machine Coating lot 12"
+    size, fitted = fit_text(text, 300, 120, wrap=wrap, max_size=200)
+    width, height = measure(fitted, size)
+    assert width <= 300 and height <= 120
+    larger = fit_text(text, 300, 120, wrap=wrap, min_size=size + 1, max_size=size + 1)[1]
+    assert measure(larger, size + 1)[0] > 300 or measure(larger, size + 1)[1] > 120
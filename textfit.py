@@ -0,0 +1,126 @@
+"""Tekst meten en passend maken in een label
+
+Metingen worden gecachet op (tekst, lettertype, grootte), zodat dezelfde
+tekst nooit twee keer gemeten wordt. fit_text zoekt de grootste lettergrootte
+(optioneel met regelafbreking) die in een vak past: de binaire zoektocht
+rekent met woordbreedtes die eenmaal op REFERENCE_SIZE gemeten en daarna
+geschaald worden, en alleen de uitkomst wordt echt gemeten. Bij data merge
+kost een tekst daardoor maar een handvol metingen.
+"""
+import functools
+import math
+
+from PIL import Image, ImageDraw
+
+from fonts import get_font, registry
+from render_stats import stage
+
+MIN_FONT_SIZE = 8
+# Lettergrootte waarop woorden gemeten worden voor de schatting
+REFERENCE_SIZE = 100
+# Regelafstand van PIL's multiline_text
+LINE_SPACING = 4
+
+_measure_draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+
+@functools.lru_cache(maxsize=8192)
+def text_bbox(text, family, size):
+    """Bounding box van (meerregelige) tekst, gemeten zoals ze getekend wordt (L)
+
+    family hoort bij de cache sleutel; het lettertype zelf komt uit het register.
+    """
+    font = get_font(size)
+    with stage("measure"):
+        if "\n" in text:
+            left, top, right, bottom = _measure_draw.multiline_textbbox(
+                (0, 0), text, font=font, spacing=LINE_SPACING, align="center")
+            return (math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom))
+        return _measure_draw.textbbox((0, 0), text, font=font)
+
+
+def measure(text, size):
+    """(breedte, hoogte) van text met het gekozen lettertype"""
+    left, top, right, bottom = text_bbox(text, registry.family, size)
+    return right - left, bottom - top
+
+
+class _Estimate:
+    """Maten van een tekst op REFERENCE_SIZE, lineair geschaald naar elke grootte"""
+
+    def __init__(self, text, measure):
+        ref = REFERENCE_SIZE
+        self.paragraphs = [[(word, measure(word, ref)[0]) for word in paragraph.split()]
+                           for paragraph in text.split("\n")]
+        self.space = measure("x x", ref)[0] - measure("xx", ref)[0]
+        self.line_height = measure(" ".join(text.split()) or "x", ref)[1]
+        self.line_pitch = measure("x\nx", ref)[1] - measure("x", ref)[1]
+
+    def lines(self, size, width, wrap):
+        """Regels als (woorden, breedte op REFERENCE_SIZE)"""
+        limit = width * REFERENCE_SIZE / size if wrap else math.inf
+        lines = []
+        for words in self.paragraphs:
+            line, line_width = [], 0
+            for word, word_width in words:
+                new_width = line_width + self.space + word_width if line else word_width
+                if line and new_width > limit:
+                    lines.append((line, line_width))
+                    line, new_width = [], word_width
+                line.append(word)
+                line_width = new_width
+            lines.append((line, line_width))
+        return lines
+
+    def fits(self, size, width, height, wrap):
+        lines = self.lines(size, width, wrap)
+        scale = size / REFERENCE_SIZE
+        text_width = max(line_width for _, line_width in lines) * scale
+        text_height = (self.line_height + self.line_pitch * (len(lines) - 1)) * scale
+        return text_width <= width and text_height <= height
+
+
+def _join(lines):
+    return "\n".join(" ".join(words) for words, _ in lines)
+
+
+def wrap_words(text, size, width, measure=measure):
+    """Breekt text op woordgrenzen af zodat elke regel (zo mogelijk) in width past"""
+    return _join(_Estimate(text, measure).lines(size, width, True))
+
+
+def fit_text(text, width, height, wrap=False, measure=measure,
+             min_size=MIN_FONT_SIZE, max_size=None):
+    """Grootste lettergrootte waarbij text in width x height past
+
+    Geeft (grootte, tekst) terug; met wrap bevat de tekst regelovergangen.
+    Past zelfs min_size niet, dan wordt min_size gebruikt.
+    """
+    estimate = _Estimate(text, measure)
+    max_size = max(max_size or height, min_size)
+
+    def layout(size):
+        return _join(estimate.lines(size, width, True)) if wrap else text
+
+    def fits(size):
+        text_width, text_height = measure(layout(size), size)
+        return text_width <= width and text_height <= height
+
+    # Binaire zoektocht op de schatting, zonder nieuwe metingen
+    low, high = min_size, max_size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate.fits(middle, width, height, wrap):
+            low = middle
+        else:
+            high = middle - 1
+
+    # De uitkomst echt meten en zo nodig een stap opschuiven
+    size = low
+    if fits(size):
+        while size < max_size and fits(size + 1):
+            size += 1
+    else:
+        while size > min_size and not fits(size):
+            size -= 1
+    return size, layout(size)